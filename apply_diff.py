@@ -0,0 +1,58 @@
+"""法人番号の差分データを顧問先レジストリの差分ファイルに反映
+
+国税庁 法人番号公表サイトの差分データ（新規・変更・閉鎖）を読み、法人番号ごとの最新の状態を
+差分ファイル（TSV）にまとめます。全件のレジストリやスナップショットは作り直しません。
+
+実行例:
+    # 日次の差分を反映する（差分ファイルがなければ作成）
+    python apply_diff.py diff_20251031.zip -d companies.delta.tsv
+
+    # 複数日分をまとめて反映する（日付の古い順に指定）
+    python apply_diff.py diff_20251030.zip diff_20251031.zip -d companies.delta.tsv
+
+差分で追加・変更されたレコードの読みキーも、拡張子を .readings.json に替えたファイルに作り直します。
+
+作成したファイルは環境変数 CLIENT_REGISTRY_DELTA で指定します。変更・削除するレコードを法人番号で
+特定するため、重ねるインデックスは法人番号を含むレジストリ（ingest_houjin.pyで作成）から作ってください。
+差分がたまったら、全件データからレジストリ・スナップショットを作り直して差分ファイルを空にしてください。
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from src.test_agent.client_index.delta import RegistryDelta
+from src.test_agent.client_index.houjin import DEFAULT_KINDS, iter_houjin_csv
+from src.test_agent.client_index.readings import build_readings, readings_path, save_readings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="法人番号の差分データを顧問先レジストリの差分ファイルに反映")
+    parser.add_argument("inputs", nargs="+", type=Path, help="法人番号の差分データ（zipまたはcsv。古い順）")
+    parser.add_argument("-d", "--delta", type=Path, required=True, help="更新する差分ファイル（TSV）")
+    parser.add_argument(
+        "--kinds",
+        default=",".join(sorted(DEFAULT_KINDS)),
+        help="取り込む法人種別コード（カンマ区切り）",
+    )
+    parser.add_argument("--encoding", help="入力の文字コード（省略時は自動判定）")
+    parser.add_argument("--no-readings", action="store_true", help="差分の読みキーのファイルを作成しない")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    delta = RegistryDelta.load(args.delta)
+    kinds = frozenset(args.kinds.split(","))
+    applied = sum(delta.apply_rows(iter_houjin_csv(path, args.encoding), kinds=kinds) for path in args.inputs)
+    delta.save(args.delta)
+    if not args.no_readings:
+        save_readings(readings_path(args.delta), build_readings([record.name for record in delta.upserts.values()]))
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{applied}行を反映しました: {args.delta}"
+        f"（追加・変更 {len(delta.upserts)}件、削除 {len(delta.removed)}件、{elapsed:.1f}秒）"
+    )
+
+
+if __name__ == "__main__":
+    main()
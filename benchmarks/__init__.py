@@ -0,0 +1 @@
+"""顧問先インデックスのベンチマーク"""
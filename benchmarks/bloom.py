@@ -0,0 +1,71 @@
+"""顧問先名のBloomフィルタの有無による、スナップショット・SQLiteの検証の比較
+
+実行方法:
+    python -m benchmarks.bloom
+"""
+
+import tempfile
+from pathlib import Path
+
+from src.test_agent.client_index import ClientIndex, IndexSnapshot, write_snapshot, write_sqlite
+from src.test_agent.client_index.bloom import DEFAULT_ERROR_RATE, expected_error_rate
+
+from .common import DEFAULT_SIZES, measure, print_row, sample_queries, synthetic_names
+
+QUERIES = 2_000
+
+
+def benchmark_bloom(sizes: tuple[int, ...] = DEFAULT_SIZES, error_rate: float = DEFAULT_ERROR_RATE) -> None:
+    """
+    検証（完全一致）のヒット・ミスと、登録されていない名前のlookupのレイテンシを、
+    スナップショット・SQLiteデータベースでBloomフィルタの有無ごとに比較する
+
+    ミスのクエリのうちBloomフィルタを通過した割合（実測の誤検出率）とフィルタの大きさも表示します。
+    読みの事前計算は件数が多いと時間がかかるため、読みなしで構築します。
+
+    Args:
+        sizes: 計測するレジストリ件数
+        error_rate: Bloomフィルタの誤検出率
+    """
+    print("=" * 90)
+    print(f"顧問先名のBloomフィルタ（誤検出率 {error_rate}）")
+    print("=" * 90)
+
+    for size in sizes:
+        names = synthetic_names(size)
+        hits, misses = sample_queries(names, QUERIES)
+
+        with tempfile.TemporaryDirectory() as directory:
+            snapshot_path = Path(directory) / "clients.snapshot"
+            sqlite_path = Path(directory) / "clients.sqlite"
+            write_snapshot(snapshot_path, names, bloom_error_rate=error_rate)
+            write_sqlite(sqlite_path, names, bloom_error_rate=error_rate)
+            snapshot = IndexSnapshot.open(snapshot_path)
+
+            bloom = snapshot.bloom
+            assert bloom is not None
+            passed = sum(query in bloom for query in misses if query not in names)
+            print(
+                f"Bloomフィルタ: {bloom.nbytes / 1024:.0f}KB、誤検出率 実測 {passed / len(misses):.2%}"
+                f"（理論値 {expected_error_rate(bloom.nbytes * 8 / len(set(names))):.2%}）"
+            )
+            print_row("Bloomフィルタ 判定", size, measure(bloom.__contains__, misses))
+
+            indexes = (
+                ("snapshot", ClientIndex.from_snapshot(snapshot, use_bloom=False)),
+                ("snapshot+bloom", ClientIndex.from_snapshot(snapshot)),
+                ("sqlite", ClientIndex.from_sqlite(sqlite_path, use_bloom=False)),
+                ("sqlite+bloom", ClientIndex.from_sqlite(sqlite_path)),
+            )
+            for label, index in indexes:
+                print_row(f"{label} 検証（ヒット）", size, measure(index.__contains__, hits))
+                print_row(f"{label} 検証（ミス）", size, measure(index.__contains__, misses))
+                print_row(f"{label} 完全一致（ミス）", size, measure(index.find_exact, misses))
+            print()
+
+            del indexes, bloom, snapshot
+        del names
+
+
+if __name__ == "__main__":
+    benchmark_bloom()
@@ -0,0 +1,46 @@
+"""ワーカープロセス数ごとのスナップショットの構築時間の比較
+
+実行方法:
+    python -m benchmarks.build
+
+並列に処理できるのは正規化・読みの変換と索引の構築で、CPUコア数を超えるワーカー数では速くなりません。
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from src.test_agent.client_index import RecordStore, build_index_file
+
+from .common import synthetic_names
+
+SIZES = (100_000, 1_000_000)
+WORKERS = (1, 2, 4, 8)
+
+
+def benchmark_build(sizes: tuple[int, ...] = SIZES, workers: tuple[int, ...] = WORKERS) -> None:
+    """
+    ワーカー数ごとに、読みを含むスナップショットの構築の段階ごとの所要時間を比較する
+
+    Args:
+        sizes: 計測するレジストリ件数
+        workers: 計測するワーカー数（1は並列化しない）
+    """
+    print("=" * 90)
+    print(f"ワーカー数ごとのスナップショットの構築時間（CPUコア数 {os.cpu_count()}）")
+    print("=" * 90)
+
+    for size in sizes:
+        records = RecordStore(synthetic_names(size))
+        print(f"{size:,}件")
+        with tempfile.TemporaryDirectory() as directory:
+            for count in workers:
+                timings = build_index_file(Path(directory) / "clients.snapshot", records, workers=count)
+                stages = "  ".join(f"{stage} {elapsed:>6.1f}秒" for stage, elapsed in timings.items())
+                print(f"{count:>2}ワーカー  合計 {sum(timings.values()):>6.1f}秒  {stages}")
+        print()
+        del records
+
+
+if __name__ == "__main__":
+    benchmark_build()
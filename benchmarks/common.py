@@ -0,0 +1,98 @@
+"""ベンチマーク共通処理"""
+
+import random
+import statistics
+import time
+from collections.abc import Callable, Sequence
+
+from companies_12000_list import companies
+from src.test_agent.client_index.normalize import split_legal_form
+
+# ベンチマークで使うレジストリ件数（12,000件 / 100万件 / 500万件）
+DEFAULT_SIZES = (12_000, 1_000_000, 5_000_000)
+
+
+def synthetic_names(size: int) -> list[str]:
+    """
+    実データの顧問先名を元に、指定件数の擬似レジストリを生成する
+
+    先頭の12,000件は実データそのままで、それ以降は2社の名称（法人格を除いた部分）の
+    前半と後半をつなぎ、片方の法人格を付けた名前にします。連番を付けるだけだと
+    似た名前が密集し、実際のレジストリと分布が大きく変わるためです。
+
+    Args:
+        size: 生成する件数
+
+    Returns:
+        list[str]: 顧問先名のリスト
+    """
+    parts = [split_legal_form(name) for name in companies]
+    rng = random.Random(size)
+
+    names = list(companies[:size])
+    while len(names) < size:
+        form, position, head = parts[rng.randrange(len(parts))]
+        _, _, tail = parts[rng.randrange(len(parts))]
+        core = head[: (len(head) + 1) // 2] + tail[len(tail) // 2 :]
+        if form is None:
+            names.append(core)
+        elif position == "prefix":
+            names.append(form + core)
+        else:
+            names.append(core + form)
+    return names
+
+
+def sample_queries(names: Sequence[str], count: int, seed: int = 0) -> tuple[list[str], list[str]]:
+    """
+    ヒットするクエリとヒットしないクエリを同数ずつ作る
+
+    Args:
+        names: レジストリの顧問先名
+        count: それぞれのクエリ数
+        seed: 乱数シード
+
+    Returns:
+        tuple: (ヒットするクエリ, ヒットしないクエリ)
+    """
+    rng = random.Random(seed)
+    hits = (
+        rng.sample(list(names), count)
+        if len(names) <= 100_000
+        else [names[rng.randrange(len(names))] for _ in range(count)]
+    )
+    misses = [f"{name}存在しない" for name in hits]
+    return hits, misses
+
+
+def measure(func: Callable[[str], object], queries: Sequence[str]) -> dict[str, float]:
+    """
+    クエリ1件ごとのレイテンシを計測する
+
+    Args:
+        func: 計測対象の関数
+        queries: 入力クエリ
+
+    Returns:
+        dict: 平均・中央値・p99（マイクロ秒）
+    """
+    timings = []
+    for query in queries:
+        start = time.perf_counter_ns()
+        func(query)
+        timings.append((time.perf_counter_ns() - start) / 1000)
+
+    timings.sort()
+    return {
+        "mean_us": statistics.fmean(timings),
+        "p50_us": timings[len(timings) // 2],
+        "p99_us": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+    }
+
+
+def print_row(label: str, size: int, stats: dict[str, float]) -> None:
+    """計測結果を1行で表示する"""
+    print(
+        f"{label:<24} {size:>10,}件  "
+        f"mean {stats['mean_us']:>10.2f}µs  p50 {stats['p50_us']:>10.2f}µs  p99 {stats['p99_us']:>10.2f}µs"
+    )
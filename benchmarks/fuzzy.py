@@ -0,0 +1,51 @@
+"""あいまい検索（誤字許容）のレイテンシ計測
+
+実行方法:
+    python -m benchmarks.fuzzy
+"""
+
+import random
+
+from src.test_agent.client_index import ClientIndex
+
+from .common import measure, print_row, synthetic_names
+
+SIZES = (12_000, 1_000_000)
+QUERIES = 2_000
+
+
+def typo_queries(names: list[str], count: int, seed: int = 0) -> list[str]:
+    """登録名の末尾付近の1文字を別の文字に置き換えたクエリを作る"""
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        name = names[rng.randrange(len(names))]
+        if len(name) < 6:
+            continue
+        position = rng.randrange(len(name) - 3, len(name))
+        queries.append(name[:position] + "語" + name[position + 1 :])
+    return queries
+
+
+def benchmark_fuzzy(sizes: tuple[int, ...] = SIZES) -> None:
+    """
+    1文字の打ち間違いを含むクエリのあいまい検索を件数ごとに計測する
+
+    Args:
+        sizes: 計測するレジストリ件数
+    """
+    print("=" * 90)
+    print("あいまい検索レイテンシ")
+    print("=" * 90)
+
+    for size in sizes:
+        names = synthetic_names(size)
+        index = ClientIndex(names)
+        # 削除辞書は最初の検索時に構築されるため、構築時間を最初のクエリに含めないよう先に構築する
+        index.warm_up()
+        print_row("fuzzy（1文字誤り）", size, measure(index.find_fuzzy, typo_queries(names, QUERIES)))
+        del names, index
+
+
+if __name__ == "__main__":
+    benchmark_fuzzy()
@@ -0,0 +1,79 @@
+"""エントリーポイントごとの読み込み時間の比較
+
+実行方法:
+    python -m benchmarks.imports
+
+読み込み済みのモジュールの影響を受けないよう、計測ごとに新しいPythonプロセスを起動します。
+エージェントの定義はgoogle.adkを読み込むため、インストールされていない場合は失敗の理由を表示して計測しません。
+"""
+
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+RUNS = 10
+
+# (ラベル, 計測する文)
+ENTRY_POINTS = (
+    ("ツールのモジュール", "from src.test_agent.tools import step1_get_client_info"),
+    ("パッケージからツール", "from src.test_agent import step1_get_client_info"),
+    ("ツール + 最初の検索", "from src.test_agent import step1_get_client_info; step1_get_client_info('株式会社青空')"),
+    ("エージェント", "from src.test_agent import root_agent"),
+)
+
+_TIMER = """
+import time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+"""
+
+
+def _run(statement: str) -> float:
+    """
+    新しいプロセスで文を実行し、所要時間（秒）を返す
+
+    Raises:
+        subprocess.CalledProcessError: 文の実行に失敗した場合
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", _TIMER.format(statement=statement)],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.split()[-1])
+
+
+def benchmark_imports(runs: int = RUNS) -> None:
+    """
+    ツールだけを使う場合とエージェントを使う場合の読み込み時間を比較する
+
+    以前はどのエントリーポイントもパッケージの読み込み時にエージェントの定義（google.adk）を
+    読み込んでいたため、エージェントの行がツールだけを使う場合の以前の読み込み時間に当たります。
+
+    Args:
+        runs: エントリーポイントごとの計測回数
+    """
+    print("=" * 90)
+    print(f"エントリーポイントごとの読み込み時間（{runs}回の中央値）")
+    print("=" * 90)
+
+    for label, statement in ENTRY_POINTS:
+        try:
+            timings = [_run(statement) for _ in range(runs)]
+        except subprocess.CalledProcessError as e:
+            # 例外のメッセージ（標準エラー出力の最後の行）を理由として表示する
+            lines = e.stderr.strip().splitlines()
+            print(f"{label:<16} 実行できません（{lines[-1] if lines else f'終了コード {e.returncode}'}）")
+            continue
+        median = statistics.median(timings) * 1000
+        print(f"{label:<16} 中央値 {median:>9.1f}ms  最小 {min(timings) * 1000:>9.1f}ms")
+    print()
+
+
+if __name__ == "__main__":
+    benchmark_imports()
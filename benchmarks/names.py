@@ -0,0 +1,68 @@
+"""顧問先名の保持方法（strのリスト / 前方圧縮した文字列表 / 法人格の辞書化）のメモリ量とレイテンシの比較
+
+実行方法:
+    python -m benchmarks.names
+"""
+
+import random
+import sys
+import time
+from itertools import islice
+
+from src.test_agent.client_index.records import LegalFormNameTable
+from src.test_agent.client_index.strings import FrontCodedStringTable
+
+from .common import DEFAULT_SIZES, measure, print_row, sample_queries, synthetic_names
+
+QUERIES = 10_000
+
+
+def benchmark_names(sizes: tuple[int, ...] = DEFAULT_SIZES) -> None:
+    """
+    顧問先名のリスト・前方圧縮した文字列表・法人格を辞書化した列について、1件あたりのメモリ量と
+    番号による参照・完全一致・前方一致のレイテンシを件数ごとに比較する
+
+    Args:
+        sizes: 計測するレジストリ件数
+    """
+    print("=" * 90)
+    print("顧問先名の保持: strのリスト / 前方圧縮した文字列表 / 法人格の辞書化")
+    print("=" * 90)
+
+    for size in sizes:
+        names = synthetic_names(size)
+        hits, misses = sample_queries(names, QUERIES)
+        rng = random.Random(size)
+        record_ids = [rng.randrange(size) for _ in range(QUERIES)]
+
+        list_bytes = sys.getsizeof(names) + sum(sys.getsizeof(name) for name in names)
+        start = time.perf_counter()
+        table = FrontCodedStringTable.from_strings(names)
+        build_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        legal_forms = LegalFormNameTable.from_names(names)
+        legal_form_seconds = time.perf_counter() - start
+        print(
+            f"1件あたり: list {list_bytes / size:.1f}B / 前方圧縮 {table.nbytes / size:.1f}B"
+            f"（構築 {build_seconds:.1f}秒） / 法人格の辞書化 {legal_forms.nbytes / size:.1f}B"
+            f"（構築 {legal_form_seconds:.1f}秒、法人格の表記 {len(legal_forms.affixes)}種類）"
+        )
+
+        print_row("前方圧縮 番号で参照", size, measure(table.__getitem__, record_ids))
+        print_row("前方圧縮 完全一致（ヒット）", size, measure(table.get, hits))
+        print_row("前方圧縮 完全一致（ミス）", size, measure(table.get, misses))
+        print_row(
+            "前方圧縮 前方一致（10件）",
+            size,
+            measure(lambda query, table=table: list(islice(table.iter_prefix(query), 10)), hits),
+        )
+        print_row("法人格の辞書化 番号で参照", size, measure(legal_forms.__getitem__, record_ids))
+        print_row("法人格の辞書化 完全一致（ヒット）", size, measure(legal_forms.get, hits))
+        print_row("法人格の辞書化 完全一致（ミス）", size, measure(legal_forms.get, misses))
+        print()
+
+        del names, table, legal_forms
+
+
+if __name__ == "__main__":
+    benchmark_names()
@@ -0,0 +1,61 @@
+"""完全一致の存在確認に使う集合のメモリ量とレイテンシの比較
+
+実行方法:
+    python -m benchmarks.perfect
+"""
+
+import sys
+import time
+
+from src.test_agent.client_index.perfect import PerfectHashTable
+from src.test_agent.client_index.snapshot import _build_slots
+from src.test_agent.client_index.strings import StringTable
+
+from .common import DEFAULT_SIZES, measure, print_row, sample_queries, synthetic_names
+
+QUERIES = 10_000
+
+
+def benchmark_perfect_hash(sizes: tuple[int, ...] = DEFAULT_SIZES) -> None:
+    """
+    set[str]・スナップショットのハッシュ表・最小完全ハッシュのメモリ量と検証のレイテンシを比較する
+
+    ハッシュ表と最小完全ハッシュは、スナップショットと同じく顧問先名の文字列表を参照します。
+    メモリ量には文字列表を含めません（どの方式でも検索結果の表示に必要なため）。
+
+    Args:
+        sizes: 計測するレジストリ件数
+    """
+    print("=" * 90)
+    print("完全一致の存在確認: set / ハッシュ表 / 最小完全ハッシュ")
+    print("=" * 90)
+
+    for size in sizes:
+        names = synthetic_names(size)
+        hits, misses = sample_queries(names, QUERIES)
+
+        # 集合が持つ文字列オブジェクトも1ワーカーごとのメモリに含める
+        name_set = set(names)
+        set_bytes = sys.getsizeof(name_set) + sum(sys.getsizeof(name) for name in name_set)
+        slots_bytes = _build_slots(names).buffer_info()[1] * 4
+
+        table = StringTable.from_strings(names)
+        start = time.perf_counter()
+        perfect = PerfectHashTable.build(table)
+        build_seconds = time.perf_counter() - start
+
+        print(
+            f"1キーあたり: set {set_bytes / len(name_set):.1f}B / ハッシュ表 {slots_bytes / len(name_set):.1f}B / "
+            f"最小完全ハッシュ {perfect.nbytes / len(perfect):.1f}B（構築 {build_seconds:.1f}秒）"
+        )
+        print_row("set（ヒット）", size, measure(name_set.__contains__, hits))
+        print_row("set（ミス）", size, measure(name_set.__contains__, misses))
+        print_row("最小完全ハッシュ（ヒット）", size, measure(perfect.__contains__, hits))
+        print_row("最小完全ハッシュ（ミス）", size, measure(perfect.__contains__, misses))
+        print()
+
+        del names, name_set, table, perfect
+
+
+if __name__ == "__main__":
+    benchmark_perfect_hash()
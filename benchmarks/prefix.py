@@ -0,0 +1,48 @@
+"""前方一致による入力補完（上位10件）のレイテンシ計測
+
+実行方法:
+    python -m benchmarks.prefix
+"""
+
+import random
+from itertools import islice
+
+from src.test_agent.client_index.normalize import normalize_name
+from src.test_agent.client_index.prefix import SortedKeyArray
+
+from .common import DEFAULT_SIZES, measure, print_row, synthetic_names
+
+QUERIES = 10_000
+COMPLETIONS = 10
+
+
+def prefix_queries(keys: list[str], count: int, seed: int = 0) -> list[str]:
+    """登録キーの先頭1〜6文字を入力途中のクエリとして作る"""
+    rng = random.Random(seed)
+    return [key[: rng.randint(1, 6)] for key in (keys[rng.randrange(len(keys))] for _ in range(count))]
+
+
+def benchmark_prefix(sizes: tuple[int, ...] = DEFAULT_SIZES) -> None:
+    """
+    ソート済みキー配列から上位10件の補完候補を取り出す時間を件数ごとに計測する
+
+    Args:
+        sizes: 計測するレジストリ件数
+    """
+    print("=" * 90)
+    print(f"入力補完レイテンシ（上位{COMPLETIONS}件）")
+    print("=" * 90)
+
+    for size in sizes:
+        keys = [normalize_name(name) for name in synthetic_names(size)]
+        sorted_keys = SortedKeyArray(keys)
+
+        def complete(prefix: str, sorted_keys: SortedKeyArray = sorted_keys) -> list[int]:
+            return list(islice(sorted_keys.iter_prefix(prefix), COMPLETIONS))
+
+        print_row("prefix top-10", size, measure(complete, prefix_queries(keys, QUERIES)))
+        del keys, sorted_keys
+
+
+if __name__ == "__main__":
+    benchmark_prefix()
@@ -0,0 +1,66 @@
+"""シャード数ごとの部分一致・あいまい検索のレイテンシの比較
+
+実行方法:
+    python -m benchmarks.shard
+
+シャードはそれぞれ1つのワーカープロセスで動くため、CPUコア数を超えるシャード数では速くなりません。
+"""
+
+import os
+import time
+
+from src.test_agent.client_index import ClientIndex, ShardedIndex
+
+from .common import measure, print_row, sample_queries, synthetic_names
+from .sqlite import partial_queries
+
+# 500万件はシャードごとの構築にも時間がかかるため、100万件までにする
+SIZES = (200_000, 1_000_000)
+SHARDS = (2, 4, 8)
+QUERIES = 1_000
+
+
+def benchmark_shards(sizes: tuple[int, ...] = SIZES, shards: tuple[int, ...] = SHARDS) -> None:
+    """
+    1プロセスのインデックスとシャードに分けたインデックスで、部分一致・あいまい検索のlookupの
+    レイテンシを件数ごとに比較する
+
+    読みの事前計算は件数が多いと時間がかかるため、読みなしで構築します。
+
+    Args:
+        sizes: 計測するレジストリ件数
+        shards: 計測するシャード数
+    """
+    print("=" * 90)
+    print(f"シャード数ごとの部分一致・あいまい検索（CPUコア数 {os.cpu_count()}）")
+    print("=" * 90)
+
+    for size in sizes:
+        names = synthetic_names(size)
+        hits, _ = sample_queries(names, QUERIES)
+        partials = partial_queries(names, QUERIES)
+        # 末尾の1文字を打ち間違えたクエリは、部分一致せずにあいまい検索の段階まで進む
+        typos = [name[:-1] + "語" for name in hits]
+
+        base = ClientIndex(names)
+        start = time.perf_counter()
+        base.warm_up()
+        print(f"{size:,}件（1プロセスの索引の構築 {time.perf_counter() - start:.1f}秒）")
+        print_row("1プロセス 部分一致", size, measure(base.lookup, partials))
+        print_row("1プロセス あいまい検索", size, measure(base.lookup, typos))
+
+        for count in shards:
+            start = time.perf_counter()
+            sharded = ShardedIndex(base, count)
+            sharded.warm_up()
+            print(f"{count}シャード（構築 {time.perf_counter() - start:.1f}秒）")
+            print_row(f"{count}シャード 部分一致", size, measure(sharded.lookup, partials))
+            print_row(f"{count}シャード あいまい検索", size, measure(sharded.lookup, typos))
+            sharded.close()
+        print()
+
+        del names, base
+
+
+if __name__ == "__main__":
+    benchmark_shards()
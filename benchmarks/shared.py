@@ -0,0 +1,115 @@
+"""ワーカープロセス数を増やしたときのメモリ量の比較（プロセスごとの構築 / mmap / 共有メモリ）
+
+各ワーカーはインデックスを読み込み、全ての検索段階を通るクエリを実行したあと、
+/proc/self/smaps_rollup のPss（共有ページを参照中のプロセス数で割ったメモリ量）と
+Private（そのプロセスだけが使うメモリ量）を報告します。全ワーカーのPssの合計が、
+実際に消費している物理メモリです。Linuxでのみ実行できます。
+
+実行方法:
+    python -m benchmarks.shared
+"""
+
+import multiprocessing
+import tempfile
+from pathlib import Path
+
+from src.test_agent.client_index import ClientIndex, IndexSnapshot, publish_snapshot, write_snapshot
+
+from .common import sample_queries, synthetic_names
+from .sqlite import partial_queries
+
+# ワーカーごとに構築する場合は100万件で1プロセスあたり約1.5GBになるため、件数を絞る
+SIZES = (12_000, 200_000)
+WORKERS = (1, 2, 4, 8)
+QUERIES = 500
+SHARED_MEMORY_NAME = "client-index-benchmark"
+
+
+def _memory_kb() -> dict[str, int]:
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            label, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                fields[label] = int(value.split()[0])
+    return {"pss": fields["Pss"], "private": fields["Private_Clean"] + fields["Private_Dirty"]}
+
+
+def _worker(mode: str, source: str | list[str], queries: list[str], barrier, results) -> None:
+    if mode == "memory":
+        index = ClientIndex(source)
+        index.warm_up()
+    elif mode == "mmap":
+        index = ClientIndex.from_snapshot(IndexSnapshot.open(Path(source)))
+    else:
+        index = ClientIndex.from_snapshot(IndexSnapshot.attach(source))
+
+    for query in queries:
+        index.lookup(query)
+        index.complete(query)
+    # 全ワーカーがインデックスを参照している状態で計測する（Pssは参照中のプロセス数で割られる）
+    barrier.wait()
+    results.put(_memory_kb())
+    barrier.wait()
+
+
+def _run_workers(mode: str, source: str | list[str], queries: list[str], workers: int) -> list[dict[str, int]]:
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(mode, source, queries, barrier, results)) for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    memory = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return memory
+
+
+def benchmark_shared(sizes: tuple[int, ...] = SIZES, workers: tuple[int, ...] = WORKERS) -> None:
+    """
+    ワーカー数ごとに、全ワーカーのPssの合計と1ワーカーあたりのPrivateを比較する
+
+    読みの事前計算は件数が多いと時間がかかるため、どの方式も読みなしで構築します。
+
+    Args:
+        sizes: 計測するレジストリ件数
+        workers: 計測するワーカー数
+    """
+    print("=" * 90)
+    print("ワーカー数ごとのメモリ量: プロセスごとの構築 / mmap / 共有メモリ")
+    print("=" * 90)
+
+    for size in sizes:
+        names = synthetic_names(size)
+        hits, misses = sample_queries(names, QUERIES)
+        # 完全一致・正規化一致・部分一致・あいまい検索・一致なしの全ての段階を通す
+        queries = hits + [f" {name} " for name in hits] + partial_queries(names, QUERIES)
+        queries += [name[:-1] + "語" for name in hits] + misses
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "clients.snapshot"
+            write_snapshot(path, names)
+            shm = publish_snapshot(path, SHARED_MEMORY_NAME)
+            print(f"{size:,}件（スナップショット {path.stat().st_size / 1024 / 1024:.0f}MB）")
+            try:
+                for mode, source in (("memory", names), ("mmap", str(path)), ("shared", SHARED_MEMORY_NAME)):
+                    for count in workers:
+                        memory = _run_workers(mode, source, queries, count)
+                        pss = sum(usage["pss"] for usage in memory) / 1024
+                        private = sum(usage["private"] for usage in memory) / len(memory) / 1024
+                        print(
+                            f"{mode:<8} {count:>2}ワーカー  Pss合計 {pss:>9.1f}MB  "
+                            f"1ワーカーあたりPss {pss / count:>8.1f}MB  Private {private:>8.1f}MB"
+                        )
+            finally:
+                shm.close()
+                shm.unlink()
+        print()
+        del names
+
+
+if __name__ == "__main__":
+    benchmark_shared()
@@ -0,0 +1,87 @@
+"""SQLiteバックエンドとメモリ上のインデックスの比較
+
+実行方法:
+    python -m benchmarks.sqlite
+"""
+
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from src.test_agent.client_index import ClientIndex, write_sqlite
+
+from .common import DEFAULT_SIZES, measure, print_row, sample_queries, synthetic_names
+
+QUERIES = 2_000
+
+
+def partial_queries(names: list[str], count: int, seed: int = 0) -> list[str]:
+    """登録名の途中の3〜4文字を部分一致のクエリとして作る"""
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        name = names[rng.randrange(len(names))]
+        if len(name) < 6:
+            continue
+        start = rng.randrange(1, len(name) - 4)
+        queries.append(name[start : start + rng.randint(3, 4)])
+    return queries
+
+
+def benchmark_sqlite(sizes: tuple[int, ...] = DEFAULT_SIZES) -> None:
+    """
+    検証（完全一致）・段階的な検索・部分一致のレイテンシを、メモリ上のインデックスと
+    SQLiteデータベースで件数ごとに比較する
+
+    読みの事前計算は件数が多いと時間がかかるため、どちらも読みなしで構築します。
+
+    Args:
+        sizes: 計測するレジストリ件数
+    """
+    print("=" * 90)
+    print("SQLiteバックエンド / メモリ上のインデックス")
+    print("=" * 90)
+
+    for size in sizes:
+        names = synthetic_names(size)
+        hits, misses = sample_queries(names, QUERIES)
+        # 表記ゆれ（全角英数・空白）を含むクエリは正規化一致の段階で見つかる
+        variants = [f" {name} " for name in hits]
+        partials = partial_queries(names, QUERIES)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "clients.sqlite"
+
+            start = time.perf_counter()
+            write_sqlite(path, names)
+            sqlite_build = time.perf_counter() - start
+
+            start = time.perf_counter()
+            memory = ClientIndex(names)
+            memory.warm_up()
+            memory_build = time.perf_counter() - start
+
+            sqlite = ClientIndex.from_sqlite(path)
+            print(
+                f"構築: メモリ {memory_build:.1f}秒 / SQLite {sqlite_build:.1f}秒"
+                f"（{path.stat().st_size / 1024 / 1024:.0f}MB）"
+            )
+
+            for label, index in (("memory", memory), ("sqlite", sqlite)):
+                print_row(f"{label} 検証（ヒット）", size, measure(index.__contains__, hits))
+                print_row(f"{label} 検証（ミス）", size, measure(index.__contains__, misses))
+                print_row(f"{label} lookup（表記ゆれ）", size, measure(index.lookup, variants))
+                print_row(
+                    f"{label} 部分一致",
+                    size,
+                    measure(lambda query, index=index: index.find_partial(query, 20), partials),
+                )
+            print()
+
+            del memory, sqlite
+        del names
+
+
+if __name__ == "__main__":
+    benchmark_sqlite()
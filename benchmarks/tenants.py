@@ -0,0 +1,76 @@
+"""事務所ごとのインデックスのキャッシュのメモリ量の上限と、ヒット率・レイテンシの比較
+
+実行方法:
+    python -m benchmarks.tenants
+"""
+
+import random
+import tempfile
+from pathlib import Path
+
+from src.test_agent.client_index import TenantIndexCache, write_snapshot
+
+from .common import measure, print_row, synthetic_names
+
+TENANTS = 500
+NAMES_PER_TENANT = 300
+QUERIES = 20_000
+# 全事務所のスナップショットの合計に対する、キャッシュのメモリ量の上限の割合
+BUDGETS = (0.05, 0.2, 1.0)
+# 事務所ごとの利用頻度の偏り（Zipf分布の指数。大きいほど一部の事務所に集中する）
+ZIPF_EXPONENT = 1.1
+
+
+def benchmark_tenants(tenants: int = TENANTS, budgets: tuple[float, ...] = BUDGETS) -> None:
+    """
+    事務所ごとのスナップショットを作り、利用頻度が偏ったアクセスでのヒット率・保持するメモリ量・
+    lookupのレイテンシ（キャッシュにない場合の読み込みを含む）をメモリ量の上限ごとに比較する
+
+    Args:
+        tenants: 事務所数
+        budgets: 全事務所のスナップショットの合計に対する、メモリ量の上限の割合
+    """
+    print("=" * 90)
+    print(f"事務所ごとのインデックスのキャッシュ（{tenants}事務所 x {NAMES_PER_TENANT}件）")
+    print("=" * 90)
+
+    names = synthetic_names(tenants * NAMES_PER_TENANT)
+    rng = random.Random(0)
+    weights = [1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(tenants)]
+    requests = rng.choices(range(tenants), weights=weights, k=QUERIES)
+    # 「事務所ID\t顧問先名」の形でクエリにする
+    queries = [
+        f"office{tenant:05d}\t{names[tenant * NAMES_PER_TENANT + rng.randrange(NAMES_PER_TENANT)]}"
+        for tenant in requests
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory)
+        for tenant in range(tenants):
+            start = tenant * NAMES_PER_TENANT
+            write_snapshot(root / f"office{tenant:05d}.snapshot", names[start : start + NAMES_PER_TENANT])
+        total_bytes = sum(path.stat().st_size for path in root.iterdir())
+        print(f"スナップショットの合計 {total_bytes / 1024 / 1024:.1f}MB")
+
+        for budget in budgets:
+            cache = TenantIndexCache(root, int(total_bytes * budget))
+
+            def lookup(query: str, cache: TenantIndexCache = cache) -> None:
+                tenant, name = query.split("\t")
+                with cache.acquire(tenant) as index:
+                    assert index is not None
+                    index.lookup(name)
+
+            stats = measure(lookup, queries)
+            cache_stats = cache.stats()
+            print_row(f"上限 {budget:.0%}", len(queries), stats)
+            print(
+                f"    ヒット率 {cache_stats.hits / (cache_stats.hits + cache_stats.misses):.1%}  "
+                f"保持 {cache_stats.tenants}事務所 {cache_stats.bytes / 1024 / 1024:.1f}MB  "
+                f"追い出し {cache_stats.evictions}回"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    benchmark_tenants()
@@ -0,0 +1,42 @@
+"""step2の顧問先検証（完全一致の存在確認）のレイテンシ計測
+
+実行方法:
+    python -m benchmarks.verification
+"""
+
+from src.test_agent.client_index import ClientIndex
+
+from .common import DEFAULT_SIZES, measure, print_row, sample_queries, synthetic_names
+
+# 線形探索は件数に比例して遅くなるため、計測回数を絞る
+LIST_SCAN_QUERIES = 20
+INDEX_QUERIES = 10_000
+
+
+def benchmark_verification(sizes: tuple[int, ...] = DEFAULT_SIZES) -> None:
+    """
+    listの線形探索とインデックスの集合による検証を件数ごとに比較する
+
+    Args:
+        sizes: 計測するレジストリ件数
+    """
+    print("=" * 90)
+    print("step2 顧問先検証レイテンシ")
+    print("=" * 90)
+
+    for size in sizes:
+        names = synthetic_names(size)
+        index = ClientIndex(names)
+
+        hits, misses = sample_queries(names, INDEX_QUERIES)
+        print_row("list in（ヒット）", size, measure(names.__contains__, hits[:LIST_SCAN_QUERIES]))
+        print_row("list in（ミス）", size, measure(names.__contains__, misses[:LIST_SCAN_QUERIES]))
+        print_row("index（ヒット）", size, measure(index.__contains__, hits))
+        print_row("index（ミス）", size, measure(index.__contains__, misses))
+        print()
+
+        del names, index
+
+
+if __name__ == "__main__":
+    benchmark_verification()
@@ -0,0 +1,94 @@
+"""顧問先インデックスのスナップショットを作成
+
+顧問先レジストリ（ingest_houjin.pyで作成したTSV）または顧問先リストから、
+ツールがmmapして参照するバイナリスナップショット、またはSQLiteデータベースを作成します。
+スナップショット・SQLiteを使わずメモリ上に構築する場合は、読みキーのファイルを作成しておきます
+（ツールは検索時に読みの変換を行わないため、ファイルがなければ読みによる検索を行いません）。
+
+実行例:
+    python build_index.py -o companies.snapshot
+    python build_index.py --registry companies.tsv -o companies.snapshot
+    python build_index.py --registry companies.tsv --format sqlite -o companies.sqlite
+    python build_index.py --registry companies.tsv --workers 8 -o companies.snapshot
+    python build_index.py --registry companies.tsv --bloom-error-rate 0.001 -o companies.snapshot
+    python build_index.py --format readings -o companies_readings.json
+    python build_index.py --registry companies.tsv --format readings -o companies.readings.json
+
+正規化・読みの変換と索引の構築は、--workersのプロセス数（省略時はCPUコア数）で並列に行い、
+段階ごとの所要時間を表示します。
+スナップショット・SQLiteには、登録されていない名前の完全一致の確認を省く顧問先名のBloomフィルタを含めます
+（--bloom-error-rate 0 で含めない）。
+
+作成したファイルは環境変数 CLIENT_INDEX_SNAPSHOT（SQLiteの場合は CLIENT_INDEX_SQLITE）で指定します。
+読みキーのファイルは、顧問先リストの場合はプロジェクトルートの companies_readings.json、
+レジストリの場合は拡張子を .readings.json に替えたパスに置きます。
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from src.test_agent.client_index import RecordStore, build_index_file, iter_registry
+from src.test_agent.client_index.bloom import DEFAULT_ERROR_RATE
+from src.test_agent.client_index.build import BUILD_FORMATS
+
+STAGE_LABELS = {
+    "load": "読み込み",
+    "analyze": "正規化・読み",
+    "sections": "索引の構築",
+    "write": "書き込み",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="顧問先インデックスのスナップショットを作成")
+    parser.add_argument("--registry", type=Path, help="顧問先レジストリ（TSV）。省略時は顧問先リストを使う")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="出力するスナップショット")
+    parser.add_argument(
+        "--format",
+        choices=BUILD_FORMATS,
+        default="snapshot",
+        help=(
+            "出力形式（snapshot: mmapするバイナリ / sqlite: FTS5を使うSQLiteデータベース / "
+            "readings: メモリ上に構築する場合の読みキー）"
+        ),
+    )
+    parser.add_argument("--no-readings", action="store_true", help="読み（ひらがな・ローマ字）を含めない")
+    parser.add_argument("--workers", type=int, help="並列に構築するプロセス数（省略時はCPUコア数。1で並列化しない）")
+    parser.add_argument(
+        "--bloom-error-rate",
+        type=float,
+        default=DEFAULT_ERROR_RATE,
+        help=f"顧問先名のBloomフィルタの誤検出率（既定は{DEFAULT_ERROR_RATE}。0でBloomフィルタを含めない）",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.registry is not None:
+        # 法人番号・法人種別・所在地の列もスナップショットに含める
+        records = RecordStore.from_records(iter_registry(args.registry))
+    else:
+        from companies_12000_list import companies
+
+        records = RecordStore(companies)
+    timings = {"load": time.perf_counter() - start}
+
+    timings.update(
+        build_index_file(
+            args.output,
+            records,
+            format=args.format,
+            with_readings=not args.no_readings,
+            workers=args.workers,
+            bloom_error_rate=args.bloom_error_rate,
+        )
+    )
+
+    label = {"snapshot": "スナップショット", "sqlite": "SQLiteデータベース", "readings": "読みキー"}[args.format]
+    print(f"{len(records)}件の{label}を作成しました: {args.output}（{sum(timings.values()):.1f}秒）")
+    for stage, elapsed in timings.items():
+        print(f"  {STAGE_LABELS[stage]}: {elapsed:.1f}秒")
+
+
+if __name__ == "__main__":
+    main()
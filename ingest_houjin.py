@@ -0,0 +1,78 @@
+"""法人番号CSVから顧問先レジストリ（TSV）を作成
+
+国税庁 法人番号公表サイトからダウンロードしたzip/CSV（Shift_JIS版・Unicode版）を1行ずつ読み、
+閉鎖済みの法人・検索対象除外の法人などを除外して、ツールが読み込むレジストリファイルに書き出します。
+続けて、メモリ上に構築して検索する場合に使う読みキーのファイル（拡張子 .readings.json）も作成します。
+読みキーは書き出しと同じ1回の読み込みで集めた顧問先名から作り、法人番号・所在地などの列はメモリに載せません。
+
+実行例:
+    # 全件を取り込む
+    python ingest_houjin.py 00_zenkoku_all_20250930.zip -o companies.tsv
+
+    # 12,000社を無作為抽出する
+    python ingest_houjin.py 00_zenkoku_all_20250930.zip -o companies.tsv --sample 12000 --seed 0
+
+作成したファイルは環境変数 CLIENT_REGISTRY_PATH で指定します。
+"""
+
+import argparse
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from src.test_agent.client_index import RecordStore, build_index_file
+from src.test_agent.client_index.houjin import DEFAULT_KINDS, iter_client_records, reservoir_sample
+from src.test_agent.client_index.readings import readings_path
+from src.test_agent.client_index.registry import ClientRecord, write_registry
+
+
+def collect_names(records: Iterable[ClientRecord], names: list[str]) -> Iterator[ClientRecord]:
+    """レコードをそのまま流しながら、顧問先名をnamesに集める"""
+    for record in records:
+        names.append(record.name)
+        yield record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="法人番号CSVから顧問先レジストリを作成")
+    parser.add_argument("inputs", nargs="+", type=Path, help="法人番号CSV（zipまたはcsv）")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="出力するレジストリ（TSV）")
+    parser.add_argument("--sample", type=int, help="無作為抽出する件数（省略時は全件）")
+    parser.add_argument("--seed", type=int, help="無作為抽出の乱数シード")
+    parser.add_argument(
+        "--kinds",
+        default=",".join(sorted(DEFAULT_KINDS)),
+        help="取り込む法人種別コード（カンマ区切り）",
+    )
+    parser.add_argument(
+        "--include-closed", action="store_true", help="閉鎖済み・過去の履歴・検索対象除外の法人も取り込む"
+    )
+    parser.add_argument("--encoding", help="入力の文字コード（省略時は自動判定）")
+    parser.add_argument("--no-readings", action="store_true", help="読みキーのファイルを作成しない")
+    parser.add_argument("--workers", type=int, help="読みを並列に変換するプロセス数（省略時はCPUコア数）")
+    args = parser.parse_args()
+
+    records = iter_client_records(
+        args.inputs,
+        kinds=frozenset(args.kinds.split(",")),
+        active_only=not args.include_closed,
+        encoding=args.encoding,
+    )
+    if args.sample is not None:
+        records = reservoir_sample(records, args.sample, seed=args.seed)
+
+    # 読みキーは顧問先名だけから作るため、レジストリを読み直さずに書き出しながら名前だけを集める
+    names: list[str] = []
+    if not args.no_readings:
+        records = collect_names(records, names)
+    count = write_registry(args.output, records)
+    print(f"{count}件を書き出しました: {args.output}")
+
+    if not args.no_readings:
+        path = readings_path(args.output)
+        store = RecordStore(names)
+        elapsed = sum(build_index_file(path, store, format="readings", workers=args.workers).values())
+        print(f"読みキーを作成しました: {path}（{elapsed:.1f}秒）")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 """メインエントリーポイント"""
 
-from src.test_agent import root_agent, step1_get_client_info, step2_process_client_data
+from src.test_agent import root_agent, step1_get_client_info, step1_get_clients_info, step2_process_client_data
 
 
 def test_tools():
@@ -41,6 +41,19 @@ def test_tools():
     print(f"処理結果: {result5['message']}")
     print(f"成功: {result5['success']}")
 
+    # テスト6: 【ステップ1】顧問先情報取得（法人格の省略）
+    print("\n【テスト6】【ステップ1】顧問先情報取得 - 「青空」で検索（法人格なし）")
+    result6 = step1_get_client_info("青空")
+    print(f"検索結果: {result6['count']}件（一致種別: {result6['match_type']}）")
+    print(f"候補: {result6['matches']}")
+
+    # テスト7: 【ステップ1】顧問先情報一括取得
+    print("\n【テスト7】【ステップ1】顧問先情報一括取得 - 3件をまとめて検索")
+    result7 = step1_get_clients_info(["株式会社青空", "青空", "存在しない会社"])
+    for item in result7["results"]:
+        print(f"「{item['query']}」: {item['count']}件（一致種別: {item['match_type']}） {item['matches']}")
+    print(f"未解決: {result7['unresolved']}")
+
     print("\n" + "=" * 50)
     print("テスト完了")
     print("=" * 50)
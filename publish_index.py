@@ -0,0 +1,51 @@
+"""顧問先インデックスのスナップショットを共有メモリに置く
+
+build_index.pyで作成したスナップショットを共有メモリにコピーし、停止されるまで保持します。
+各ワーカープロセスは環境変数 CLIENT_INDEX_SHARED_MEMORY に共有メモリの名前を指定すると、
+読み取り専用で参照します。物理メモリ上のコピーは全プロセスで1つだけで、
+ワーカーを増やしてもプロセスごとの索引は増えません。
+
+実行例:
+    python publish_index.py companies.snapshot --name client-index
+
+スナップショットを作り直した場合は、このコマンドを再実行してからワーカーをリロードしてください。
+停止すると共有メモリを削除します（参照中のワーカーは、閉じるまでそのまま検索できます）。
+"""
+
+import argparse
+import signal
+import time
+from pathlib import Path
+
+from src.test_agent.client_index import publish_snapshot
+
+DEFAULT_NAME = "client-index"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="顧問先インデックスのスナップショットを共有メモリに置く")
+    parser.add_argument("snapshot", type=Path, help="スナップショット（build_index.pyで作成）")
+    parser.add_argument("--name", default=DEFAULT_NAME, help="共有メモリの名前")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    shm = publish_snapshot(args.snapshot, args.name)
+    elapsed = time.perf_counter() - start
+    print(
+        f"共有メモリに置きました: {args.name}（{shm.size / 1024 / 1024:.1f}MB、{elapsed:.1f}秒）\n"
+        f"ワーカーは CLIENT_INDEX_SHARED_MEMORY={args.name} で参照できます。Ctrl+Cで削除して終了します。"
+    )
+
+    # SIGTERMでもKeyboardInterruptと同じく共有メモリを削除してから終了する
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        signal.pause()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+if __name__ == "__main__":
+    main()
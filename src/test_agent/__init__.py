@@ -1,10 +1,42 @@
-"""顧問先情報解析・処理パッケージ"""
+"""顧問先情報解析・処理パッケージ
 
-from .agent import root_agent
-from .tools import step1_get_client_info, step2_process_client_data
+root_agentやツールは最初に参照したときにモジュールを読み込みます（PEP 562）。
+ツールだけを使う場合（分析スクリプト・検索のCLI・ベンチマークなど）は、
+エージェントの定義が依存するgoogle.adkを読み込みません。
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .agent import root_agent
+    from .tools import step1_get_client_info, step1_get_clients_info, step2_process_client_data
+
+# 属性名 -> 定義しているモジュール
+_LAZY_ATTRIBUTES = {
+    "root_agent": ".agent",
+    "step1_get_client_info": ".tools",
+    "step1_get_clients_info": ".tools",
+    "step2_process_client_data": ".tools",
+}
 
 __all__ = [
     "root_agent",
     "step1_get_client_info",
+    "step1_get_clients_info",
     "step2_process_client_data",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    # 2回目以降はモジュールの属性として直接参照させる
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY_ATTRIBUTES])
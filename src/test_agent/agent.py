@@ -1,7 +1,7 @@
 """Agent definition for test_agent"""
 
 from google.adk.agents import Agent
-from .tools import step1_get_client_info, step2_process_client_data
+from .tools import step1_get_client_info, step1_get_clients_info, step2_process_client_data
 
 root_agent = Agent(
     name="test_agent",
@@ -19,7 +19,16 @@ root_agent = Agent(
    - **1件一致の場合のみ**: その顧問先名を記録し、必ずユーザーに確認を求めてください
      確認メッセージ: 「顧問先『〇〇』が見つかりました。この顧問先への自動入力処理を実行してよろしいですか？」
    - 複数一致: ユーザーに正確な顧問先名を確認してから、再度step1を実行
+     結果に`records`がある場合は、法人番号・都道府県・法人種別を添えて候補を提示してください
    - 0件: ユーザーに顧問先名の確認を依頼
+   - `match_type` が exact 以外の場合（表記ゆれ・法人格の省略など）は、ユーザーの入力と登録名が異なります。
+     必ず`matches`の登録名をそのまま提示して確認を求めてください
+   - ユーザーが13桁の法人番号を提示した場合は、その番号をそのまま step1_get_client_info に渡してください。
+     チェックデジットが正しくない場合（`error`が invalid_corporate_number）は、番号の確認を依頼してください
+   - `error`が tenant_not_found の場合は、ご利用の事務所の顧問先リストが登録されていないことを伝え、
+     管理者への確認を依頼してください（他の事務所の顧問先を推測して提示してはいけません）
+   - 複数の顧問先名がまとめて提供された場合は、step1_get_client_info を1件ずつ呼ばずに
+     step1_get_clients_info を1回だけ実行し、`results`の顧問先ごとに上記と同じ対応をしてください
 
 4. **重要**: step1を実行した後は、必ずユーザーからの応答を待ってください（第1ターン終了）
 
@@ -36,7 +45,7 @@ root_agent = Agent(
 - **第2ターン**: ユーザーの承認 → step2実行 → 結果報告
 
 ## 絶対禁止事項（違反厳禁）
-❌ step1を実行せずに、step2を実行すること
+❌ step1（step1_get_client_info または step1_get_clients_info）を実行せずに、step2を実行すること
 ❌ step1の実行後、ユーザーの確認を取らずにstep2を実行すること
 ❌ step1の検索結果を無視して、ユーザーの入力をそのままstep2に渡すこと
 ❌ ユーザーからの応答を待たずに、step1とstep2を連続で実行すること
@@ -54,6 +63,7 @@ root_agent = Agent(
     """,
     tools=[
         step1_get_client_info,
+        step1_get_clients_info,
         step2_process_client_data,
     ],
 )
@@ -0,0 +1,47 @@
+"""顧問先レジストリの検索インデックス"""
+
+from .bloom import BloomFilter
+from .build import build_index_file
+from .corporate import CorporateNumberIndex, is_valid_corporate_number, parse_corporate_number
+from .delta import RegistryDelta, SegmentedIndex
+from .index import ClientIndex, LookupResult
+from .perfect import PerfectHashTable
+from .readings import ReadingTable, build_readings, load_readings, readings_path, save_readings
+from .records import RecordStore
+from .registry import ClientRecord, iter_registry, write_registry
+from .reload import IndexReloader, IndexStatus
+from .shard import ShardedIndex
+from .snapshot import IndexSnapshot, publish_snapshot, write_snapshot
+from .sqlite import write_sqlite
+from .tenants import TenantCacheStats, TenantIndexCache
+
+__all__ = [
+    "BloomFilter",
+    "ClientIndex",
+    "ClientRecord",
+    "CorporateNumberIndex",
+    "IndexReloader",
+    "IndexSnapshot",
+    "IndexStatus",
+    "LookupResult",
+    "PerfectHashTable",
+    "ReadingTable",
+    "RecordStore",
+    "RegistryDelta",
+    "SegmentedIndex",
+    "ShardedIndex",
+    "TenantCacheStats",
+    "TenantIndexCache",
+    "build_index_file",
+    "build_readings",
+    "is_valid_corporate_number",
+    "iter_registry",
+    "load_readings",
+    "parse_corporate_number",
+    "publish_snapshot",
+    "readings_path",
+    "save_readings",
+    "write_registry",
+    "write_snapshot",
+    "write_sqlite",
+]
@@ -0,0 +1,134 @@
+"""存在しない顧問先名を、ファイル上の索引を引く前に判定するBloomフィルタ
+
+スナップショット・SQLiteデータベースでは、登録されていない名前の完全一致の確認（step2の検証、
+lookupの最初の段階）でもファイル上の索引を読みます。Bloomフィルタで含まれないと分かった名前は
+索引を引かずに確定させます。メモリ上のインデックスは辞書を引く方が速いため使いません。
+"""
+
+import math
+from array import array
+from collections.abc import Iterable, Sequence
+
+from .hashing import key_hash64
+
+# 誤検出率の既定値
+DEFAULT_ERROR_RATE = 0.01
+
+# 1つのキーがブロック内で立てるビット数
+NUM_HASHES = 6
+
+_BLOCK_BITS = 64
+
+# ハッシュ値の下位12ビットごとに、ブロック内の2ビットを立てたマスク（3回引いて6ビットにする）
+_MASKS = [(1 << (i & 63)) | (1 << (i >> 6)) for i in range(1 << 12)]
+
+
+def expected_error_rate(bits_per_key: float) -> float:
+    """
+    1キーあたりのビット数から、理論上の誤検出率を求める
+
+    ブロックに入るキーの数のばらつき（ポアソン分布）を考慮します。同じビット数の通常のBloomフィルタより
+    誤検出率は高くなります。
+    """
+    keys_per_block = _BLOCK_BITS / bits_per_key
+    rate = 0.0
+    probability = math.exp(-keys_per_block)
+    for count in range(int(keys_per_block * 4) + 20):
+        if count:
+            probability *= keys_per_block / count
+        rate += probability * (1 - (1 - 1 / _BLOCK_BITS) ** (NUM_HASHES * count)) ** NUM_HASHES
+    return rate
+
+
+def bits_per_key_for(error_rate: float) -> float:
+    """誤検出率を満たす最小の1キーあたりのビット数（0.5ビット刻み）"""
+    if not 0 < error_rate < 1:
+        raise ValueError(f"誤検出率は0より大きく1より小さい値にしてください: {error_rate}")
+    bits_per_key = 1.0
+    while expected_error_rate(bits_per_key) > error_rate and bits_per_key < _BLOCK_BITS:
+        bits_per_key += 0.5
+    return bits_per_key
+
+
+class BloomFilter:
+    """
+    キー集合のブロック化Bloomフィルタ
+
+    含まれないと判定したキーは確実に集合にありません（偽陰性なし）。含まれると判定しても
+    誤検出率の確率で集合にないことがあるため、その場合は本来の索引で確認します。
+
+    キーごとに64ビットのブロックを1つ選び、その中にNUM_HASHESビットを立てます。1回の判定で読むのは
+    8バイトだけなので、mmapしたファイル上でも1ページしか触れません。
+
+    Args:
+        blocks: ブロックの配列（to_bytesで書き出したものをcast("Q")で参照してもよい）
+    """
+
+    def __init__(self, blocks: Sequence[int]):
+        self._blocks = blocks
+
+    @classmethod
+    def build(
+        cls,
+        keys: Iterable[str],
+        capacity: int,
+        error_rate: float = DEFAULT_ERROR_RATE,
+        bits_per_key: float | None = None,
+    ) -> "BloomFilter":
+        """
+        キーを全て登録したBloomフィルタを作る
+
+        Args:
+            keys: 登録するキー
+            capacity: 登録するキー数
+            error_rate: 目標とする誤検出率（bits_per_keyを指定した場合は無視）
+            bits_per_key: 1キーあたりのビット数（メモリ量を直接指定する場合）
+        """
+        if bits_per_key is None:
+            bits_per_key = bits_per_key_for(error_rate)
+        blocks = array("Q", bytes(8 * max(1, math.ceil(capacity * bits_per_key / _BLOCK_BITS))))
+        for key in keys:
+            position, mask = _probe(key, len(blocks))
+            blocks[position] |= mask
+        return cls(blocks)
+
+    def to_bytes(self) -> bytes:
+        """ブロックの配列を書き出す"""
+        return array("Q", self._blocks).tobytes()
+
+    @property
+    def nbytes(self) -> int:
+        """ブロックの配列のバイト数"""
+        return len(self._blocks) * 8
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, str):
+            return False
+        position, mask = _probe(key, len(self._blocks))
+        return self._blocks[position] & mask == mask
+
+
+def _probe(key: str, num_blocks: int) -> tuple[int, int]:
+    """キーのブロックの位置と、ブロック内で立てるビットのマスク"""
+    h = key_hash64(key)
+    mask = _MASKS[h & 0xFFF] | _MASKS[(h >> 12) & 0xFFF] | _MASKS[(h >> 24) & 0xFFF]
+    return (h >> 36) % num_blocks, mask
+
+
+class BloomFilteredMap:
+    """
+    索引の前にBloomフィルタを置き、含まれないと判定したキーは索引を引かずに空を返す
+
+    Args:
+        bloom: 索引の全キーを登録したBloomフィルタ
+        keymap: キー -> レコード番号の索引（getを持つもの）
+    """
+
+    def __init__(self, bloom: BloomFilter, keymap):
+        self.bloom = bloom
+        self._keymap = keymap
+
+    def get(self, key: str) -> list[int]:
+        if key not in self.bloom:
+            return []
+        return self._keymap.get(key)
@@ -0,0 +1,144 @@
+"""顧問先インデックスの並列構築
+
+数百万件の顧問先名の正規化・読みの変換・トライグラムのポスティングリストなどの構築は
+CPUの処理だけで時間がかかり、1プロセスでは1コアしか使えません。
+レコードを一定件数ごとに分けてプロセスプールで正規化と読みの変換を行い、レコード番号順に
+つなぎ合わせたあと、互いに依存しない索引のセクションを同じプールで並列に作ります。
+作成されるスナップショットの索引は、1プロセスで作成した場合と同じです。
+
+メモリ上に構築して検索するレジストリ・顧問先リストのために、読みキーのファイルだけを
+作成することもできます（検索側は読みの変換を行わず、このファイルを読み込むだけです）。
+"""
+
+import os
+import time
+from concurrent.futures import Executor
+from pathlib import Path
+
+from .bloom import DEFAULT_ERROR_RATE
+from .normalize import normalize_name
+from .readings import ReadingTable, build_readings, names_digest, save_readings
+from .records import RecordStore
+from .snapshot import snapshot_sections, write_snapshot_sections
+from .sqlite import write_sqlite
+
+# 1つのワーカーに渡すレコード数
+BUILD_CHUNK_SIZE = 20_000
+
+# 出力形式
+BUILD_FORMATS = ("snapshot", "sqlite", "readings")
+
+# 構築の段階（build_index_fileが所要時間を返す順）
+BUILD_STAGES = ("analyze", "sections", "write")
+
+
+def _analyze_chunk(names: list[str], with_readings: bool) -> tuple[list[str], ReadingTable | None]:
+    keys = [normalize_name(name) for name in names]
+    return keys, build_readings(names) if with_readings else None
+
+
+def analyze_names(
+    names: list[str],
+    with_readings: bool = True,
+    executor: Executor | None = None,
+    chunk_size: int = BUILD_CHUNK_SIZE,
+) -> tuple[list[str], ReadingTable | None]:
+    """
+    顧問先名を正規化し、読みを計算する
+
+    Args:
+        names: 顧問先名のリスト
+        with_readings: 読み（ひらがな・ローマ字）を計算するか
+        executor: chunk_size件ごとに並列に処理するプロセスプール（省略時はこのプロセスで処理する）
+        chunk_size: 1つのワーカーに渡すレコード数
+
+    Returns:
+        tuple: (レコード番号順の正規化キー, 読みキーの表。with_readingsがFalseの場合はNone)
+    """
+    if executor is None or len(names) <= chunk_size:
+        return _analyze_chunk(names, with_readings)
+
+    futures = [
+        executor.submit(_analyze_chunk, names[start : start + chunk_size], with_readings)
+        for start in range(0, len(names), chunk_size)
+    ]
+    keys: list[str] = []
+    readings: list[tuple[str, str]] = []
+    legal_forms: dict[str, str] = {}
+    for future in futures:
+        chunk_keys, chunk_readings = future.result()
+        keys.extend(chunk_keys)
+        if chunk_readings is not None:
+            readings.extend(chunk_readings.readings)
+            legal_forms = chunk_readings.legal_forms
+    if not with_readings:
+        return keys, None
+    return keys, ReadingTable(digest=names_digest(names), readings=readings, legal_forms=legal_forms)
+
+
+def build_index_file(
+    path: Path,
+    records: RecordStore,
+    format: str = "snapshot",
+    with_readings: bool = True,
+    workers: int | None = None,
+    bloom_error_rate: float = DEFAULT_ERROR_RATE,
+) -> dict[str, float]:
+    """
+    顧問先のレコードからスナップショット（またはSQLiteデータベース・読みキーのファイル）を
+    プロセスプールで並列に作成する
+
+    SQLiteデータベースは書き込みを1つの接続で行うため、正規化と読みの変換だけを並列にします。
+    読みキーのファイル（readings）は、メモリ上に構築するレジストリ・顧問先リストの読みの検索に使います。
+
+    Args:
+        path: 出力先のファイル
+        records: 顧問先のレコード
+        format: 出力形式（BUILD_FORMATSのいずれか）
+        with_readings: 読み（ひらがな・ローマ字）を含めるか（readingsの場合は常に含める）
+        workers: ワーカープロセス数（省略時はCPUコア数。1の場合はプロセスプールを使わない）
+        bloom_error_rate: 顧問先名のBloomフィルタの誤検出率（0の場合はBloomフィルタを作らない。readingsでは使わない）
+
+    Returns:
+        dict: 段階（BUILD_STAGES。SQLite・読みキーの場合はsectionsを除く）ごとの所要時間（秒）
+    """
+    if format not in BUILD_FORMATS:
+        raise ValueError(f"出力形式は {' / '.join(BUILD_FORMATS)} のいずれかにしてください: {format}")
+    with_readings = with_readings or format == "readings"
+    workers = workers or os.cpu_count() or 1
+    # プロセスプールは構築時だけ使うため、パッケージの読み込み時には読み込まない
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # 構築中のワーカーはインデックスを持たないため、forkではなくspawnで起動して親のメモリを複製しない
+    executor = (
+        ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        if workers > 1
+        else None
+    )
+    timings: dict[str, float] = {}
+    try:
+        start = time.perf_counter()
+        names = list(records.names)
+        keys, readings = analyze_names(names, with_readings, executor)
+        del names
+        timings["analyze"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if format == "readings":
+            assert readings is not None
+            save_readings(path, readings)
+        elif format == "sqlite":
+            write_sqlite(path, records, readings=readings, bloom_error_rate=bloom_error_rate)
+        else:
+            sections, metadata = snapshot_sections(
+                records, readings, keys=keys, executor=executor, bloom_error_rate=bloom_error_rate
+            )
+            timings["sections"] = time.perf_counter() - start
+            start = time.perf_counter()
+            write_snapshot_sections(path, sections, metadata)
+        timings["write"] = time.perf_counter() - start
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return timings
@@ -0,0 +1,125 @@
+"""法人番号の検証と、法人番号からレコードを引く索引"""
+
+import re
+import unicodedata
+from array import array
+from collections.abc import Sequence
+
+_EMPTY_SLOT = 0xFFFFFFFF
+_SEPARATORS = re.compile(r"[\s\-‐－ー―]")
+_GOLDEN = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+
+def parse_corporate_number(text: str) -> str | None:
+    """
+    入力が法人番号の形（13桁の数字）であれば、区切りを除いた数字列を返す
+
+    全角数字・ハイフンや空白による区切りを許容します。チェックデジットは検証しません。
+
+    Args:
+        text: ユーザーの入力
+
+    Returns:
+        str | None: 13桁の数字列。法人番号の形でない場合はNone
+    """
+    digits = _SEPARATORS.sub("", unicodedata.normalize("NFKC", text))
+    if len(digits) == 13 and digits.isascii() and digits.isdigit():
+        return digits
+    return None
+
+
+def check_digit(base: str) -> int:
+    """
+    法人番号の基礎番号（下12桁）からチェックデジット（先頭1桁）を求める
+
+    基礎番号の下の桁から奇数桁に1、偶数桁に2を掛けた和を9で割った余りを9から引いた値です。
+    """
+    total = sum(int(digit) * (1 if position % 2 else 2) for position, digit in enumerate(reversed(base), start=1))
+    return 9 - total % 9
+
+
+def is_valid_corporate_number(number: str) -> bool:
+    """13桁の数字列のチェックデジットが正しい"""
+    return (
+        len(number) == 13 and number.isascii() and number.isdigit() and int(number[0]) == check_digit(number[1:])
+    )
+
+
+def _slot_of(number: int, mask: int) -> int:
+    # 法人番号は連番に近い値が多いため、乗算で上位ビットに散らしてから使う
+    return ((number * _GOLDEN) & _MASK64) >> 32 & mask
+
+
+def build_number_slots(numbers: Sequence[int]) -> array:
+    """
+    法人番号 -> レコード番号のオープンアドレス法のハッシュ表を作る
+
+    スロットにはレコード番号だけを格納し、法人番号はレコードの列と比較します。
+    負荷率が1/2以下になる2のべき乗サイズにします。
+
+    Args:
+        numbers: レコード番号順の法人番号（不明な場合は0。登録しない）
+
+    Returns:
+        array: スロットの配列（空きスロットは0xFFFFFFFF）
+    """
+    count = sum(1 for number in numbers if number)
+    size = 1
+    while size < max(count, 1) * 2:
+        size <<= 1
+    mask = size - 1
+    slots = array("I", [_EMPTY_SLOT]) * size
+    for record_id, number in enumerate(numbers):
+        if not number:
+            continue
+        slot = _slot_of(number, mask)
+        while slots[slot] != _EMPTY_SLOT:
+            slot = (slot + 1) & mask
+        slots[slot] = record_id
+    return slots
+
+
+class CorporateNumberIndex:
+    """
+    法人番号 -> レコード番号の索引
+
+    13桁の法人番号を整数のまま引くため、文字列のハッシュ計算や正規化を行わず、
+    平均して1〜2スロットを見るだけで済みます。
+
+    Args:
+        slots: build_number_slotsで作ったスロットの配列
+        numbers: レコード番号順の法人番号
+    """
+
+    def __init__(self, slots: Sequence[int], numbers: Sequence[int]):
+        self._slots = slots
+        self._mask = len(slots) - 1
+        self._numbers = numbers
+
+    @classmethod
+    def from_numbers(cls, numbers: Sequence[int]) -> "CorporateNumberIndex":
+        """法人番号の列から索引を作る"""
+        return cls(build_number_slots(numbers), numbers)
+
+    def get(self, number: int) -> list[int]:
+        """
+        法人番号に対応するレコード番号を全て返す
+
+        Args:
+            number: 法人番号
+
+        Returns:
+            list[int]: レコード番号（通常は1件。履歴を含むレジストリでは複数になり得る）
+        """
+        if not number:
+            return []
+        slots = self._slots
+        slot = _slot_of(number, self._mask)
+        record_ids = []
+        while (record_id := slots[slot]) != _EMPTY_SLOT:
+            if self._numbers[record_id] == number:
+                record_ids.append(record_id)
+            slot = (slot + 1) & self._mask
+        record_ids.sort()
+        return record_ids
@@ -0,0 +1,310 @@
+"""法人番号の差分データによるインデックスの差分更新
+
+法人番号公表サイトは新規・変更・閉鎖された法人の差分を毎日公開します。全件から
+インデックスを作り直すと500万件規模では数分かかるため、差分は別のセグメントとして持ちます。
+
+- ベース: 全件から作ったインデックス（スナップショットのmmapでもよい）。変更しない
+- 差分セグメント: 差分で追加・変更されたレコードだけから作る小さなインデックス
+- 墓標: 差分で変更・削除された、ベース側のレコード番号
+
+検索時は各段階でベース（墓標を除く）と差分セグメントの結果を合わせます。差分の反映は
+差分セグメントを作り直すだけなので、件数が数千件なら数秒で終わります。差分がたまったら
+全件データからベースを作り直してください。
+
+差分ファイルはレジストリと同じ形式のTSVで、法人番号ごとに最新の状態を1行持ちます。
+名称が空の行は、その法人番号のレコードの削除を表します。
+"""
+
+import heapq
+from collections.abc import Collection, Iterable, Iterator, Sequence
+from pathlib import Path
+
+from .houjin import DEFAULT_KINDS, HoujinRow
+from .index import ClientIndex, LookupResult
+from .normalize import normalize_name
+from .readings import ReadingTable, load_readings, readings_path
+from .records import RecordStore
+from .registry import ClientRecord, iter_registry, write_registry
+from .shard import ShardedIndex
+
+# 削除を表す処理区分（81: 削除, 99: 削除）
+DELETED_PROCESSES = frozenset({"81", "99"})
+
+
+class RegistryDelta:
+    """
+    法人番号ごとの追加・変更・削除の累積
+
+    同じ法人番号に複数回の変更があった場合は、最後の状態だけを残します。
+
+    Args:
+        upserts: 法人番号 -> 追加・変更後のレコード
+        removed: 削除された法人番号
+    """
+
+    def __init__(self, upserts: dict[str, ClientRecord] | None = None, removed: set[str] | None = None):
+        self.upserts = upserts if upserts is not None else {}
+        self.removed = removed if removed is not None else set()
+
+    def __len__(self) -> int:
+        return len(self.upserts) + len(self.removed)
+
+    @property
+    def corporate_numbers(self) -> set[str]:
+        """差分に含まれる全ての法人番号（ベース側で置き換え・削除するもの）"""
+        return self.upserts.keys() | self.removed
+
+    def upsert(self, record: ClientRecord) -> None:
+        self.removed.discard(record.corporate_number)
+        self.upserts[record.corporate_number] = record
+
+    def remove(self, corporate_number: str) -> None:
+        self.upserts.pop(corporate_number, None)
+        self.removed.add(corporate_number)
+
+    def apply_rows(self, rows: Iterable[HoujinRow], kinds: Collection[str] = DEFAULT_KINDS) -> int:
+        """
+        法人番号CSVの差分データを反映する
+
+        閉鎖・削除された法人、検索対象除外になった法人や、顧問先の対象外の法人種別に変わった法人は
+        削除として扱います。
+
+        Args:
+            rows: 差分データの行（一連番号の順）
+            kinds: 顧問先として取り込む法人種別コード
+
+        Returns:
+            int: 反映した行数
+        """
+        count = 0
+        for row in rows:
+            # 差分データに過去の履歴が含まれる場合は、最新の行だけを使う
+            if row.latest != "1":
+                continue
+            if row.close_date or row.hidden == "1" or row.process in DELETED_PROCESSES or row.kind not in kinds:
+                self.remove(row.corporate_number)
+            else:
+                self.upsert(row.to_record())
+            count += 1
+        return count
+
+    @classmethod
+    def load(cls, path: Path) -> "RegistryDelta":
+        """差分ファイルを読み込む（ファイルがなければ空の差分）"""
+        delta = cls()
+        if path.exists():
+            for record in iter_registry(path):
+                if record.name:
+                    delta.upsert(record)
+                else:
+                    delta.remove(record.corporate_number)
+        return delta
+
+    def save(self, path: Path) -> int:
+        """
+        差分ファイルに書き出す
+
+        Returns:
+            int: 書き出した件数
+        """
+        removals = (ClientRecord("", corporate_number) for corporate_number in sorted(self.removed))
+        tmp_path = path.with_name(path.name + ".tmp")
+        count = write_registry(tmp_path, [*self.upserts.values(), *removals])
+        # 書き込み途中のファイルを読み込まないよう、完成してから置き換える
+        tmp_path.replace(path)
+        return count
+
+
+class SegmentedRecords(Sequence[ClientRecord]):
+    """ベースと差分セグメントのレコードを通し番号で参照するビュー"""
+
+    def __init__(self, base: RecordStore, delta: RecordStore):
+        self._base = base
+        self._delta = delta
+        self._offset = len(base)
+
+    @property
+    def has_details(self) -> bool:
+        """
+        法人番号・法人種別・所在地を持つ
+
+        空でない差分はベースが法人番号を持つ場合だけ重ねられ、差分のレコードは常に詳細を持つため、
+        ベースが持つかどうかで決まります。
+        """
+        return self._base.has_details
+
+    def __len__(self) -> int:
+        return self._offset + len(self._delta)
+
+    def _locate(self, record_id: int) -> tuple[RecordStore, int]:
+        if record_id < self._offset:
+            return self._base, record_id
+        return self._delta, record_id - self._offset
+
+    def __getitem__(self, record_id):  # type: ignore[override]
+        if isinstance(record_id, slice):
+            return [self[i] for i in range(*record_id.indices(len(self)))]
+        store, local_id = self._locate(record_id)
+        return store[local_id]
+
+    def describe(self, record_id: int) -> dict[str, str]:
+        store, local_id = self._locate(record_id)
+        return store.describe(local_id)
+
+
+class SegmentedIndex:
+    """
+    ベースのインデックスに差分セグメントを重ねたインデックス
+
+    ClientIndexと同じ検索メソッドを持ち、ツールからはそのまま置き換えて使えます。
+    レコード番号はベースが 0..len(base)-1、差分セグメントがその続きの通し番号です。
+
+    Args:
+        base: 全件から作ったインデックス（シャードに分けたものでもよい）
+        delta: 反映する差分
+        readings: 差分で追加・変更されたレコードの読みキー（apply_diff.pyで作成。
+            省略時は差分セグメントでは読みによる検索を行わない）
+
+    Raises:
+        ValueError: 差分が空でなく、ベースが法人番号を持たない場合（顧問先名だけのリストから作ったベースでは、
+            変更・削除されたレコードを法人番号で特定できず、閉鎖した法人や変更前の名称が残るため）
+    """
+
+    def __init__(self, base: ClientIndex | ShardedIndex, delta: RegistryDelta, readings: ReadingTable | None = None):
+        if delta and not base.records.has_details:
+            raise ValueError(
+                "ベースのインデックスが法人番号を持たないため、差分の変更・削除を反映できません。"
+                "法人番号を含むレジストリ（ingest_houjin.pyで作成）からベースを作成してください"
+            )
+        self.base = base
+        self.delta = delta
+
+        upserts = RecordStore.from_records(delta.upserts.values())
+        self._segment = ClientIndex(upserts, readings=readings if base.has_readings else None)
+        self._offset = len(base)
+        self.records = SegmentedRecords(base.records, upserts)
+
+        # 差分で置き換え・削除されたベース側のレコード
+        self._tombstones: set[int] = set()
+        for corporate_number in delta.corporate_numbers:
+            if corporate_number.isdigit():
+                self._tombstones.update(base.find_corporate_number(corporate_number).record_ids)
+
+    @classmethod
+    def from_file(cls, base: ClientIndex | ShardedIndex, path: Path) -> "SegmentedIndex":
+        """差分ファイル（ベースが読みを持つ場合は差分の読みキーのファイルも）を読み込んでベースに重ねる"""
+        delta = RegistryDelta.load(path)
+        readings = None
+        if base.has_readings:
+            readings = load_readings(readings_path(path), [record.name for record in delta.upserts.values()])
+        return cls(base, delta, readings)
+
+    def warm_up(self) -> None:
+        """ベースと差分セグメントの遅延構築する索引を全て構築しておく"""
+        self.base.warm_up()
+        self._segment.warm_up()
+
+    def close(self) -> None:
+        """ベースがシャードに分けたインデックスなら、そのワーカープロセスを終了する"""
+        if isinstance(self.base, ShardedIndex):
+            self.base.close()
+
+    def __len__(self) -> int:
+        return len(self.base) - len(self._tombstones) + len(self._segment)
+
+    def _global(self, record_ids: list[int]) -> list[int]:
+        return [self._offset + record_id for record_id in record_ids]
+
+    def _live(self, record_ids: list[int]) -> list[int]:
+        return [record_id for record_id in record_ids if record_id not in self._tombstones]
+
+    def _merge(self, base: LookupResult, segment: LookupResult) -> LookupResult:
+        return LookupResult(
+            base.match_type,
+            base.matches + segment.matches,
+            base.total + segment.total,
+            base.record_ids + self._global(segment.record_ids),
+        )
+
+    def __contains__(self, name: object) -> bool:
+        if not isinstance(name, str):
+            return False
+        return name in self._segment or bool(self._live(self.base.exact_record_ids(name)))
+
+    @property
+    def has_readings(self) -> bool:
+        return self.base.has_readings
+
+    def exact_record_ids(self, name: str) -> list[int]:
+        return self._live(self.base.exact_record_ids(name)) + self._global(self._segment.exact_record_ids(name))
+
+    def find_corporate_number(self, corporate_number: str) -> LookupResult:
+        base = self.base.find_corporate_number(corporate_number)
+        record_ids = self._live(base.record_ids)
+        base = LookupResult(base.match_type, [self.base.names[i] for i in record_ids], len(record_ids), record_ids)
+        merged = self._merge(base, self._segment.find_corporate_number(corporate_number))
+        return merged._replace(match_type="corporate_number") if merged.total else LookupResult(None, [], 0, [])
+
+    def complete(self, prefix: str, limit: int = 10) -> list[str]:
+        key = normalize_name(prefix)
+        completions: dict[str, None] = {}
+        sources = (
+            (self.base.names, self._live_iter(self.base._iter_completions(key))),
+            (self._segment.names, self._segment._iter_completions(key)),
+        )
+        for names, record_ids in sources:
+            for record_id in record_ids:
+                completions[names[record_id]] = None
+                if len(completions) >= limit:
+                    return list(completions)
+        return list(completions)
+
+    def _live_iter(self, record_ids: Iterable[int]) -> Iterator[int]:
+        return (record_id for record_id in record_ids if record_id not in self._tombstones)
+
+    def lookup(self, name: str, limit: int = 20) -> LookupResult:
+        """
+        ClientIndex.lookupと同じ順序で、各段階のベースと差分セグメントの結果を合わせて検索する
+
+        Args:
+            name: 検索する顧問先名
+            limit: 部分一致・あいまい検索で返す候補の上限
+
+        Returns:
+            LookupResult: 最初に一致した段階の検索結果
+        """
+        stages = zip(self.base._stages(name, limit, self._tombstones), self._segment._stages(name, limit))
+        for base, segment in stages:
+            if not base.record_ids and not segment.record_ids:
+                continue
+            if base.match_type == "partial":
+                return self._merge_partial(normalize_name(name), base, segment, limit)
+            merged = self._merge(base, segment)
+            if base.match_type == "fuzzy":
+                merged = merged._replace(matches=merged.matches[:limit], record_ids=merged.record_ids[:limit])
+            return merged
+        return LookupResult(None, [], 0, [])
+
+    def _merge_partial(self, key: str, base: LookupResult, segment: LookupResult, limit: int) -> LookupResult:
+        # ClientIndexと同じ基準（先頭一致するもの、短いものの順）で両方の上位から選び直す
+        candidates = [(self.base.keys[i], name, i) for i, name in zip(base.record_ids, base.matches)]
+        candidates += [
+            (self._segment.keys[i], name, self._offset + i) for i, name in zip(segment.record_ids, segment.matches)
+        ]
+        top = heapq.nsmallest(
+            limit,
+            candidates,
+            key=lambda candidate: (not candidate[0].startswith(key), len(candidate[0]), candidate[2]),
+        )
+        return LookupResult(
+            "partial",
+            [name for _, name, _ in top],
+            base.total + segment.total,
+            [record_id for _, _, record_id in top],
+        )
+
+    def lookup_many(self, names: Iterable[str], limit: int = 20) -> list[LookupResult]:
+        """複数の顧問先名をまとめて検索する（重複するクエリは一度だけ検索する）"""
+        names = list(names)
+        resolved = {name: self.lookup(name, limit) for name in dict.fromkeys(names)}
+        return [resolved[name] for name in names]
@@ -0,0 +1,151 @@
+"""誤字を許容するあいまい検索（SymSpellの削除辞書）"""
+
+from collections.abc import Sequence
+
+from .keymap import KeyLookup, KeyMap
+
+# 許容する編集距離の既定値（漢字・かなの1文字の打ち間違い）
+DEFAULT_MAX_DISTANCE = 1
+# 削除辞書を作る先頭文字数。長い名称でも削除パターンの数を一定に抑える
+DEFAULT_PREFIX_LENGTH = 7
+
+
+def _deletes(text: str, max_distance: int) -> set[str]:
+    """文字を最大max_distance個削除した文字列を全て作る"""
+    result = {text}
+    frontier = {text}
+    for _ in range(max_distance):
+        frontier = {word[:i] + word[i + 1 :] for word in frontier if len(word) > 1 for i in range(len(word))}
+        result |= frontier
+    return result
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    隣接文字の入れ替えを1操作と数える編集距離（制限付きDamerau-Levenshtein）
+
+    Args:
+        a: 文字列
+        b: 文字列
+        max_distance: 打ち切る距離
+
+    Returns:
+        int: 編集距離。max_distanceを超える場合はmax_distance + 1
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    # 共通の先頭・末尾は距離に影響しないので、DPの前に取り除く
+    start = 0
+    limit = min(len(a), len(b))
+    while start < limit and a[start] == b[start]:
+        start += 1
+    end = 0
+    limit -= start
+    while end < limit and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a = a[start : len(a) - end]
+    b = b[start : len(b) - end]
+    if not a or not b:
+        return min(max(len(a), len(b)), max_distance + 1)
+
+    previous2: list[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+
+    return min(previous[-1], max_distance + 1)
+
+
+class SymSpellIndex:
+    """
+    削除辞書による誤字許容検索
+
+    登録キーの先頭prefix_length文字から最大max_distance文字を削除したパターンを事前に作っておき、
+    クエリ側も同様に削除パターンを作って辞書を引くことで、編集距離の近い候補だけを取り出します。
+
+    Args:
+        keys: 検索対象のキー（重複なし）
+        max_distance: 許容する最大の編集距離
+        prefix_length: 削除パターンを作る先頭文字数
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[str],
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+        prefix_length: int = DEFAULT_PREFIX_LENGTH,
+    ):
+        self.keys = keys
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+
+        # 削除パターン -> キー番号
+        deletes = KeyMap()
+        for key_id, key in enumerate(keys):
+            for pattern in _deletes(key[:prefix_length], max_distance):
+                deletes.add(pattern, key_id)
+        self._deletes: KeyLookup = deletes
+
+    @classmethod
+    def from_deletes(
+        cls,
+        keys: Sequence[str],
+        deletes: KeyLookup,
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+        prefix_length: int = DEFAULT_PREFIX_LENGTH,
+    ) -> "SymSpellIndex":
+        """
+        構築済みの削除辞書を参照するインデックスを作る
+
+        Args:
+            keys: 検索対象のキー（重複なし）
+            deletes: 削除パターン -> キー番号（KeyMapと同じインターフェース）
+            max_distance: 許容する最大の編集距離（削除辞書を作ったときの値以下）
+            prefix_length: 削除辞書を作ったときの先頭文字数
+        """
+        index = cls.__new__(cls)
+        index.keys = keys
+        index.max_distance = max_distance
+        index.prefix_length = prefix_length
+        index._deletes = deletes
+        return index
+
+    def search(self, query: str, max_distance: int | None = None) -> list[tuple[int, int]]:
+        """
+        編集距離がmax_distance以内のキーを検索する
+
+        Args:
+            query: クエリ（登録キーと同じ方法で正規化済み）
+            max_distance: 許容する編集距離（省略時は構築時の値。構築時の値を超えることはできない）
+
+        Returns:
+            list[tuple[int, int]]: (編集距離, キー番号) を距離が近い順に並べたもの
+        """
+        if max_distance is None or max_distance > self.max_distance:
+            max_distance = self.max_distance
+
+        seen: set[int] = set()
+        results = []
+        for pattern in _deletes(query[: self.prefix_length], max_distance):
+            for key_id in self._deletes.get(pattern):
+                if key_id in seen:
+                    continue
+                seen.add(key_id)
+                distance = edit_distance(query, self.keys[key_id], max_distance)
+                if distance <= max_distance:
+                    results.append((distance, key_id))
+
+        results.sort(key=lambda item: (item[0], abs(len(self.keys[item[1]]) - len(query)), item[1]))
+        return results
@@ -0,0 +1,18 @@
+"""プロセスやファイルをまたいで同じ値になるキーのハッシュ"""
+
+import hashlib
+
+
+def key_hashes(key: str) -> tuple[int, int]:
+    """
+    キーから2つの64ビットハッシュ値を求める
+
+    プロセスやファイルをまたいで同じ値になるよう、組み込みのhash()ではなくblake2bを使います。
+    """
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+def key_hash64(key: str) -> int:
+    """キーから64ビットのハッシュ値を1つ求める（key_hashesと同じくプロセスやファイルをまたいで同じ値になる）"""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
@@ -0,0 +1,200 @@
+"""国税庁 法人番号公表サイトのCSV（全件・差分データ）の取り込み
+
+zipのまま、またはCSVを1行ずつ読み、全件をメモリに載せずにレジストリを作ります。
+Shift_JIS版とUnicode（UTF-8）版のどちらにも対応します。
+"""
+
+import codecs
+import csv
+import io
+import random
+import zipfile
+from collections.abc import Collection, Iterable, Iterator
+from pathlib import Path
+from typing import IO, NamedTuple
+
+from .registry import ClientRecord
+
+# 法人種別コード
+KIND_NAMES: dict[str, str] = {
+    "101": "国の機関",
+    "201": "地方公共団体",
+    "301": "株式会社",
+    "302": "有限会社",
+    "303": "合名会社",
+    "304": "合資会社",
+    "305": "合同会社",
+    "399": "その他の設立登記法人",
+    "401": "外国会社等",
+    "499": "その他",
+}
+
+# 顧問先になり得る法人種別（国の機関・地方公共団体を除く）
+DEFAULT_KINDS: frozenset[str] = frozenset({"301", "302", "303", "304", "305", "399", "401", "499"})
+
+
+class HoujinRow(NamedTuple):
+    """
+    法人番号CSVの1行（取り込みに使う項目のみ）
+
+    Attributes:
+        sequence_number: 一連番号
+        corporate_number: 法人番号
+        process: 処理区分（01: 新規, 11: 商号変更, 71: 吸収合併 など）
+        name: 商号又は名称
+        kind: 法人種別
+        prefecture: 国内所在地（都道府県）
+        city: 国内所在地（市区町村）
+        street: 国内所在地（丁目番地等）
+        close_date: 登記記録の閉鎖等年月日
+        latest: 最新履歴（1: 最新）
+        furigana: フリガナ
+        hidden: 検索対象除外（1: 法人番号公表サイトの検索の対象から除外されている）
+    """
+
+    sequence_number: str
+    corporate_number: str
+    process: str
+    name: str
+    kind: str
+    prefecture: str
+    city: str
+    street: str
+    close_date: str
+    latest: str
+    furigana: str
+    hidden: str = ""
+
+    @classmethod
+    def from_csv(cls, row: list[str]) -> "HoujinRow":
+        # 列の並びは「法人番号データ（CSV形式）」の仕様書に従う
+        return cls(
+            sequence_number=row[0],
+            corporate_number=row[1],
+            process=row[2],
+            name=row[6],
+            kind=row[8],
+            prefecture=row[9],
+            city=row[10],
+            street=row[11],
+            close_date=row[18],
+            latest=row[23],
+            furigana=row[28] if len(row) > 28 else "",
+            hidden=row[29] if len(row) > 29 else "",
+        )
+
+    @property
+    def is_active(self) -> bool:
+        """最新の履歴で、登記記録が閉鎖されておらず、検索対象除外でもない"""
+        return self.latest == "1" and not self.close_date and self.hidden != "1"
+
+    def to_record(self) -> ClientRecord:
+        return ClientRecord(
+            name=self.name,
+            corporate_number=self.corporate_number,
+            kind=self.kind,
+            address=self.prefecture + self.city + self.street,
+        )
+
+
+def _detect_encoding(head: bytes) -> str:
+    """先頭のバイト列からUTF-8かShift_JIS（cp932）かを判定する"""
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # 読み込み単位の末尾でマルチバイト文字が切れただけならUTF-8とみなす
+        if e.start < len(head) - 3:
+            return "cp932"
+    return "utf-8"
+
+
+def _iter_rows(binary: IO[bytes], encoding: str | None) -> Iterator[HoujinRow]:
+    if encoding is None:
+        # zip内のファイル・通常のファイルとも、読み進めずに先頭のバッファだけを見て判定する
+        encoding = _detect_encoding(binary.peek(64 * 1024))
+    text = io.TextIOWrapper(binary, encoding=encoding, newline="")
+    try:
+        for row in csv.reader(text):
+            if row:
+                yield HoujinRow.from_csv(row)
+    finally:
+        # 元のファイルは呼び出し側が閉じるため、ラッパーだけを切り離す
+        text.detach()
+
+
+def iter_houjin_csv(path: Path, encoding: str | None = None) -> Iterator[HoujinRow]:
+    """
+    法人番号CSV（zipまたはcsv）を1行ずつ読む
+
+    Args:
+        path: ダウンロードしたzipファイルまたは展開済みのCSVファイル
+        encoding: 文字コード（省略時は先頭から自動判定）
+
+    Yields:
+        HoujinRow: 法人番号CSVの1行
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.namelist():
+                if member.lower().endswith(".csv"):
+                    with archive.open(member) as binary:
+                        yield from _iter_rows(binary, encoding)
+    else:
+        with open(path, mode="rb") as binary:
+            yield from _iter_rows(binary, encoding)
+
+
+def reservoir_sample[T](items: Iterable[T], size: int, seed: int | None = None) -> list[T]:
+    """
+    件数が分からない入力から、size件を等確率で無作為抽出する（Algorithm R）
+
+    保持するのは抽出結果のsize件だけなので、入力の件数によらずメモリ使用量は一定です。
+
+    Args:
+        items: 入力
+        size: 抽出する件数
+        seed: 乱数シード
+
+    Returns:
+        list: 抽出結果（入力順）
+    """
+    rng = random.Random(seed)
+    reservoir: list[tuple[int, T]] = []
+    for position, item in enumerate(items):
+        if position < size:
+            reservoir.append((position, item))
+        else:
+            slot = rng.randrange(position + 1)
+            if slot < size:
+                reservoir[slot] = (position, item)
+    reservoir.sort(key=lambda entry: entry[0])
+    return [item for _, item in reservoir]
+
+
+def iter_client_records(
+    paths: Iterable[Path],
+    kinds: Collection[str] = DEFAULT_KINDS,
+    active_only: bool = True,
+    encoding: str | None = None,
+) -> Iterator[ClientRecord]:
+    """
+    法人番号CSVから顧問先のレコードを1件ずつ取り出す
+
+    Args:
+        paths: 法人番号CSV（zipまたはcsv）のリスト。都道府県別ファイルを複数渡してよい
+        kinds: 取り込む法人種別コード
+        active_only: 閉鎖済み・最新でない履歴・検索対象除外の法人を除外する
+        encoding: 文字コード（省略時は自動判定）
+
+    Yields:
+        ClientRecord: 顧問先のレコード
+    """
+    for path in paths:
+        for row in iter_houjin_csv(path, encoding):
+            if row.kind not in kinds:
+                continue
+            if active_only and not row.is_active:
+                continue
+            yield row.to_record()
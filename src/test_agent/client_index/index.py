@@ -0,0 +1,566 @@
+"""顧問先名の検索インデックス"""
+
+from array import array
+from collections.abc import Container, Iterable, Iterator, Sequence
+from functools import cached_property
+from pathlib import Path
+from typing import NamedTuple
+
+from .bloom import BloomFilter, BloomFilteredMap
+from .corporate import CorporateNumberIndex
+from .fuzzy import DEFAULT_MAX_DISTANCE, SymSpellIndex
+from .keymap import KeyMap
+from .ngram import TrigramIndex
+from .normalize import legal_form_code, normalize_name, split_legal_form
+from .perfect import PerfectHashTable
+from .prefix import SortedKeyArray
+from .readings import ReadingTable, normalized_reading_key
+from .records import LegalFormNameTable, RecordStore
+from .snapshot import HashTable, IndexSnapshot
+from .sqlite import SqliteDatabase, sqlite_components
+from .strings import FrontCodedStringTable
+
+
+class LookupResult(NamedTuple):
+    """
+    検索結果
+
+    Attributes:
+        match_type: 一致種別（exact / normalized / core_name / reading / partial / fuzzy / corporate_number）。
+            一致しない場合はNone
+        matches: 一致した顧問先の登録名（部分一致の場合は上位のみ）
+        total: 一致した総件数
+        record_ids: matchesに対応するレコード番号
+    """
+
+    match_type: str | None
+    matches: list[str]
+    total: int
+    record_ids: list[int]
+
+
+class ClientIndex:
+    """
+    顧問先リストから構築する検索インデックス
+
+    モジュール読み込み時に一度だけ構築し、検索時はハッシュを引くだけで済むようにします。
+    同名の顧問先が複数登録されている場合も、全てのレコードを保持します。
+
+    完全一致・正規化一致の辞書は構築時に作り、部分一致・あいまい検索などの
+    重い索引は最初に使われたときに作ります。
+
+    Args:
+        records: 顧問先のレコード、または顧問先名のリスト（重複を含んでよい）
+        readings: 事前計算済みの読みキー（省略時は読みによる検索を行わない）
+        fuzzy_max_distance: あいまい検索で許容する最大の編集距離
+    """
+
+    records: RecordStore
+    names: Sequence[str]
+    keys: Sequence[str]
+    _exact: KeyMap | HashTable | PerfectHashTable | FrontCodedStringTable | LegalFormNameTable | BloomFilteredMap
+    _normalized: KeyMap | HashTable
+
+    def __init__(
+        self,
+        records: RecordStore | Iterable[str],
+        readings: ReadingTable | None = None,
+        fuzzy_max_distance: int = DEFAULT_MAX_DISTANCE,
+    ):
+        if not isinstance(records, RecordStore):
+            records = RecordStore(list(records))
+        self.records = records
+        self.names = records.names
+        # レコード番号順の正規化キー
+        self.keys = [normalize_name(name) for name in self.names]
+
+        # 顧問先名 -> レコード番号（step1の完全一致とstep2の検証で共有）。
+        # 前方圧縮した文字列表・法人格を辞書化した列はそれ自体を引けるため、辞書を作らない
+        if isinstance(self.names, (FrontCodedStringTable, LegalFormNameTable)):
+            self._exact = self.names
+        else:
+            self._exact = KeyMap()
+            for record_id, name in enumerate(self.names):
+                self._exact.add(name, record_id)
+        # 正規化キー -> レコード番号（全角/半角・大小文字・空白の違いを吸収）
+        self._normalized = KeyMap()
+        for record_id, key in enumerate(self.keys):
+            self._normalized.add(key, record_id)
+
+        self._reading_columns: tuple[Sequence[str], Sequence[str]] | None = None
+        self._reading_legal_forms: dict[str, str] = {}
+        if readings is not None:
+            self._reading_columns = (
+                [hira for hira, _ in readings.readings],
+                [romaji for _, romaji in readings.readings],
+            )
+            self._reading_legal_forms = readings.legal_forms
+        self._fuzzy_max_distance = fuzzy_max_distance
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        snapshot: IndexSnapshot,
+        fuzzy_max_distance: int = DEFAULT_MAX_DISTANCE,
+        use_bloom: bool = True,
+    ) -> "ClientIndex":
+        """
+        mmapしたスナップショットを参照するインデックスを作る
+
+        レコードの各列・正規化キー・完全一致の最小完全ハッシュ・正規化一致のハッシュ表に加え、
+        最初に使われたときに構築する索引もファイル上のデータをそのまま使うため、リストや辞書を組み立てません。
+        共有メモリ上のスナップショットを参照する各ワーカーは、プロセスごとの索引を持ちません。
+
+        Args:
+            snapshot: 読み込んだスナップショット
+            fuzzy_max_distance: あいまい検索で許容する最大の編集距離
+            use_bloom: スナップショットに顧問先名のBloomフィルタがあれば、完全一致の確認の前に使う
+
+        Returns:
+            ClientIndex: スナップショットを参照するインデックス
+        """
+        index = cls.__new__(cls)
+        index._snapshot = snapshot
+        index.records = snapshot.records
+        index.names = snapshot.names
+        index.keys = snapshot.keys
+        index._exact = _bloom_filtered(snapshot.exact, snapshot.bloom if use_bloom else None)
+        index._normalized = snapshot.normalized
+        index._reading_columns = snapshot.readings
+        index._reading_legal_forms = snapshot.reading_legal_forms
+        index._fuzzy_max_distance = fuzzy_max_distance
+        index._legal_forms = snapshot.legal_forms
+        if snapshot.corporate is not None:
+            index._corporate = snapshot.corporate
+        index._core = snapshot.core
+        index._cores = snapshot.cores
+        index._reading = snapshot.reading
+        index._trigrams = TrigramIndex.from_postings(snapshot.keys, *snapshot.trigrams)
+        if snapshot.fuzzy_deletes is not None:
+            index._fuzzy = SymSpellIndex.from_deletes(
+                snapshot.cores,
+                snapshot.fuzzy_deletes,
+                max_distance=min(fuzzy_max_distance, snapshot.metadata["fuzzy_max_distance"]),
+                prefix_length=snapshot.metadata["fuzzy_prefix_length"],
+            )
+        index._sorted_keys = SortedKeyArray.from_order(snapshot.keys, snapshot.sorted_keys)
+        index._sorted_cores = SortedKeyArray.from_order(snapshot.cores, snapshot.sorted_cores)
+        return index
+
+    @classmethod
+    def from_sqlite(
+        cls,
+        path: Path,
+        fuzzy_max_distance: int = DEFAULT_MAX_DISTANCE,
+        use_bloom: bool = True,
+    ) -> "ClientIndex":
+        """
+        SQLiteデータベースを参照するインデックスを作る
+
+        各索引の代わりにデータベースの索引付きの列・FTS5の表を引くため、顧問先名のリストや
+        辞書をメモリに持ちません。検索の段階や並び順はメモリ上に構築した場合と同じです。
+
+        Args:
+            path: write_sqliteで作成したデータベースファイル
+            fuzzy_max_distance: あいまい検索で許容する最大の編集距離
+            use_bloom: データベースに顧問先名のBloomフィルタがあれば、完全一致の確認の前に使う
+
+        Returns:
+            ClientIndex: データベースを参照するインデックス
+        """
+        index = cls.__new__(cls)
+        index._database = SqliteDatabase(path)
+        for attribute, component in sqlite_components(index._database, fuzzy_max_distance).items():
+            setattr(index, attribute, component)
+        index._exact = _bloom_filtered(index._exact, index._database.bloom if use_bloom else None)
+        return index
+
+    @cached_property
+    def _corporate(self) -> CorporateNumberIndex:
+        """法人番号 -> レコード番号（法人番号を登録していない場合は空）"""
+        numbers = self.records.corporate_numbers
+        return CorporateNumberIndex.from_numbers(numbers if numbers is not None else ())
+
+    @cached_property
+    def _core(self) -> KeyMap:
+        """法人格を除いた名称 -> レコード番号（法人格の有無・前株/後株の違いを吸収）"""
+        core_map = KeyMap()
+        for record_id, key in enumerate(self.keys):
+            _, _, core = split_legal_form(key)
+            if core:
+                core_map.add(core, record_id)
+        return core_map
+
+    @cached_property
+    def _legal_forms(self) -> array:
+        """レコードごとの正規化キーの法人格と位置（legal_form_codeの値）"""
+        return array("B", (legal_form_code(*split_legal_form(key)[:2]) for key in self.keys))
+
+    @cached_property
+    def _cores(self) -> list[str]:
+        """法人格を除いた名称（重複なし）"""
+        return list(self._core)
+
+    @cached_property
+    def _reading(self) -> KeyMap:
+        """読みキー（ひらがな・ローマ字） -> レコード番号"""
+        reading_map = KeyMap()
+        if self._reading_columns is not None:
+            for column in self._reading_columns:
+                for record_id, key in enumerate(column):
+                    if key:
+                        reading_map.add(key, record_id)
+        return reading_map
+
+    @cached_property
+    def _trigrams(self) -> TrigramIndex:
+        """正規化キーの文字トライグラム -> レコード番号（部分一致検索）"""
+        return TrigramIndex(self.keys)
+
+    @cached_property
+    def _fuzzy(self) -> SymSpellIndex:
+        """法人格を除いた名称の削除辞書（誤字を許容するあいまい検索）"""
+        return SymSpellIndex(self._cores, max_distance=self._fuzzy_max_distance)
+
+    @cached_property
+    def _sorted_keys(self) -> SortedKeyArray:
+        """正規化キーを辞書順に並べた配列（前方一致による入力補完）"""
+        return SortedKeyArray(self.keys)
+
+    @cached_property
+    def _sorted_cores(self) -> SortedKeyArray:
+        """法人格を除いた名称を辞書順に並べた配列（前方一致による入力補完）"""
+        return SortedKeyArray(self._cores)
+
+    def warm_up(self) -> None:
+        """最初に使われたときに構築する索引を、今のうちに全て構築しておく"""
+        for stage in (
+            "_corporate",
+            "_core",
+            "_legal_forms",
+            "_cores",
+            "_reading",
+            "_trigrams",
+            "_fuzzy",
+            "_sorted_keys",
+            "_sorted_cores",
+        ):
+            getattr(self, stage)
+
+    def close(self) -> None:
+        """
+        SQLiteデータベースを参照している場合は、全てのスレッドの接続を閉じる
+
+        スナップショットのmmapは索引がmemoryviewで参照しているため明示的には閉じられず、
+        インデックスへの最後の参照がなくなった時点で解放されます。メモリ上のインデックスでは何もしません。
+        """
+        database = getattr(self, "_database", None)
+        if database is not None:
+            database.close()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and bool(self._find_exact(name))
+
+    @property
+    def has_readings(self) -> bool:
+        """読みによる検索を行う"""
+        return self._reading_columns is not None
+
+    def _names_of(self, record_ids: list[int]) -> list[str]:
+        return [self.names[record_id] for record_id in record_ids]
+
+    def find_exact(self, name: str) -> list[str]:
+        """
+        完全一致する顧問先を全て返す
+
+        Args:
+            name: 検索する顧問先名
+
+        Returns:
+            list[str]: 一致した顧問先名（重複登録はその件数分）
+        """
+        return self._names_of(self._find_exact(name))
+
+    def exact_record_ids(self, name: str) -> list[int]:
+        """
+        完全一致する顧問先のレコード番号を全て返す
+
+        Args:
+            name: 検索する顧問先名
+
+        Returns:
+            list[int]: 一致したレコード番号（recordsの添字）
+        """
+        return self._find_exact(name)
+
+    def find_corporate_number(self, corporate_number: str) -> LookupResult:
+        """
+        法人番号に一致する顧問先を返す
+
+        名称の正規化や候補の絞り込みを行わず、整数の索引を1回引くだけで確定します。
+        チェックデジットの検証は呼び出し側で行います。
+
+        Args:
+            corporate_number: 13桁の法人番号
+
+        Returns:
+            LookupResult: 一致した場合のmatch_typeは "corporate_number"
+        """
+        record_ids = self._corporate.get(int(corporate_number))
+        if not record_ids:
+            return LookupResult(None, [], 0, [])
+        return self._result("corporate_number", record_ids, len(record_ids))
+
+    def _find_exact(self, name: str) -> list[int]:
+        return self._exact.get(name)
+
+    def find_normalized(self, name: str) -> list[str]:
+        """
+        表記ゆれを吸収して一致する顧問先を全て返す
+
+        Args:
+            name: 検索する顧問先名（全角/半角・大小文字・空白の違いは問わない）
+
+        Returns:
+            list[str]: 一致した顧問先の登録名
+        """
+        return self._names_of(self._find_normalized(normalize_name(name)))
+
+    def _find_normalized(self, key: str) -> list[int]:
+        return self._normalized.get(key)
+
+    def find_core_name(self, name: str) -> list[str]:
+        """
+        法人格を除いた名称が一致する顧問先を、近い順に返す
+
+        「青空」「青空株式会社」のように法人格が省略されていたり前後が逆だったりしても、
+        「株式会社青空」を候補として返します。
+
+        Args:
+            name: 検索する顧問先名
+
+        Returns:
+            list[str]: 候補の登録名。クエリと法人格・位置が同じもの、法人格だけ同じもの、
+                法人格が異なるものの順に並べる（クエリに法人格がない場合は登録順）
+        """
+        return self._names_of(self._find_core_name(normalize_name(name)))
+
+    def _find_core_name(self, key: str) -> list[int]:
+        form, position, core = split_legal_form(key)
+        if not core:
+            return []
+        record_ids = self._core.get(core)
+        if form is None:
+            return record_ids
+
+        # 候補の法人格と位置は整数で持っているため、候補ごとにキーを分解し直さない
+        code = legal_form_code(form, position)
+        legal_forms = self._legal_forms
+
+        def rank(record_id: int) -> tuple[int, int]:
+            candidate = legal_forms[record_id]
+            if candidate >> 1 != code >> 1:
+                return 2, record_id
+            return (0 if candidate == code else 1), record_id
+
+        return sorted(record_ids, key=rank)
+
+    def find_reading(self, name: str) -> list[str]:
+        """
+        読み（ひらがな・カタカナ・ローマ字）が一致する顧問先を返す
+
+        「いけだしょうてん」「ikeda shouten」で「株式会社　池田商店」が見つかります。
+        クエリの読みは正規化するだけで求めるため、pykakasiは呼び出しません。
+
+        Args:
+            name: 検索する顧問先名の読み
+
+        Returns:
+            list[str]: 一致した顧問先の登録名
+        """
+        return self._names_of(self._find_reading(normalize_name(name)))
+
+    def _find_reading(self, key: str) -> list[int]:
+        key = normalized_reading_key(key)
+        if not key:
+            return []
+
+        record_ids = self._reading.get(key)
+        if not record_ids:
+            # 法人格の読み（かぶしきがいしゃ等）を前後から取り除いて再検索
+            for form_key in self._reading_legal_forms:
+                if key != form_key and key.startswith(form_key):
+                    record_ids = self._reading.get(key[len(form_key):])
+                elif key != form_key and key.endswith(form_key):
+                    record_ids = self._reading.get(key[: -len(form_key)])
+                if record_ids:
+                    break
+
+        return record_ids
+
+    def find_partial(self, name: str, limit: int) -> tuple[int, list[str]]:
+        """
+        名称の一部を含む顧問先を返す
+
+        Args:
+            name: 検索する顧問先名の一部
+            limit: 返す候補の上限
+
+        Returns:
+            tuple: (一致した総件数, 上位の候補の登録名)
+        """
+        total, record_ids = self._find_partial(normalize_name(name), limit)
+        return total, self._names_of(record_ids)
+
+    def _find_partial(self, key: str, limit: int, exclude: Container[int] = ()) -> tuple[int, list[int]]:
+        return self._trigrams.search(key, limit, exclude)
+
+    def find_fuzzy(self, name: str, max_distance: int | None = None) -> list[str]:
+        """
+        誤字を許容して、法人格を除いた名称が近い顧問先を返す
+
+        漢字・かなを1文字打ち間違えた場合でも候補を返します。短い名称ほど別の顧問先と
+        取り違えやすいため、名称の半分未満の文字数までしか誤りを許容しません。
+
+        Args:
+            name: 検索する顧問先名
+            max_distance: 許容する編集距離（省略時はインデックス構築時の値）
+
+        Returns:
+            list[str]: 候補の登録名（編集距離が近い順）
+        """
+        return self._names_of(self._find_fuzzy(normalize_name(name), max_distance))
+
+    def _find_fuzzy(self, key: str, max_distance: int | None = None) -> list[int]:
+        record_ids = []
+        for _, key_id in self._fuzzy_matches(key, max_distance):
+            record_ids.extend(self._core.get(self._cores[key_id]))
+        return record_ids
+
+    def _fuzzy_matches(self, key: str, max_distance: int | None = None) -> list[tuple[int, int]]:
+        """法人格を除いた名称が近いものの (編集距離, _coresの番号) を近い順に返す"""
+        _, _, core = split_legal_form(key)
+        allowed = (len(core) - 1) // 2
+        if max_distance is not None:
+            allowed = min(allowed, max_distance)
+        if allowed <= 0:
+            return []
+        return self._fuzzy.search(core, allowed)
+
+    def complete(self, prefix: str, limit: int = 10) -> list[str]:
+        """
+        入力途中の顧問先名から、登録名の候補を返す（入力補完）
+
+        正規化キーが前方一致するものを辞書順に返し、足りない分は法人格を除いた名称が
+        前方一致するもので補います。「あおぞ」「青」のように法人格を省いた入力でも候補が出ます。
+
+        Args:
+            prefix: 入力途中の顧問先名
+            limit: 返す候補の上限
+
+        Returns:
+            list[str]: 候補の登録名（重複なし）
+        """
+        completions: dict[str, None] = {}
+        for record_id in self._iter_completions(normalize_name(prefix)):
+            completions[self.names[record_id]] = None
+            if len(completions) >= limit:
+                break
+        return list(completions)
+
+    def _iter_completions(self, key: str) -> Iterator[int]:
+        """入力補完の候補のレコード番号を、候補として出す順に返す（重複を含む）"""
+        if not key:
+            return
+        yield from self._sorted_keys.iter_prefix(key)
+
+        _, _, core = split_legal_form(key)
+        if core:
+            for key_id in self._sorted_cores.iter_prefix(core):
+                yield from self._core.get(self._cores[key_id])
+
+    def lookup(self, name: str, limit: int = 20) -> LookupResult:
+        """
+        完全一致 -> 正規化一致 -> 法人格を除いた名称の一致 -> 読みの一致 -> 部分一致 -> あいまい検索の順に検索する
+
+        Args:
+            name: 検索する顧問先名
+            limit: 部分一致・あいまい検索で返す候補の上限
+
+        Returns:
+            LookupResult: 最初に一致した段階の検索結果
+        """
+        for result in self._stages(name, limit):
+            if result.record_ids:
+                return result
+        return LookupResult(None, [], 0, [])
+
+    def _stages(self, name: str, limit: int, exclude: Container[int] = ()) -> Iterator[LookupResult]:
+        """
+        lookupの各段階の検索結果を、一致しなかった段階も含めて順に返す
+
+        段階ごとに必要になった時点で検索するため、途中で打ち切れば後の段階は実行しません。
+
+        Args:
+            name: 検索する顧問先名
+            limit: 部分一致・あいまい検索で返す候補の上限
+            exclude: 結果から除くレコード番号（差分で更新・削除されたレコード）
+        """
+
+        def kept(record_ids: list[int]) -> list[int]:
+            return [record_id for record_id in record_ids if record_id not in exclude] if exclude else record_ids
+
+        record_ids = kept(self._find_exact(name))
+        yield self._result("exact", record_ids, len(record_ids))
+
+        # 正規化は一度だけ行い、以降の段階で使い回す
+        key = normalize_name(name)
+        for match_type, find in (
+            ("normalized", self._find_normalized),
+            ("core_name", self._find_core_name),
+            ("reading", self._find_reading),
+        ):
+            record_ids = kept(find(key))
+            yield self._result(match_type, record_ids, len(record_ids))
+
+        total, record_ids = self._find_partial(key, limit, exclude)
+        yield self._result("partial", record_ids, total)
+
+        record_ids = kept(self._find_fuzzy(key))
+        yield self._result("fuzzy", record_ids[:limit], len(record_ids))
+
+    def _result(self, match_type: str, record_ids: list[int], total: int) -> LookupResult:
+        return LookupResult(match_type, self._names_of(record_ids), total, record_ids)
+
+    def lookup_many(self, names: Iterable[str], limit: int = 20) -> list[LookupResult]:
+        """
+        複数の顧問先名をまとめて検索する
+
+        重複するクエリは一度だけ検索し、完全一致するものは辞書を引くだけで先に確定させます。
+        残ったクエリだけをlookupと同じ順序の段階的な検索にかけます。
+
+        Args:
+            names: 検索する顧問先名のリスト
+            limit: 1件ごとに返す候補の上限
+
+        Returns:
+            list[LookupResult]: 入力と同じ順序の検索結果
+        """
+        names = list(names)
+        resolved: dict[str, LookupResult] = {}
+        for name in dict.fromkeys(names):
+            record_ids = self._find_exact(name)
+            if record_ids:
+                resolved[name] = self._result("exact", record_ids, len(record_ids))
+        for name in dict.fromkeys(names):
+            if name not in resolved:
+                resolved[name] = self.lookup(name, limit)
+        return [resolved[name] for name in names]
+
+
+def _bloom_filtered(exact, bloom: BloomFilter | None):
+    """完全一致の索引の前にBloomフィルタを置く（登録されていない名前はファイル上の索引を引かない）"""
+    return exact if bloom is None else BloomFilteredMap(bloom, exact)
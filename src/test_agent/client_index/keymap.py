@@ -0,0 +1,46 @@
+"""キー -> レコード番号の対応表"""
+
+from collections.abc import Iterator
+from typing import Protocol
+
+
+class KeyLookup(Protocol):
+    """KeyMapと同じく、キーに対応するレコード番号を全て返す対応表"""
+
+    def get(self, key: str, /) -> list[int]: ...
+
+
+class KeyMap:
+    """
+    キー -> レコード番号の対応表
+
+    大半のキーは1件のレコードにしか対応しないため、最初のレコード番号だけを
+    辞書に持ち、2件目以降は別の辞書に分けてメモリを抑えます。
+    """
+
+    __slots__ = ("_first", "_rest")
+
+    def __init__(self) -> None:
+        self._first: dict[str, int] = {}
+        self._rest: dict[str, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._first)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._first
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._first)
+
+    def add(self, key: str, record_id: int) -> None:
+        if key in self._first:
+            self._rest.setdefault(key, []).append(record_id)
+        else:
+            self._first[key] = record_id
+
+    def get(self, key: str) -> list[int]:
+        first = self._first.get(key)
+        if first is None:
+            return []
+        return [first, *self._rest.get(key, ())]
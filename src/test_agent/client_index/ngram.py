@@ -0,0 +1,126 @@
+"""部分一致検索用の文字トライグラム転置インデックス"""
+
+import heapq
+from array import array
+from collections.abc import Container, Sequence
+from typing import Protocol
+
+NGRAM_SIZE = 3
+
+
+class Postings(Protocol):
+    """文字列 -> レコード番号のポスティングリスト（登録されていない場合はNoneか空）"""
+
+    def get(self, key: str, /) -> Sequence[int] | None: ...
+
+
+def _ngrams(text: str, size: int) -> set[str]:
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+def _intersect(postings: list[array]) -> list[int]:
+    """
+    ポスティングリストの共通部分を求める
+
+    最も短いリストを起点に集合演算で絞り込み、レコード番号の昇順で返します。
+    """
+    postings = sorted(postings, key=len)
+    result = set(postings[0])
+    for posting in postings[1:]:
+        result.intersection_update(posting)
+        if not result:
+            break
+    return sorted(result)
+
+
+class TrigramIndex:
+    """
+    文字トライグラムのポスティングリストによる部分一致検索
+
+    3文字以上のクエリはトライグラム、2文字以下のクエリは1文字ごとのポスティングリストを
+    積集合で絞り込み、最後に部分文字列として含まれるかを確認します。
+
+    Args:
+        keys: レコード番号順の検索キー（正規化済みの顧問先名）
+    """
+
+    def __init__(self, keys: Sequence[str]):
+        self._keys = keys
+
+        grams: dict[str, list[int]] = {}
+        chars: dict[str, list[int]] = {}
+        for record_id, key in enumerate(keys):
+            for gram in _ngrams(key, NGRAM_SIZE):
+                grams.setdefault(gram, []).append(record_id)
+            for char in set(key):
+                chars.setdefault(char, []).append(record_id)
+
+        # レコード番号は昇順に追加されるので、そのままソート済みの配列になる
+        self._grams: Postings = {gram: array("I", ids) for gram, ids in grams.items()}
+        self._chars: Postings = {char: array("I", ids) for char, ids in chars.items()}
+
+    @classmethod
+    def from_postings(cls, keys: Sequence[str], grams: Postings, chars: Postings) -> "TrigramIndex":
+        """
+        構築済みのポスティングリストを参照するインデックスを作る
+
+        Args:
+            keys: レコード番号順の検索キー
+            grams: トライグラム -> レコード番号
+            chars: 1文字 -> レコード番号
+        """
+        index = cls.__new__(cls)
+        index._keys = keys
+        index._grams = grams
+        index._chars = chars
+        return index
+
+    @property
+    def postings(self) -> tuple[Postings, Postings]:
+        """(トライグラム -> レコード番号, 1文字 -> レコード番号)"""
+        return self._grams, self._chars
+
+    def search(self, query: str, limit: int, exclude: Container[int] = ()) -> tuple[int, list[int]]:
+        """
+        クエリを部分文字列として含むレコードを検索する
+
+        Args:
+            query: 正規化済みのクエリ
+            limit: 返すレコード番号の上限
+            exclude: 結果から除くレコード番号（総件数にも含めない）
+
+        Returns:
+            tuple: (一致した総件数, 上位のレコード番号)。先頭一致するもの、短いものの順に並べる
+        """
+        if not query:
+            return 0, []
+
+        if len(query) >= NGRAM_SIZE:
+            index, grams = self._grams, _ngrams(query, NGRAM_SIZE)
+        else:
+            index, grams = self._chars, set(query)
+
+        postings = []
+        for gram in grams:
+            posting = index.get(gram)
+            if not posting:
+                return 0, []
+            postings.append(posting)
+
+        candidates = _intersect(postings)
+        # トライグラム1つ分、または1文字のクエリはポスティングリストだけで確定する
+        if len(query) > NGRAM_SIZE or len(query) == 2:
+            candidates = [record_id for record_id in candidates if query in self._keys[record_id]]
+        if exclude:
+            candidates = [record_id for record_id in candidates if record_id not in exclude]
+
+        top = heapq.nsmallest(
+            limit,
+            candidates,
+            key=lambda record_id: (
+                not self._keys[record_id].startswith(query),
+                len(self._keys[record_id]),
+                record_id,
+            ),
+        )
+        return len(candidates), top
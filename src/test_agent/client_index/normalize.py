@@ -0,0 +1,174 @@
+"""顧問先名の正規化"""
+
+import jaconv
+
+
+def normalize_name(name: str) -> str:
+    """
+    表記ゆれを吸収した検索キーを作る
+
+    全角/半角（英数字・カナ）、大文字/小文字、全角/半角スペースの違いを同一視します。
+    jaconvでNFKC正規化と長音・ハイフン類の統一を行い、case foldingと空白除去をかけます。
+
+    Args:
+        name: 顧問先名または検索クエリ
+
+    Returns:
+        str: 正規化済みの検索キー
+    """
+    normalized = jaconv.normalize(name, "NFKC").casefold()
+    return "".join(normalized.split())
+
+
+# 法人格（正規化済みの表記）。前後どちらに付いていても取り除けるよう、長いものから照合する
+LEGAL_FORMS: tuple[str, ...] = (
+    "株式会社",
+    "有限会社",
+    "合同会社",
+    "合資会社",
+    "合名会社",
+    "一般社団法人",
+    "一般財団法人",
+    "公益社団法人",
+    "公益財団法人",
+    "社団法人",
+    "財団法人",
+    "特定非営利活動法人",
+    "npo法人",
+    "医療法人社団",
+    "医療法人財団",
+    "医療法人",
+    "社会福祉法人",
+    "学校法人",
+    "宗教法人",
+    "農事組合法人",
+    "管理組合法人",
+    "税理士法人",
+    "司法書士法人",
+    "弁護士法人",
+    "行政書士法人",
+    "社会保険労務士法人",
+    "土地家屋調査士法人",
+    "特許業務法人",
+    "監査法人",
+    "独立行政法人",
+    "地方独立行政法人",
+    "国立大学法人",
+    "有限責任事業組合",
+    "事業協同組合",
+    "協同組合",
+    "企業組合",
+)
+
+# 略記 -> 法人格（NFKC正規化で「㈱」は「(株)」になる）
+LEGAL_FORM_ALIASES: dict[str, str] = {
+    "(株)": "株式会社",
+    "(有)": "有限会社",
+    "(同)": "合同会社",
+    "(資)": "合資会社",
+    "(名)": "合名会社",
+    "(一社)": "一般社団法人",
+    "(一財)": "一般財団法人",
+    "(公社)": "公益社団法人",
+    "(公財)": "公益財団法人",
+    "(特非)": "特定非営利活動法人",
+    "(医)": "医療法人",
+    "(福)": "社会福祉法人",
+    "(学)": "学校法人",
+    "(宗)": "宗教法人",
+}
+
+# 表記 -> 法人格。照合は表記の長さごとに辞書を引くだけで済ませる
+_FORM_SPELLINGS: dict[str, str] = {form: form for form in LEGAL_FORMS} | LEGAL_FORM_ALIASES
+_SPELLING_LENGTHS: tuple[int, ...] = tuple(sorted({len(spelling) for spelling in _FORM_SPELLINGS}, reverse=True))
+
+
+def split_legal_form(key: str) -> tuple[str | None, str | None, str]:
+    """
+    正規化済みのキーから法人格を切り離す
+
+    先頭（前株）を優先して照合し、なければ末尾（後株）を照合します。
+
+    Args:
+        key: normalize_nameで正規化済みのキー
+
+    Returns:
+        tuple: (法人格, 位置 "prefix"/"suffix", 法人格を除いた名称)。
+            法人格がない場合は (None, None, key)
+    """
+    for length in _SPELLING_LENGTHS:
+        form = _FORM_SPELLINGS.get(key[:length])
+        if form is not None:
+            return form, "prefix", key[length:]
+    for length in _SPELLING_LENGTHS:
+        form = _FORM_SPELLINGS.get(key[-length:])
+        if form is not None:
+            return form, "suffix", key[:-length]
+    return None, None, key
+
+
+# 法人格 -> 番号（0は法人格なし）
+LEGAL_FORM_IDS: dict[str, int] = {form: form_id for form_id, form in enumerate(LEGAL_FORMS, start=1)}
+
+
+def legal_form_code(form: str | None, position: str | None) -> int:
+    """
+    split_legal_formで切り離した法人格とその位置を1つの整数にする
+
+    法人格の番号×2に、後ろに付く場合は1を足した値です（法人格がない場合は0）。
+    法人格が同じかどうかは code >> 1 の比較、位置まで同じかどうかは code の比較だけで判定できます。
+    """
+    if form is None:
+        return 0
+    return LEGAL_FORM_IDS[form] << 1 | (position == "suffix")
+
+
+def _raw_spellings() -> dict[str, str]:
+    spellings: dict[str, str] = {}
+    for spelling, form in _FORM_SPELLINGS.items():
+        for variant in (spelling, spelling.upper()):
+            spellings[variant] = form
+            spellings[jaconv.h2z(variant, kana=False, ascii=True, digit=True)] = form
+    # 「㈱」のように1文字で法人格の略記を表す文字
+    for code in range(0x3200, 0x3400):
+        form = _FORM_SPELLINGS.get(normalize_name(chr(code)))
+        if form is not None:
+            spellings[chr(code)] = form
+    return spellings
+
+
+# 正規化前の表記 -> 法人格（全角英字・全角括弧や「㈱」のような1文字の略記を含む）
+RAW_LEGAL_FORM_SPELLINGS: dict[str, str] = _raw_spellings()
+_RAW_SPELLING_LENGTHS: tuple[int, ...] = tuple(
+    sorted({len(spelling) for spelling in RAW_LEGAL_FORM_SPELLINGS}, reverse=True)
+)
+_SPACES = frozenset(" 　")
+
+
+def split_raw_legal_form(name: str) -> tuple[str, str | None, str]:
+    """
+    正規化前の顧問先名から、法人格の表記を間の空白ごと切り離す
+
+    split_legal_formと同じく先頭（前株）を優先して長い表記から照合します。
+    切り離した表記と名称をつなげると、元の顧問先名に戻ります。
+
+    Args:
+        name: 顧問先名
+
+    Returns:
+        tuple: (法人格の表記（間の空白を含む）, 位置 "prefix"/"suffix", 法人格を除いた名称)。
+            法人格がない場合は ("", None, name)
+    """
+    for length in _RAW_SPELLING_LENGTHS:
+        if name[:length] in RAW_LEGAL_FORM_SPELLINGS:
+            end = length
+            while end < len(name) and name[end] in _SPACES:
+                end += 1
+            return name[:end], "prefix", name[end:]
+    for length in _RAW_SPELLING_LENGTHS:
+        if len(name) > length and name[-length:] in RAW_LEGAL_FORM_SPELLINGS:
+            start = len(name) - length
+            while start > 0 and name[start - 1] in _SPACES:
+                start -= 1
+            return name[start:], "suffix", name[:start]
+    return "", None, name
@@ -0,0 +1,200 @@
+"""完全一致の存在確認に使う最小完全ハッシュ
+
+重複を除いたn件の顧問先名を 0..n-1 の位置に衝突なく対応させるハッシュ関数を、
+スナップショットの作成時に構築します（BBHashと同じ方式）。各段では残ったキーを
+γ×件数のビット配列に振り分け、1件だけが落ちたビットを立てます。衝突したキーは次の段に回し、
+キーの位置は立ったビットの順位（そのビットより前に立っているビット数）です。
+
+位置ごとにキーの指紋（8ビット）と顧問先名の文字列表での番号だけを持つため、顧問先名の
+文字列を重ねて持たず、1キーあたり数バイトで済みます。検索はキーのハッシュを1回求め、
+指紋が一致した場合だけ登録名と1回比較します。
+"""
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterator, Sequence
+
+from .hashing import key_hashes
+
+# ビット配列の大きさ（残ったキー数に対する倍率）。大きいほど衝突が減り、検索で見る段が減る
+DEFAULT_GAMMA = 2.0
+# 段数の上限（通常は20段ほどで全てのキーの位置が決まる）
+MAX_LEVELS = 64
+
+_GOLDEN = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+# 構築結果の配列とその型
+PERFECT_HASH_ARRAYS = {
+    "levels": "Q",  # 各段のビット配列の開始位置（ビット単位。末尾に全体のビット数）
+    "bits": "Q",  # 全段のビット配列
+    "ranks": "I",  # 各64ビットより前に立っているビット数
+    "fingerprints": "B",  # 位置ごとのキーの指紋
+    "slots": "I",  # 位置ごとのキーの最初のレコード番号
+    "duplicate_keys": "I",  # 重複登録されたキーの最初のレコード番号（昇順）
+    "duplicate_ids": "I",  # duplicate_keysに対応する2件目以降のレコード番号
+}
+
+
+def _mix(value: int) -> int:
+    # splitmix64の仕上げ処理。段ごとに独立したハッシュ値を作る
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+def _level_hash(h1: int, h2: int, level: int) -> int:
+    return _mix(h1 ^ ((h2 + level * _GOLDEN) & _MASK64))
+
+
+def _fingerprint(h1: int) -> int:
+    return h1 >> 56
+
+
+def build_perfect_hash(keys: Sequence[str], gamma: float = DEFAULT_GAMMA) -> dict[str, array]:
+    """
+    キーの最小完全ハッシュを構築する
+
+    Args:
+        keys: レコード番号順のキー（重複を含んでよい）
+        gamma: 各段のビット配列の大きさ（残ったキー数に対する倍率）
+
+    Returns:
+        dict: PERFECT_HASH_ARRAYSの名前 -> 配列
+    """
+    first_ids: dict[str, int] = {}
+    duplicates: list[tuple[int, int]] = []
+    for record_id, key in enumerate(keys):
+        first = first_ids.setdefault(key, record_id)
+        if first != record_id:
+            duplicates.append((first, record_id))
+
+    unique_ids = array("I", first_ids.values())
+    del first_ids
+    hashes = [key_hashes(keys[record_id]) for record_id in unique_ids]
+    fingerprints = array("B", (_fingerprint(h1) for h1, _ in hashes))
+
+    # 段ごとに、1件だけが落ちたビットを立てて位置を確定させる
+    levels = array("Q", [0])
+    words = array("Q")
+    placed = array("Q", bytes(8 * len(hashes)))  # キー -> 立てたビットの位置
+    remaining = range(len(hashes))
+    for level in range(MAX_LEVELS):
+        if not remaining:
+            break
+        size = max(64, -(-int(len(remaining) * gamma) // 64) * 64)
+        positions = [_level_hash(*hashes[key], level) % size for key in remaining]
+        seen = bytearray(size)
+        for position in positions:
+            seen[position] += seen[position] < 2
+
+        start = levels[-1]
+        words.frombytes(bytes(size // 8))
+        collided = []
+        for key, position in zip(remaining, positions):
+            if seen[position] == 1:
+                bit = start + position
+                words[bit >> 6] |= 1 << (bit & 63)
+                placed[key] = bit
+            else:
+                collided.append(key)
+        levels.append(start + size)
+        remaining = collided
+    else:
+        if remaining:
+            raise ValueError(f"最小完全ハッシュを構築できません（{len(remaining)}件のキーの位置が決まりません）")
+
+    ranks = array("I")
+    count = 0
+    for word in words:
+        ranks.append(count)
+        count += word.bit_count()
+
+    slots = array("I", bytes(4 * len(hashes)))
+    slot_fingerprints = array("B", bytes(len(hashes)))
+    for key, bit in enumerate(placed):
+        word = words[bit >> 6]
+        slot = ranks[bit >> 6] + (word & ((1 << (bit & 63)) - 1)).bit_count()
+        slots[slot] = unique_ids[key]
+        slot_fingerprints[slot] = fingerprints[key]
+
+    duplicates.sort()
+    return {
+        "levels": levels,
+        "bits": words,
+        "ranks": ranks,
+        "fingerprints": slot_fingerprints,
+        "slots": slots,
+        "duplicate_keys": array("I", (first for first, _ in duplicates)),
+        "duplicate_ids": array("I", (record_id for _, record_id in duplicates)),
+    }
+
+
+class PerfectHashTable:
+    """
+    最小完全ハッシュによるキー -> レコード番号の対応表
+
+    KeyMapと同じインターフェースで、キーに対応するレコード番号を全て返します。
+    登録されていないキーは、大半が指紋の比較だけで確定します。
+
+    Args:
+        arrays: build_perfect_hashで作った配列（スナップショットのmemoryviewでもよい）
+        table: レコード番号順のキー（顧問先名の文字列表）
+    """
+
+    def __init__(self, arrays: dict[str, Sequence[int]], table: Sequence[str]):
+        self._levels = arrays["levels"]
+        self._bits = arrays["bits"]
+        self._ranks = arrays["ranks"]
+        self._fingerprints = arrays["fingerprints"]
+        self._slots = arrays["slots"]
+        self._duplicate_keys = arrays["duplicate_keys"]
+        self._duplicate_ids = arrays["duplicate_ids"]
+        self._table = table
+        self._nbytes = sum(memoryview(values).nbytes for values in arrays.values())
+
+    @classmethod
+    def build(cls, keys: Sequence[str], gamma: float = DEFAULT_GAMMA) -> "PerfectHashTable":
+        """キーからメモリ上に構築する"""
+        return cls(build_perfect_hash(keys, gamma), keys)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and bool(self.get(key))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(dict.fromkeys(self._table))
+
+    @property
+    def nbytes(self) -> int:
+        """ハッシュ関数・指紋・レコード番号の配列のバイト数（キーの文字列表を含まない）"""
+        return self._nbytes
+
+    def get(self, key: str) -> list[int]:
+        h1, h2 = key_hashes(key)
+        levels = self._levels
+        for level in range(len(levels) - 1):
+            start = levels[level]
+            bit = start + _level_hash(h1, h2, level) % (levels[level + 1] - start)
+            word = self._bits[bit >> 6]
+            mask = 1 << (bit & 63)
+            if word & mask:
+                break
+        else:
+            return []
+
+        slot = self._ranks[bit >> 6] + (word & (mask - 1)).bit_count()
+        if self._fingerprints[slot] != _fingerprint(h1):
+            return []
+        first = self._slots[slot]
+        if self._table[first] != key:
+            return []
+
+        record_ids = [first]
+        position = bisect_left(self._duplicate_keys, first)
+        while position < len(self._duplicate_keys) and self._duplicate_keys[position] == first:
+            record_ids.append(self._duplicate_ids[position])
+            position += 1
+        return record_ids
@@ -0,0 +1,51 @@
+"""前方一致検索用のソート済みキー配列"""
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterator, Sequence
+
+
+class SortedKeyArray:
+    """
+    キーを辞書順に並べた番号の配列
+
+    キー文字列そのものは元のリストと共有し、並び順だけを整数配列で持ちます。
+    前方一致する範囲は二分探索で先頭を求め、そこから順に読むだけで取り出せます。
+
+    Args:
+        keys: 番号順のキー
+    """
+
+    def __init__(self, keys: Sequence[str]):
+        self._keys = keys
+        self._order = array("I", sorted(range(len(keys)), key=keys.__getitem__))
+
+    @classmethod
+    def from_order(cls, keys: Sequence[str], order: Sequence[int]) -> "SortedKeyArray":
+        """構築済みの並び順を参照する配列を作る"""
+        sorted_keys = cls.__new__(cls)
+        sorted_keys._keys = keys
+        sorted_keys._order = order
+        return sorted_keys
+
+    @property
+    def order(self) -> Sequence[int]:
+        """辞書順に並べたキーの番号"""
+        return self._order
+
+    def iter_prefix(self, prefix: str) -> Iterator[int]:
+        """
+        prefixで始まるキーの番号を辞書順に返す
+
+        Args:
+            prefix: 前方一致させる文字列
+
+        Yields:
+            int: キーの番号
+        """
+        keys, order = self._keys, self._order
+        for position in range(bisect_left(order, prefix, key=keys.__getitem__), len(order)):
+            key_id = order[position]
+            if not keys[key_id].startswith(prefix):
+                return
+            yield key_id
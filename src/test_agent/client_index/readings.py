@@ -0,0 +1,187 @@
+"""顧問先名の読み（ひらがな・ローマ字）の事前計算
+
+pykakasiによる変換は1件ごとに時間がかかるため、インデックス構築時に全件をまとめて変換し、
+ファイル（またはスナップショット）に保存しておきます。検索時は保存済みの表を読み込み、
+クエリを正規化するだけで、pykakasiは呼び出しません。
+"""
+
+import hashlib
+import json
+import logging
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+import jaconv
+
+from .normalize import LEGAL_FORMS, normalize_name, split_legal_form
+
+# 保存形式のバージョン（読みキーの作り方を変えたら上げる）
+READINGS_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+_LONG_VOWELS = re.compile(r"ou|oo|uu")
+
+
+@dataclass
+class ReadingTable:
+    """
+    顧問先ごとの読みキー
+
+    Attributes:
+        digest: 元になった顧問先リストのハッシュ（リストが変わったら作り直す）
+        readings: レコード番号順の (ひらがなキー, ローマ字キー)。法人格を除いた名称の読み
+        legal_forms: 法人格の読みキー -> 法人格
+    """
+
+    digest: str
+    readings: list[tuple[str, str]]
+    legal_forms: dict[str, str]
+
+
+def names_digest(names: Sequence[str]) -> str:
+    """顧問先リストの内容からハッシュを計算する"""
+    digest = hashlib.sha256()
+    for name in names:
+        digest.update(name.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def hiragana_key(text: str) -> str:
+    """読みをひらがなの検索キーにする（カタカナはひらがなに寄せ、記号は除く）"""
+    return "".join(ch for ch in jaconv.kata2hira(text) if ch.isalnum())
+
+
+def romaji_key(text: str) -> str:
+    """読みをローマ字の検索キーにする（長音の綴りの違い shou/sho などは同一視する）"""
+    key = "".join(ch for ch in text.lower() if ch.isascii() and ch.isalnum())
+    return _LONG_VOWELS.sub(lambda m: m.group(0)[0], key)
+
+
+def query_reading_key(query: str) -> str:
+    """
+    検索クエリを読みキーにする
+
+    英数字だけのクエリはローマ字、それ以外はひらがなとして扱います。
+    """
+    return normalized_reading_key(normalize_name(query))
+
+
+def normalized_reading_key(key: str) -> str:
+    """normalize_nameで正規化済みのクエリを読みキーにする"""
+    if key.isascii():
+        return romaji_key(key)
+    return hiragana_key(key)
+
+
+def build_readings(names: Sequence[str]) -> ReadingTable:
+    """
+    全ての顧問先名の読みをまとめて計算する
+
+    同じ名称（法人格を除いたもの）は一度だけ変換します。
+
+    Args:
+        names: 顧問先名のリスト
+
+    Returns:
+        ReadingTable: 読みキーの表
+    """
+    import pykakasi
+
+    kakasi = pykakasi.kakasi()
+
+    def convert(text: str) -> tuple[str, str]:
+        tokens = kakasi.convert(text)
+        return (
+            hiragana_key("".join(token["hira"] for token in tokens)),
+            romaji_key("".join(token["hepburn"] for token in tokens)),
+        )
+
+    cache: dict[str, tuple[str, str]] = {}
+    readings = []
+    for name in names:
+        _, _, core = split_legal_form(normalize_name(name))
+        reading = cache.get(core)
+        if reading is None:
+            reading = cache[core] = convert(core)
+        readings.append(reading)
+
+    legal_forms: dict[str, str] = {}
+    for form in LEGAL_FORMS:
+        for key in convert(form):
+            legal_forms[key] = form
+            # 「会社」は「かいしゃ」「がいしゃ」のどちらでも入力される
+            legal_forms[key.replace("がいしゃ", "かいしゃ").replace("gaisha", "kaisha")] = form
+
+    return ReadingTable(digest=names_digest(names), readings=readings, legal_forms=legal_forms)
+
+
+def readings_path(path: Path) -> Path:
+    """顧問先レジストリ（または顧問先リスト）に対応する読みキーのファイルを返す"""
+    return path.with_suffix(".readings.json")
+
+
+def save_readings(path: Path, table: ReadingTable) -> None:
+    """
+    読みキーの表をJSONファイルに保存する
+
+    書き込み途中のファイルを検索側が読み込まないよう、一時ファイルに書いてから置き換えます。
+
+    Raises:
+        OSError: 書き込みに失敗した場合（一時ファイルは削除する）
+    """
+    payload = {
+        "version": READINGS_VERSION,
+        "digest": table.digest,
+        "legal_forms": table.legal_forms,
+        "readings": table.readings,
+    }
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def load_readings(path: Path, names: Sequence[str]) -> ReadingTable | None:
+    """
+    保存済みの読みキーの表を読み込む
+
+    検索側から呼ばれるため、読みの変換やファイルの書き込みは行いません。使える表がなければ
+    警告を記録してNoneを返し、呼び出し側は読みによる検索を行わないインデックスを作ります。
+    読みキーはbuild_index.py --format readings またはingest_houjin.pyで作成します。
+
+    Args:
+        path: 読みキーのJSONファイル
+        names: 顧問先名のリスト
+
+    Returns:
+        ReadingTable | None: ファイルがない・読めない、または顧問先リストと一致しない場合はNone
+    """
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        logger.warning("読みキーのファイルがないため、読みによる検索を行いません: %s", path)
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("読みキーのファイルを読み込めないため、読みによる検索を行いません: %s (%s)", path, e)
+        return None
+
+    if (
+        not isinstance(payload, dict)
+        or payload.get("version") != READINGS_VERSION
+        or payload.get("digest") != names_digest(names)
+    ):
+        logger.warning("読みキーのファイルが顧問先リストと一致しないため、読みによる検索を行いません: %s", path)
+        return None
+
+    return ReadingTable(
+        digest=payload["digest"],
+        readings=[(hira, romaji) for hira, romaji in payload["readings"]],
+        legal_forms=payload["legal_forms"],
+    )
@@ -0,0 +1,238 @@
+"""顧問先レコードの列指向ストア
+
+顧問先名・法人番号・法人種別・所在地を、レコードごとのオブジェクトではなく列ごとの配列で
+保持します。顧問先名は法人格を辞書化して前方圧縮した文字列表、法人番号と法人種別は
+整数の配列、所在地は連結した文字列表にするため、
+100万件規模でもdictやNamedTupleのリストに比べて数分の1のメモリで済みます。
+"""
+
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+
+from .houjin import KIND_NAMES
+from .normalize import split_raw_legal_form
+from .registry import ClientRecord
+from .strings import FrontCodedStringTable, StringTable
+
+# 都道府県（JIS X 0401のコード順）
+PREFECTURES = (
+    "北海道", "青森県", "岩手県", "宮城県", "秋田県", "山形県", "福島県",
+    "茨城県", "栃木県", "群馬県", "埼玉県", "千葉県", "東京都", "神奈川県",
+    "新潟県", "富山県", "石川県", "福井県", "山梨県", "長野県", "岐阜県",
+    "静岡県", "愛知県", "三重県", "滋賀県", "京都府", "大阪府", "兵庫県",
+    "奈良県", "和歌山県", "鳥取県", "島根県", "岡山県", "広島県", "山口県",
+    "徳島県", "香川県", "愛媛県", "高知県", "福岡県", "佐賀県", "長崎県",
+    "熊本県", "大分県", "宮崎県", "鹿児島県", "沖縄県",
+)  # fmt: skip
+
+_PREFECTURE_SET = frozenset(PREFECTURES)
+
+
+def prefecture_of(address: str) -> str:
+    """所在地の先頭から都道府県を取り出す（判定できない場合は空文字）"""
+    # 都道府県名は3文字か4文字（神奈川県・和歌山県・鹿児島県）
+    for length in (3, 4):
+        if address[:length] in _PREFECTURE_SET:
+            return address[:length]
+    return ""
+
+
+def encode_corporate_number(corporate_number: str) -> int:
+    """法人番号を整数にする（不明・不正な場合は0）"""
+    if len(corporate_number) == 13 and corporate_number.isdigit() and corporate_number.isascii():
+        return int(corporate_number)
+    return 0
+
+
+def encode_kind(kind: str) -> int:
+    """法人種別コードを整数にする（不明な場合は0）"""
+    return int(kind) if kind.isdigit() and kind.isascii() else 0
+
+
+def encode_legal_forms(names: Iterable[str]) -> tuple[list[str], array, list[str]]:
+    """
+    顧問先名を法人格の表記の番号と法人格を除いた名称に分ける
+
+    Returns:
+        tuple: (法人格の表記の表, レコードごとの 表記の番号×2 + 後ろに付く場合は1, 法人格を除いた名称)
+    """
+    affix_ids: dict[str, int] = {"": 0}
+    codes = array("H")
+    cores: list[str] = []
+    for name in names:
+        affix, position, core = split_raw_legal_form(name)
+        affix_id = affix_ids.setdefault(affix, len(affix_ids))
+        codes.append(affix_id << 1 | (position == "suffix"))
+        cores.append(core)
+    return list(affix_ids), codes, cores
+
+
+class LegalFormNameTable(Sequence[str]):
+    """
+    法人格を辞書化した顧問先名の列
+
+    顧問先名の大半は数十種類の法人格のどれかで始まるか終わるため、顧問先名を
+    (法人格の表記の番号, 位置, 法人格を除いた名称) に分けて持ちます。法人格の表記は小さな表に
+    1回だけ持ち、法人格を除いた名称は前方圧縮した文字列表にします。参照すると元の顧問先名を
+    組み立てて返すため、呼び出し側からは顧問先名のリストと同じに見えます。
+
+    Args:
+        affixes: 法人格の表記（間の空白を含む）の表。0番は法人格なし（空文字）
+        codes: レコードごとの 表記の番号×2 + 後ろに付く場合は1
+        cores: レコードごとの法人格を除いた名称
+    """
+
+    def __init__(self, affixes: Sequence[str], codes: Sequence[int], cores: FrontCodedStringTable):
+        self.affixes = list(affixes)
+        self._affix_ids = {affix: affix_id for affix_id, affix in enumerate(self.affixes)}
+        self._codes = codes
+        self._cores = cores
+
+    @classmethod
+    def from_names(cls, names: Iterable[str]) -> "LegalFormNameTable":
+        """顧問先名から法人格を切り離して表を作る"""
+        affixes, codes, cores = encode_legal_forms(names)
+        return cls(affixes, codes, FrontCodedStringTable.from_strings(cores))
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __getitem__(self, record_id):  # type: ignore[override]
+        if isinstance(record_id, slice):
+            return [self[i] for i in range(*record_id.indices(len(self)))]
+        return self._join(self._codes[record_id], self._cores[record_id])
+
+    def _join(self, code: int, core: str) -> str:
+        affix = self.affixes[code >> 1]
+        return core + affix if code & 1 else affix + core
+
+    def __iter__(self) -> Iterator[str]:
+        for code, core in zip(self._codes, self._cores):
+            yield self._join(code, core)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and bool(self.get(name))
+
+    @property
+    def nbytes(self) -> int:
+        """表記の番号の配列と法人格を除いた名称の文字列表のバイト数"""
+        return memoryview(self._codes).nbytes + self._cores.nbytes
+
+    def get(self, name: str) -> list[int]:
+        """
+        顧問先名が一致するレコード番号を全て返す
+
+        法人格を除いた名称で文字列表を引き、法人格の表記と位置は整数の比較だけで確かめます。
+
+        Returns:
+            list[int]: レコード番号（昇順）
+        """
+        affix, position, core = split_raw_legal_form(name)
+        affix_id = self._affix_ids.get(affix)
+        if affix_id is None:
+            return []
+        code = affix_id << 1 | (position == "suffix")
+        return [record_id for record_id in self._cores.get(core) if self._codes[record_id] == code]
+
+
+class RecordStore(Sequence[ClientRecord]):
+    """
+    顧問先レコードを列ごとの配列で保持するストア
+
+    レコード番号はClientIndexのレコード番号と同じです。顧問先名だけで作った場合
+    （has_detailsがFalse）は、法人番号・法人種別・所在地は空文字になります。
+
+    Args:
+        names: 顧問先名
+        corporate_numbers: 法人番号の配列（不明な場合は0）
+        kinds: 法人種別コードの配列（不明な場合は0）
+        addresses: 所在地の文字列表
+
+    Attributes:
+        names: 顧問先名
+        corporate_numbers: 法人番号の配列。詳細を持たない場合はNone
+        kinds: 法人種別コードの配列。詳細を持たない場合はNone
+        addresses: 所在地の文字列表。詳細を持たない場合はNone
+    """
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        corporate_numbers: Sequence[int] | None = None,
+        kinds: Sequence[int] | None = None,
+        addresses: Sequence[str] | None = None,
+    ):
+        self.names = names
+        self.corporate_numbers = corporate_numbers
+        self.kinds = kinds
+        self.addresses = addresses
+
+    @classmethod
+    def from_records(cls, records: Iterable[ClientRecord]) -> "RecordStore":
+        """
+        レコードを1件ずつ列に振り分けてストアを作る
+
+        Args:
+            records: 顧問先のレコード（イテレータのまま渡せばレコードのリストを作らない）
+
+        Returns:
+            RecordStore: 全ての列を持つストア（顧問先名は法人格を辞書化した列）
+        """
+        names: list[str] = []
+        corporate_numbers = array("Q")
+        kinds = array("H")
+        addresses: list[str] = []
+        for record in records:
+            names.append(record.name)
+            corporate_numbers.append(encode_corporate_number(record.corporate_number))
+            kinds.append(encode_kind(record.kind))
+            addresses.append(record.address)
+        return cls(
+            LegalFormNameTable.from_names(names),
+            corporate_numbers,
+            kinds,
+            StringTable.from_strings(addresses),
+        )
+
+    @property
+    def has_details(self) -> bool:
+        """法人番号・法人種別・所在地を持つ"""
+        return self.corporate_numbers is not None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, record_id):  # type: ignore[override]
+        if isinstance(record_id, slice):
+            return [self[i] for i in range(*record_id.indices(len(self)))]
+        name = self.names[record_id]
+        if self.corporate_numbers is None or self.kinds is None or self.addresses is None:
+            return ClientRecord(name)
+        corporate_number = self.corporate_numbers[record_id]
+        kind = self.kinds[record_id]
+        return ClientRecord(
+            name=name,
+            corporate_number=f"{corporate_number:013d}" if corporate_number else "",
+            kind=str(kind) if kind else "",
+            address=self.addresses[record_id],
+        )
+
+    def __iter__(self) -> Iterator[ClientRecord]:
+        for record_id in range(len(self)):
+            yield self[record_id]
+
+    def describe(self, record_id: int) -> dict[str, str]:
+        """
+        レコードをツールの応答に含める形にする（空の項目は含めない）
+
+        Args:
+            record_id: レコード番号
+
+        Returns:
+            dict: name・corporate_number・kind・kind_name・address・prefectureのうち値のある項目
+        """
+        record = self[record_id]
+        fields = record._asdict()
+        fields["kind_name"] = KIND_NAMES.get(record.kind, "")
+        fields["prefecture"] = prefecture_of(record.address)
+        return {field: value for field, value in fields.items() if value}
@@ -0,0 +1,71 @@
+"""顧問先レジストリファイル（TSV）の読み書き
+
+法人番号CSVから取り込んだ顧問先を、インデックス構築に使う形式で保存します。
+1行目はヘッダーで、以降は1行1社です。
+"""
+
+import csv
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+REGISTRY_COLUMNS = ("name", "corporate_number", "kind", "address")
+
+
+class ClientRecord(NamedTuple):
+    """
+    顧問先1社分のレコード
+
+    Attributes:
+        name: 商号又は名称
+        corporate_number: 13桁の法人番号（不明な場合は空文字）
+        kind: 法人種別コード（301: 株式会社 など。不明な場合は空文字）
+        address: 所在地（都道府県 + 市区町村 + 丁目番地等）
+    """
+
+    name: str
+    corporate_number: str = ""
+    kind: str = ""
+    address: str = ""
+
+
+def write_registry(path: Path, records: Iterable[ClientRecord]) -> int:
+    """
+    レコードを1件ずつレジストリファイルに書き出す
+
+    Args:
+        path: 出力先のTSVファイル
+        records: 書き出すレコード（イテレータのまま渡せば全件をメモリに載せない）
+
+    Returns:
+        int: 書き出した件数
+    """
+    count = 0
+    with open(path, mode="w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+        writer.writerow(REGISTRY_COLUMNS)
+        for record in records:
+            writer.writerow(record)
+            count += 1
+    return count
+
+
+def iter_registry(path: Path) -> Iterator[ClientRecord]:
+    """
+    レジストリファイルからレコードを1件ずつ読み出す
+
+    Args:
+        path: レジストリのTSVファイル
+
+    Yields:
+        ClientRecord: 顧問先のレコード
+    """
+    with open(path, mode="r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f, delimiter="\t")
+        header = next(reader, None)
+        if header is None:
+            return
+        if tuple(header) != REGISTRY_COLUMNS:
+            raise ValueError(f"レジストリファイルのヘッダーが不正です: {path}")
+        for row in reader:
+            yield ClientRecord(*row)
@@ -0,0 +1,263 @@
+"""インデックスのホットリロード
+
+新しいインデックスを裏で構築し、完成してから参照を1回の代入で差し替えます（RCU）。
+検索側は現在の参照を取得するときに使用中の数を数えるだけなので、リロード中も待たされず、
+構築途中のインデックスを見ることもありません。差し替え前の参照を取得した検索は、
+古いインデックスのまま最後まで実行され、古いインデックスの後始末（シャードのワーカープロセスの
+終了など）は、それを使用中の検索が全て終わってから行います。
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import BrokenExecutor
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# リロードの失敗として記録し、元のインデックスを使い続ける例外（ファイルの欠落・置き換え途中・破損、
+# 形式や版の不一致、データベースのエラー、シャードのワーカープロセスの異常終了）。
+# それ以外の例外はプログラムの誤りとしてそのまま送出する
+RELOAD_ERRORS = (OSError, ValueError, LookupError, sqlite3.Error, BrokenExecutor)
+
+
+class IndexStatus(NamedTuple):
+    """
+    読み込み済みインデックスの状態
+
+    Attributes:
+        version: 読み込むたびに1ずつ増える版数（最初の読み込みが1）
+        loaded_at: 読み込みが完了した日時（ISO形式）
+        load_seconds: 読み込み（構築）にかかった秒数
+        last_error: 直近のリロードが失敗した場合のエラー（成功した場合はNone）
+    """
+
+    version: int
+    loaded_at: str
+    load_seconds: float
+    last_error: str | None = None
+
+
+class IndexLeases[T]:
+    """
+    インデックスごとに使用中の検索の数を数え、不要になったインデックスの後始末を最後の検索が終わるまで遅らせる
+
+    addは、そのインデックスのretireより前に呼ばれるようにしてください（インデックスの取得とaddを、
+    差し替え・破棄と同じロックの中で行う）。retireしたインデックスは新たに取得されないため、
+    使用中の数が0になった時点で後始末できます。
+
+    Args:
+        retire: 不要になったインデックスの後始末（Noneなら何もしない）
+    """
+
+    def __init__(self, retire: Callable[[T], None] | None = None):
+        self._retire = retire
+        self._lock = threading.Lock()
+        # id(インデックス) -> 使用中の検索の数（使用中のものだけ）
+        self._users: dict[int, int] = {}
+        # 使用中のまま不要になり、後始末を待っているインデックス
+        self._retired: dict[int, T] = {}
+
+    def add(self, index: T) -> None:
+        """インデックスを使用中にする（検索が終わったらreleaseを呼ぶ）"""
+        with self._lock:
+            self._users[id(index)] = self._users.get(id(index), 0) + 1
+
+    def release(self, index: T) -> None:
+        """インデックスの使用を終える（不要になったインデックスの最後の検索なら後始末する）"""
+        with self._lock:
+            key = id(index)
+            self._users[key] -= 1
+            if self._users[key]:
+                return
+            del self._users[key]
+            if self._retired.pop(key, None) is None:
+                return
+        self._run(index)
+
+    def retire(self, index: T) -> None:
+        """不要になったインデックスを後始末する（使用中なら、最後の検索が終わったときに行う）"""
+        with self._lock:
+            if id(index) in self._users:
+                self._retired[id(index)] = index
+                return
+        self._run(index)
+
+    def users(self, index: T) -> int:
+        """インデックスを使用中の検索の数"""
+        with self._lock:
+            return self._users.get(id(index), 0)
+
+    def _run(self, index: T) -> None:
+        if self._retire is not None:
+            self._retire(index)
+
+
+class IndexReloader[T]:
+    """
+    インデックスを保持し、リロードで差し替える
+
+    リロード同士はロックで直列化しますが、検索側（acquire）は参照の取得と使用中の数の加算の間だけ
+    短いロックを取り、リロードの完了は待ちません。リロードに失敗した場合は、元のインデックスを使い続けます。
+
+    Args:
+        loader: インデックスを構築する関数
+        prepare: 読み込んだインデックスを使い始める前に行う準備（遅延構築する索引の構築など）。
+            最初の読み込みでも行い、最初の検索が遅延構築を待たないようにする
+        retire: 差し替えた古いインデックス（または準備に失敗した新しいインデックス）の後始末
+            （シャードのワーカープロセスの終了など）。acquireで使用中の検索があれば、全て終わってから行う
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], T],
+        prepare: Callable[[T], None] | None = None,
+        retire: Callable[[T], None] | None = None,
+    ):
+        self._loader = loader
+        self._prepare = prepare
+        self._leases: IndexLeases[T] = IndexLeases(retire)
+        self._lock = threading.Lock()
+        # 現在のインデックスの取得と差し替えを直列化する（取得した検索が後始末より先に数えられるようにする）
+        self._swap_lock = threading.Lock()
+        self._watcher: threading.Thread | None = None
+        index, seconds = self._load()
+        # インデックスと状態は1つのタプルとして差し替え、組み合わせがずれないようにする
+        self._current: tuple[T, IndexStatus] = (index, IndexStatus(1, _now(), seconds))
+
+    def _load(self) -> tuple[T, float]:
+        start = time.perf_counter()
+        index = self._loader()
+        # 使い始めた直後の検索が遅延構築を待たないよう、公開する前に済ませておく
+        if self._prepare is not None:
+            try:
+                self._prepare(index)
+            except BaseException:
+                self._leases.retire(index)
+                raise
+        return index, time.perf_counter() - start
+
+    @property
+    def current(self) -> tuple[T, IndexStatus]:
+        """現在のインデックスとその状態の組"""
+        return self._current
+
+    @property
+    def index(self) -> T:
+        """
+        現在のインデックス（使用中として数えないため、差し替えたあとに後始末されることがある。
+        後始末が必要なインデックスを検索に使う場合はacquireを使うこと）
+        """
+        return self._current[0]
+
+    @contextmanager
+    def acquire(self) -> Iterator[T]:
+        """
+        現在のインデックスを使用中として取得する
+
+        withを抜けるまでは、リロードで差し替えられても後始末されません。1回の検索の間は、
+        取得した参照を使い続けてください。
+
+        Yields:
+            T: 現在のインデックス
+        """
+        with self._swap_lock:
+            index = self._current[0]
+            self._leases.add(index)
+        try:
+            yield index
+        finally:
+            self._leases.release(index)
+
+    @property
+    def status(self) -> IndexStatus:
+        """現在のインデックスの状態"""
+        return self._current[1]
+
+    def reload(self) -> IndexStatus:
+        """
+        インデックスを構築し直して差し替える（構築が終わるまで呼び出し元に戻らない）
+
+        Returns:
+            IndexStatus: リロード後の状態（RELOAD_ERRORSで失敗した場合はlast_errorを設定した元の状態）
+        """
+        with self._lock:
+            try:
+                index, seconds = self._load()
+            except RELOAD_ERRORS as e:
+                index, status = self._current
+                self._current = (index, status._replace(last_error=f"{type(e).__name__}: {e}"))
+                return self._current[1]
+
+            with self._swap_lock:
+                previous, _ = self._current
+                status = IndexStatus(self._current[1].version + 1, _now(), seconds)
+                self._current = (index, status)
+            # 差し替え前に取得した検索が終わるまで、古いインデックスは後始末しない
+            if previous is not index:
+                self._leases.retire(previous)
+            return status
+
+    def reload_in_background(self) -> threading.Thread:
+        """
+        別スレッドでリロードする
+
+        Returns:
+            threading.Thread: リロードを実行しているスレッド
+        """
+        thread = threading.Thread(target=self.reload, name="client-index-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def watch(self, paths: Iterable[Path], interval: float) -> None:
+        """
+        ファイルの更新を定期的に確認し、更新されていればリロードする
+
+        スナップショット・レジストリ・差分ファイルを置き換えるだけで、再起動せずに反映されます。
+        置き換えの途中やネットワークファイルシステムの一時的なエラーで更新日時を確認できない場合は、
+        次の間隔で確認し直します。リロードが想定外の例外で失敗した場合もログに記録して監視を続け、
+        次にファイルが更新されたときにリロードし直します。
+
+        Args:
+            paths: 監視するファイル
+            interval: 確認の間隔（秒）
+        """
+        if self._watcher is not None:
+            return
+        paths = list(paths)
+
+        def mtime(path: Path) -> float | None:
+            try:
+                return path.stat().st_mtime
+            except FileNotFoundError:
+                return None
+
+        def run() -> None:
+            last: list[float | None] | None = None
+            while True:
+                try:
+                    current = [mtime(path) for path in paths]
+                except OSError:
+                    current = None
+                if current is not None:
+                    changed = last is not None and current != last
+                    last = current
+                    if changed:
+                        # 監視のスレッドが終了すると以後の更新が反映されないため、どの例外でも監視を続ける
+                        try:
+                            self.reload()
+                        except Exception:
+                            logger.exception("インデックスのリロードに失敗しました: %s", ", ".join(map(str, paths)))
+                time.sleep(interval)
+
+        self._watcher = threading.Thread(target=run, name="client-index-watch", daemon=True)
+        self._watcher.start()
+
+
+def _now() -> str:
+    return datetime.now(UTC).astimezone().isoformat(timespec="seconds")
@@ -0,0 +1,307 @@
+"""部分一致・あいまい検索をプロセスプールのシャードに分散するインデックス
+
+完全一致〜読みの一致はハッシュを引くだけで済みますが、部分一致（トライグラムの積集合と
+部分文字列の確認）とあいまい検索（削除辞書と編集距離）は件数に比例して重くなり、
+GILがあるため1プロセスでは1コアしか使えません。
+
+レコードを法人格を除いた名称のハッシュでN個のシャードに分け、シャードごとのワーカープロセスが
+その部分だけのインデックスを持ちます。重い段階のクエリは全シャードに同時に投げ（scatter）、
+各シャードの上位を集めてClientIndexと同じ基準で選び直します（gather）。
+同じ名称のレコードは同じシャードに入るため、あいまい検索の結果も1つのシャードで確定します。
+"""
+
+import heapq
+import threading
+import weakref
+from array import array
+from bisect import bisect_left
+from collections.abc import Callable, Collection, Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from itertools import chain
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from .hashing import key_hashes
+from .index import ClientIndex, LookupResult
+from .normalize import normalize_name, split_legal_form
+from .records import RecordStore
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+T = TypeVar("T")
+
+# ベースのインデックスで引く段階（lookupの順。これより後の段階をシャードに分散する）
+BASE_STAGES = ("exact", "normalized", "core_name", "reading")
+
+# ベースで事前に構築する索引（部分一致・あいまい検索の索引はシャードが持つため構築しない）
+_BASE_LAZY_INDEXES = ("_corporate", "_core", "_legal_forms", "_cores", "_reading", "_sorted_keys", "_sorted_cores")
+
+# シャードが持つ索引（メモリ上のベースで構築済みなら、シャードに分けたあとは捨てる）
+_SHARDED_INDEXES = ("_trigrams", "_fuzzy")
+
+
+def shard_of(key: str, shards: int) -> int:
+    """
+    正規化キーのレコードを入れるシャードの番号を返す
+
+    法人格を除いた名称でハッシュを取るため、法人格の有無や前株/後株だけが違うレコードは
+    同じシャードに入ります。プロセスをまたいで同じ値になるよう、strのhash()は使いません。
+
+    Args:
+        key: 正規化キー
+        shards: シャード数
+
+    Returns:
+        int: 0..shards-1 のシャード番号
+    """
+    _, _, core = split_legal_form(key)
+    return key_hashes(core or key)[0] % shards
+
+
+# ワーカープロセスが持つシャードのインデックスと、ローカルのレコード番号 -> 全体のレコード番号
+_shard: ClientIndex | None = None
+_shard_ids: array = array("I")
+
+
+def _load_shard(names: list[str], record_ids: array, fuzzy_max_distance: int) -> None:
+    global _shard, _shard_ids
+    _shard = ClientIndex(RecordStore(names), fuzzy_max_distance=fuzzy_max_distance)
+    _shard_ids = record_ids
+
+
+def _warm_up_shard() -> int:
+    assert _shard is not None
+    for stage in _SHARDED_INDEXES:
+        getattr(_shard, stage)
+    return len(_shard)
+
+
+def _local_ids(record_ids: Iterable[int]) -> set[int]:
+    """全体のレコード番号のうち、このシャードにあるもののローカルの番号"""
+    local_ids = set()
+    for record_id in record_ids:
+        position = bisect_left(_shard_ids, record_id)
+        if position < len(_shard_ids) and _shard_ids[position] == record_id:
+            local_ids.add(position)
+    return local_ids
+
+
+# シャードの検索結果: (部分一致の総件数, 部分一致の上位, あいまい検索の結果)。
+# 上位は (並び順のキー, 全体のレコード番号)、あいまい検索は法人格を除いた名称ごとの
+# (並び順のキー, 全体のレコード番号のリスト)。あいまい検索は部分一致しなかった場合だけ行い、それ以外はNone
+ShardResult = tuple[int, list[tuple[tuple, int]], list[tuple[tuple, list[int]]] | None]
+
+
+def _search_shard(key: str, limit: int, exclude: Sequence[int]) -> ShardResult:
+    """
+    シャード内で部分一致を検索し、一致しなければあいまい検索も行う
+
+    あいまい検索に進むクエリでも、プロセス間の往復が1回で済むようにします。
+    """
+    assert _shard is not None
+    excluded = _local_ids(exclude)
+    total, local_ids = _shard._find_partial(key, limit, excluded)
+    keys = _shard.keys
+    top = [((not keys[i].startswith(key), len(keys[i]), _shard_ids[i]), _shard_ids[i]) for i in local_ids]
+    return total, top, None if total else _fuzzy_matches(key, excluded)
+
+
+def _search_fuzzy(key: str, exclude: Sequence[int]) -> list[tuple[tuple, list[int]]]:
+    assert _shard is not None
+    return _fuzzy_matches(key, _local_ids(exclude))
+
+
+def _fuzzy_matches(key: str, excluded: set[int]) -> list[tuple[tuple, list[int]]]:
+    assert _shard is not None
+    _, _, query = split_legal_form(key)
+    matches = []
+    for distance, key_id in _shard._fuzzy_matches(key):
+        core = _shard._cores[key_id]
+        local_ids = _shard._core.get(core)
+        record_ids = [_shard_ids[i] for i in local_ids if i not in excluded]
+        if record_ids:
+            # ClientIndexの_coresは最初のレコードの順に並ぶため、その全体の番号で順序を決める
+            matches.append(((distance, abs(len(core) - len(query)), _shard_ids[local_ids[0]]), record_ids))
+    return matches
+
+
+class ShardedIndex:
+    """
+    部分一致・あいまい検索をシャードのワーカープロセスに分散するインデックス
+
+    ClientIndexと同じ検索メソッドを持ち、ツールからはそのまま置き換えて使えます。
+    完全一致〜読みの一致・法人番号・入力補完はベースのインデックスを引き、部分一致・あいまい検索だけを
+    シャードに投げます。検索結果と並び順はベースだけで検索した場合と同じです。
+    シャードの構築は作成時にワーカープロセスで始まり、warm_upで完了を待てます。
+
+    親プロセスのベースはシャードに分けない段階の索引だけを持ちます。シャードに渡したレコードは
+    ワーカーに送り終えたら手放し、メモリ上のベースで構築済みの部分一致・あいまい検索の索引も捨てます。
+
+    Args:
+        base: 全件のインデックス（スナップショットでもよい）
+        shards: シャード数（ワーカープロセス数。CPUコア数以下にする）
+    """
+
+    def __init__(self, base: ClientIndex, shards: int):
+        if shards < 1:
+            raise ValueError(f"シャード数は1以上にしてください: {shards}")
+        self.base = base
+        self.records = base.records
+        self.names = base.names
+        self.keys = base.keys
+
+        partitions: list[tuple[list[str], array]] = [([], array("I")) for _ in range(shards)]
+        for record_id, key in enumerate(self.keys):
+            names, record_ids = partitions[shard_of(key, shards)]
+            names.append(self.names[record_id])
+            record_ids.append(record_id)
+
+        # プロセスプールはシャードに分ける場合だけ使うため、検索だけの場合は読み込まない
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # forkはスレッドを使うサーバープロセスでは安全でないため、spawnで起動する
+        context = multiprocessing.get_context("spawn")
+        self._pools = [ProcessPoolExecutor(max_workers=1, mp_context=context) for _ in partitions]
+        # プールのinitargsはプールが終了するまで保持されるため、シャードのレコードは最初のタスクとして送り、
+        # ワーカーが受け取ったら親プロセスでは手放す（ワーカーは1つなので、以降のタスクより先に実行される）
+        for pool, (names, record_ids) in zip(self._pools, partitions):
+            pool.submit(_load_shard, names, record_ids, base._fuzzy_max_distance)
+        del partitions, names, record_ids
+        self._ready = [pool.submit(_warm_up_shard) for pool in self._pools]
+        if not hasattr(base, "_snapshot") and not hasattr(base, "_database"):
+            for stage in _SHARDED_INDEXES:
+                base.__dict__.pop(stage, None)
+
+        # 実行中の検索の数。closeは実行中の検索が終わってからワーカーを終了させる
+        self._lock = threading.Lock()
+        self._searches = 0
+        self._closing = False
+        # リロードで差し替えられた古いインデックスのワーカーも、参照がなくなれば終了させる
+        self._finalizer = weakref.finalize(self, _shutdown, self._pools)
+
+    @property
+    def shards(self) -> int:
+        return len(self._pools)
+
+    def close(self) -> None:
+        """
+        シャードのワーカープロセスを終了する
+
+        実行中の検索がある場合は、最後の検索が終わったときに終了させます。
+        終了させたあとの検索は、部分一致・あいまい検索もベースのインデックスで行います。
+        """
+        with self._lock:
+            self._closing = True
+            if self._searches:
+                return
+        self._finalizer()
+
+    @contextmanager
+    def _searching(self) -> Iterator[bool]:
+        """検索の間ワーカーを終了させない（closeされたあとはFalseを返し、ワーカーを使わない）"""
+        with self._lock:
+            available = not self._closing
+            if available:
+                self._searches += 1
+        if not available:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            with self._lock:
+                self._searches -= 1
+                finished = self._closing and not self._searches
+            if finished:
+                self._finalizer()
+
+    def warm_up(self) -> None:
+        """ベースの索引を構築し、全シャードの構築が終わるまで待つ"""
+        for stage in _BASE_LAZY_INDEXES:
+            getattr(self.base, stage)
+        for ready in self._ready:
+            ready.result()
+
+    def __len__(self) -> int:
+        return len(self.base)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.base
+
+    @property
+    def has_readings(self) -> bool:
+        return self.base.has_readings
+
+    def exact_record_ids(self, name: str) -> list[int]:
+        return self.base.exact_record_ids(name)
+
+    def find_corporate_number(self, corporate_number: str) -> LookupResult:
+        return self.base.find_corporate_number(corporate_number)
+
+    def complete(self, prefix: str, limit: int = 10) -> list[str]:
+        return self.base.complete(prefix, limit)
+
+    def _iter_completions(self, key: str) -> Iterator[int]:
+        return self.base._iter_completions(key)
+
+    def _scatter(self, func: Callable[..., T], *args: Any) -> list[T]:
+        """全シャードに同じ検索を投げ、シャードの順に結果を集める"""
+        futures = [pool.submit(func, *args) for pool in self._pools]
+        return [future.result() for future in futures]
+
+    def lookup(self, name: str, limit: int = 20) -> LookupResult:
+        """
+        ClientIndex.lookupと同じ順序で検索する（部分一致・あいまい検索はシャードに分散する）
+
+        Args:
+            name: 検索する顧問先名
+            limit: 部分一致・あいまい検索で返す候補の上限
+
+        Returns:
+            LookupResult: 最初に一致した段階の検索結果
+        """
+        for result in self._stages(name, limit):
+            if result.record_ids:
+                return result
+        return LookupResult(None, [], 0, [])
+
+    def _stages(self, name: str, limit: int, exclude: Collection[int] = ()) -> Iterator[LookupResult]:
+        """ClientIndex._stagesと同じ各段階の検索結果を順に返す"""
+        # 検索の途中でcloseされても、この検索が終わるまではワーカーを終了させない
+        with self._searching() as available:
+            if not available:
+                # ワーカーを終了させたあとの検索は、ベースだけで全ての段階を行う（結果は同じ）
+                yield from self.base._stages(name, limit, exclude)
+                return
+
+            for result in self.base._stages(name, limit, exclude):
+                yield result
+                if result.match_type == BASE_STAGES[-1]:
+                    break
+
+            key = normalize_name(name)
+            excluded = sorted(exclude) if exclude else []
+            results = self._scatter(_search_shard, key, limit, excluded)
+            # 各シャードの上位から、ClientIndexと同じ基準（先頭一致するもの、短いものの順）で選び直す
+            top = heapq.nsmallest(limit, chain.from_iterable(partial for _, partial, _ in results))
+            total = sum(count for count, _, _ in results)
+            yield self.base._result("partial", [record_id for _, record_id in top], total)
+
+            fuzzy = [matches for _, _, matches in results]
+            if any(matches is None for matches in fuzzy):
+                fuzzy = self._scatter(_search_fuzzy, key, excluded)
+            ranked = sorted(chain.from_iterable(matches for matches in fuzzy if matches is not None))
+            record_ids = [record_id for _, record_ids in ranked for record_id in record_ids]
+            yield self.base._result("fuzzy", record_ids[:limit], len(record_ids))
+
+    def lookup_many(self, names: Iterable[str], limit: int = 20) -> list[LookupResult]:
+        """複数の顧問先名をまとめて検索する（重複するクエリは一度だけ検索する）"""
+        names = list(names)
+        resolved = {name: self.lookup(name, limit) for name in dict.fromkeys(names)}
+        return [resolved[name] for name in names]
+
+
+def _shutdown(pools: "list[ProcessPoolExecutor]") -> None:
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
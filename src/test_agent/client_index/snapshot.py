@@ -0,0 +1,618 @@
+"""メモリマップで読み込むインデックスのバイナリスナップショット
+
+法人格を辞書化した顧問先名・正規化キーの文字列表・ハッシュバケットを1つのファイルに書き出し、検索時は
+ファイルをmmapしてその場で参照します。法人番号・法人種別・所在地の列も同じファイルに持ちます。
+完全一致の存在確認には、作成時に構築した最小完全ハッシュを使います。登録されていない名前の確認で
+最小完全ハッシュの照合（顧問先名の文字列表の読み出し）を省くため、顧問先名のBloomフィルタも持てます。
+法人格を除いた名称・読み・トライグラムのポスティングリスト、あいまい検索の削除辞書、
+入力補完の並び順も作成時に構築して持つため、読み込み後に組み立てる索引はありません。
+同じファイルを開いた複数のワーカープロセスはページキャッシュを共有します。
+publish_snapshotで共有メモリに置いた場合は、各ワーカーがIndexSnapshot.attachで読み取り専用に参照します。
+
+ファイル構成:
+    magic (8バイト) | version (u32) | ヘッダー長 (u32) | ヘッダー (JSON) | 各セクション（8バイト境界）
+
+ヘッダーには各セクションの位置と、法人格の表記の表などのメタデータを持ちます。
+"""
+
+import json
+import mmap
+import struct
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Executor, Future
+from operator import itemgetter
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .bloom import DEFAULT_ERROR_RATE, BloomFilter
+from .corporate import CorporateNumberIndex, build_number_slots
+from .fuzzy import DEFAULT_MAX_DISTANCE, DEFAULT_PREFIX_LENGTH, _deletes
+from .hashing import key_hashes
+from .keymap import KeyMap
+from .ngram import TrigramIndex
+from .normalize import legal_form_code, normalize_name, split_legal_form
+from .perfect import PERFECT_HASH_ARRAYS, PerfectHashTable, build_perfect_hash
+from .prefix import SortedKeyArray
+from .readings import ReadingTable
+from .records import LegalFormNameTable, RecordStore, encode_legal_forms
+from .strings import (
+    DEFAULT_BLOCK_SIZE,
+    FrontCodedStringTable,
+    StringTable,
+    build_front_coded,
+    build_string_table,
+)
+
+if TYPE_CHECKING:
+    from multiprocessing import shared_memory
+
+SNAPSHOT_MAGIC = b"CLIXSNAP"
+SNAPSHOT_VERSION = 8
+
+_PREAMBLE = struct.Struct("<8sII")
+_EMPTY_SLOT = 0xFFFFFFFF
+
+
+class HashTable:
+    """
+    スナップショット内のオープンアドレス法のハッシュ表
+
+    スロットにはレコード番号を格納し、キーの比較は文字列表を参照して行います。
+    KeyMapと同じインターフェースで、キーに対応するレコード番号を全て返します。
+
+    Args:
+        slots: レコード番号の配列（空きスロットは0xFFFFFFFF）
+        table: キーの文字列表
+        unique_keys: 重複を除いたキーの数
+    """
+
+    def __init__(self, slots: memoryview, table: StringTable, unique_keys: int):
+        self._slots = slots
+        self._mask = len(slots) - 1
+        self._table = table
+        self._unique_keys = unique_keys
+
+    def __len__(self) -> int:
+        return self._unique_keys
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and bool(self.get(key))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(dict.fromkeys(self._table))
+
+    def get(self, key: str) -> list[int]:
+        raw = key.encode("utf-8")
+        slot = key_hashes(key)[0] & self._mask
+        record_ids = []
+        while (record_id := self._slots[slot]) != _EMPTY_SLOT:
+            if self._table.raw(record_id) == raw:
+                record_ids.append(record_id)
+            slot = (slot + 1) & self._mask
+        record_ids.sort()
+        return record_ids
+
+
+class PostingTable:
+    """
+    スナップショット内のキー -> レコード番号のポスティングリスト
+
+    重複のないキーの文字列表をハッシュ表で引き、キー番号に対応する範囲のレコード番号を返します。
+    KeyMapと同じインターフェースで、キーはKeyMapに追加した順に並びます。
+
+    Args:
+        table: キーの文字列表（重複なし）
+        slots: キー番号のハッシュ表（空きスロットは0xFFFFFFFF）
+        offsets: キー番号ごとのレコード番号の開始位置（末尾に全体の件数）
+        ids: 全キーのレコード番号を連結した配列
+    """
+
+    def __init__(self, table: StringTable, slots: memoryview, offsets: memoryview, ids: memoryview):
+        self.table = table
+        self._keys = HashTable(slots, table, len(table))
+        self._offsets = offsets
+        self._ids = ids
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.table)
+
+    def get(self, key: str) -> list[int]:
+        key_ids = self._keys.get(key)
+        if not key_ids:
+            return []
+        key_id = key_ids[0]
+        return self._ids[self._offsets[key_id] : self._offsets[key_id + 1]].tolist()
+
+
+def _posting_sections(label: str, postings: Iterable[tuple[str, Sequence[int]]]) -> dict[str, bytes]:
+    """キーとレコード番号の組をPostingTableのセクションにする"""
+    keys = []
+    offsets = array("Q", [0])
+    ids = array("I")
+    for key, record_ids in postings:
+        keys.append(key)
+        ids.extend(record_ids)
+        offsets.append(len(ids))
+    key_offsets, blob = build_string_table(keys)
+    return {
+        f"{label}.keys.offsets": key_offsets.tobytes(),
+        f"{label}.keys.blob": blob,
+        f"{label}.slots": _build_slots(keys).tobytes(),
+        f"{label}.offsets": offsets.tobytes(),
+        f"{label}.ids": ids.tobytes(),
+    }
+
+
+def _keymap_postings(keymap: KeyMap) -> Iterator[tuple[str, list[int]]]:
+    for key in keymap:
+        yield key, keymap.get(key)
+
+
+def _build_slots(keys: Sequence[str]) -> array:
+    """負荷率が1/2以下になる2のべき乗サイズのハッシュ表を作る"""
+    size = 1
+    while size < max(len(keys), 1) * 2:
+        size <<= 1
+    mask = size - 1
+    slots = array("I", [_EMPTY_SLOT]) * size
+    for record_id, key in enumerate(keys):
+        slot = key_hashes(key)[0] & mask
+        while slots[slot] != _EMPTY_SLOT:
+            slot = (slot + 1) & mask
+        slots[slot] = record_id
+    return slots
+
+
+def _submit[T](executor: Executor | None, func: Callable[..., T], *args: Any) -> "Future[T]":
+    """executorがあればワーカーで実行し、なければその場で実行する"""
+    if executor is not None:
+        return executor.submit(func, *args)
+    return _completed(func(*args))
+
+
+def _completed[T](value: T) -> "Future[T]":
+    future: Future[T] = Future()
+    future.set_result(value)
+    return future
+
+
+def _string_table_sections(label: str, strings: Iterable[str]) -> dict[str, bytes]:
+    offsets, blob = build_string_table(strings)
+    return {f"{label}.offsets": offsets.tobytes(), f"{label}.blob": blob}
+
+
+def _front_coded_sections(label: str, strings: Sequence[str]) -> dict[str, bytes]:
+    blocks, blob, order, positions = build_front_coded(strings)
+    return {
+        f"{label}.blocks": blocks.tobytes(),
+        f"{label}.blob": blob,
+        f"{label}.order": order.tobytes(),
+        f"{label}.positions": positions.tobytes(),
+    }
+
+
+def _perfect_hash_sections(label: str, keys: Sequence[str]) -> dict[str, bytes]:
+    return {f"{label}.{name}": values.tobytes() for name, values in build_perfect_hash(keys).items()}
+
+
+def _slot_sections(label: str, keys: Sequence[str]) -> dict[str, bytes]:
+    return {f"{label}.slots": _build_slots(keys).tobytes()}
+
+
+def _keymap_sections(label: str, keymap: KeyMap) -> dict[str, bytes]:
+    return _posting_sections(label, _keymap_postings(keymap))
+
+
+def _sorted_postings(postings: Iterable[tuple[str, Sequence[int]]]) -> list[tuple[str, Sequence[int]]]:
+    """
+    ポスティングリストをキーの順に並べる
+
+    トライグラム・1文字・削除辞書のキーは集合から作るため、辞書の並びがstrのハッシュ値により
+    実行ごとに変わります。キーの順に並べて、同じレコードからは同じバイト列のスナップショットを作ります。
+    """
+    return sorted(postings, key=itemgetter(0))
+
+
+def _trigram_sections(keys: Sequence[str]) -> dict[str, bytes]:
+    grams, chars = TrigramIndex(keys).postings
+    return {
+        **_posting_sections("trigrams", _sorted_postings(grams.items())),
+        **_posting_sections("chars", _sorted_postings(chars.items())),
+    }
+
+
+def _fuzzy_sections(cores: Sequence[str], max_distance: int) -> dict[str, bytes]:
+    deletes = KeyMap()
+    for core_id, core in enumerate(cores):
+        for pattern in _deletes(core[:DEFAULT_PREFIX_LENGTH], max_distance):
+            deletes.add(pattern, core_id)
+    return _posting_sections("fuzzy", _sorted_postings(_keymap_postings(deletes)))
+
+
+def _sorted_sections(label: str, keys: Sequence[str]) -> dict[str, bytes]:
+    return {label: SortedKeyArray(keys).order.tobytes()}
+
+
+def _bloom_sections(names: Sequence[str], error_rate: float) -> dict[str, bytes]:
+    return {"bloom": BloomFilter.build(names, len(names), error_rate).to_bytes()}
+
+
+def snapshot_sections(
+    records: RecordStore | Sequence[str],
+    readings: ReadingTable | None = None,
+    fuzzy_max_distance: int = DEFAULT_MAX_DISTANCE,
+    keys: Sequence[str] | None = None,
+    executor: Executor | None = None,
+    bloom_error_rate: float = DEFAULT_ERROR_RATE,
+) -> tuple[dict[str, bytes], dict[str, Any]]:
+    """
+    スナップショットのセクションとヘッダーのメタデータを作る
+
+    互いに依存しないセクション（文字列表・ハッシュ表・ポスティングリストなど）は、
+    executorを渡すとそのワーカーで並列に作ります。executorの有無や実行ごとのstrのハッシュ値によらず、
+    同じレコードからは同じバイト列になります（チェックサムで比較できます）。
+
+    Args:
+        records: 顧問先のレコード（顧問先名のリストだけを渡してもよい）
+        readings: 事前計算済みの読みキー（省略時は読みによる検索を行わない）
+        fuzzy_max_distance: あいまい検索の削除辞書の編集距離（0の場合は削除辞書を作らない）
+        keys: 正規化キー（事前に正規化した場合。省略時はここで正規化する）
+        executor: セクションを並列に作るプロセスプール
+        bloom_error_rate: 顧問先名のBloomフィルタの誤検出率（0の場合はBloomフィルタを作らない）
+
+    Returns:
+        tuple: (セクション名 -> 内容, メタデータ)。write_snapshot_sectionsで書き出す
+    """
+    if not isinstance(records, RecordStore):
+        records = RecordStore(records)
+    # 前方圧縮した文字列表を番号順に何度も参照すると遅いため、作成中は文字列のリストにする
+    names = list(records.names)
+    if keys is None:
+        keys = [normalize_name(name) for name in names]
+    splits = [split_legal_form(key) for key in keys]
+    # ClientIndexが最初に使われたときに構築する索引と同じ順序で作る
+    core_map = KeyMap()
+    for record_id, (_, _, core) in enumerate(splits):
+        if core:
+            core_map.add(core, record_id)
+    cores = list(core_map)
+    reading_map = KeyMap()
+    if readings is not None:
+        for column in zip(*readings.readings):
+            for record_id, key in enumerate(column):
+                if key:
+                    reading_map.add(key, record_id)
+
+    string_tables: dict[str, Sequence[str]] = {"keys": keys}
+    if readings is not None:
+        string_tables["reading_hira"] = [hira for hira, _ in readings.readings]
+        string_tables["reading_romaji"] = [romaji for _, romaji in readings.readings]
+    if records.addresses is not None:
+        # 所在地の文字列表はバッファを参照するためワーカーに渡せない（pickleできない）
+        string_tables["addresses"] = records.addresses if executor is None else list(records.addresses)
+
+    # ファイル内のセクションの順序を保つため、作成を依頼した順に結果を集める
+    parts: list[Future[dict[str, bytes]]] = [
+        _submit(executor, _string_table_sections, label, strings) for label, strings in string_tables.items()
+    ]
+    # 顧問先名は法人格の表記の番号と、法人格を除いた名称の前方圧縮した文字列表にする
+    affixes, codes, name_cores = encode_legal_forms(names)
+    parts.append(_completed({"names.codes": codes.tobytes()}))
+    parts.append(_submit(executor, _front_coded_sections, "names.cores", name_cores))
+    legal_forms = array("B", (legal_form_code(form, position) for form, position, _ in splits))
+    parts.append(_completed({"legal_forms": legal_forms.tobytes()}))
+    parts.append(_submit(executor, _perfect_hash_sections, "exact", names))
+    parts.append(_submit(executor, _slot_sections, "normalized", keys))
+    parts.append(_submit(executor, _keymap_sections, "core", core_map))
+    parts.append(_submit(executor, _keymap_sections, "reading", reading_map))
+    parts.append(_submit(executor, _trigram_sections, keys))
+    if fuzzy_max_distance > 0:
+        parts.append(_submit(executor, _fuzzy_sections, cores, fuzzy_max_distance))
+    parts.append(_submit(executor, _sorted_sections, "sorted_keys", keys))
+    parts.append(_submit(executor, _sorted_sections, "sorted_cores", cores))
+    unique_names = list(dict.fromkeys(names))
+    if bloom_error_rate > 0:
+        parts.append(_submit(executor, _bloom_sections, unique_names, bloom_error_rate))
+
+    sections: dict[str, bytes] = {}
+    for part in parts:
+        sections.update(part.result())
+    if records.corporate_numbers is not None and records.kinds is not None:
+        sections["corporate_numbers"] = array("Q", records.corporate_numbers).tobytes()
+        sections["kinds"] = array("H", records.kinds).tobytes()
+        sections["corporate.slots"] = build_number_slots(records.corporate_numbers).tobytes()
+
+    metadata: dict[str, Any] = {
+        "record_count": len(names),
+        "unique_names": len(unique_names),
+        "unique_keys": len(dict.fromkeys(keys)),
+        "names_block_size": DEFAULT_BLOCK_SIZE,
+        "fuzzy_max_distance": fuzzy_max_distance,
+        "fuzzy_prefix_length": DEFAULT_PREFIX_LENGTH,
+        "name_affixes": affixes,
+        "reading_legal_forms": readings.legal_forms if readings is not None else None,
+        "readings_digest": readings.digest if readings is not None else None,
+        "bloom_error_rate": bloom_error_rate if bloom_error_rate > 0 else None,
+    }
+    return sections, metadata
+
+
+def write_snapshot(
+    path: Path,
+    records: RecordStore | Sequence[str],
+    readings: ReadingTable | None = None,
+    fuzzy_max_distance: int = DEFAULT_MAX_DISTANCE,
+    executor: Executor | None = None,
+    bloom_error_rate: float = DEFAULT_ERROR_RATE,
+) -> None:
+    """
+    顧問先のレコードからスナップショットを作成する
+
+    Args:
+        path: 出力先のファイル
+        records: 顧問先のレコード（顧問先名のリストだけを渡してもよい）
+        readings: 事前計算済みの読みキー（省略時は読みによる検索を行わない）
+        fuzzy_max_distance: あいまい検索の削除辞書の編集距離（0の場合は削除辞書を作らない）
+        executor: セクションを並列に作るプロセスプール（省略時はこのプロセスで作る）
+        bloom_error_rate: 顧問先名のBloomフィルタの誤検出率（0の場合はBloomフィルタを作らない）
+    """
+    sections, metadata = snapshot_sections(
+        records,
+        readings,
+        fuzzy_max_distance=fuzzy_max_distance,
+        executor=executor,
+        bloom_error_rate=bloom_error_rate,
+    )
+    write_snapshot_sections(path, sections, metadata)
+
+
+def write_snapshot_sections(path: Path, sections: dict[str, bytes], metadata: dict[str, Any]) -> None:
+    """
+    snapshot_sectionsで作ったセクションをスナップショットのファイルに書き出す
+
+    Args:
+        path: 出力先のファイル
+        sections: セクション名 -> 内容（この順にファイルに並べる）
+        metadata: ヘッダーのメタデータ
+    """
+    # ヘッダーの長さが決まるまでセクションの位置が決まらないため、収束するまで計算し直す
+    layout: dict[str, list[int]] = {}
+    header = b""
+    while True:
+        position = _align(_PREAMBLE.size + len(header))
+        new_layout = {}
+        for name, data in sections.items():
+            new_layout[name] = [position, len(data)]
+            position = _align(position + len(data))
+        new_header = json.dumps({"sections": new_layout, "metadata": metadata}, ensure_ascii=False).encode("utf-8")
+        if new_header == header:
+            break
+        header, layout = new_header, new_layout
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, mode="wb") as f:
+        f.write(_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header)))
+        f.write(header)
+        for name, data in sections.items():
+            f.write(b"\0" * (layout[name][0] - f.tell()))
+            f.write(data)
+    # 書き込み途中のファイルを読み込まないよう、完成してから置き換える
+    tmp_path.replace(path)
+
+
+def _align(position: int) -> int:
+    return (position + 7) & ~7
+
+
+def _read_preamble(view: memoryview, source: str) -> int:
+    """マジックとバージョンを確認し、ヘッダーの長さを返す"""
+    magic, version, header_length = _PREAMBLE.unpack_from(view, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"インデックスのスナップショットではありません: {source}")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"未対応のスナップショットのバージョンです: {version}（{source}）")
+    return header_length
+
+
+def publish_snapshot(path: Path, name: str) -> "shared_memory.SharedMemory":
+    """
+    スナップショットファイルを共有メモリにコピーする
+
+    同じ名前の共有メモリが残っている場合は削除してから作り直します。各ワーカーは
+    IndexSnapshot.attachで参照し、物理メモリ上のコピーは全プロセスで1つだけになります。
+    不要になったら、返した共有メモリのclose()とunlink()を呼んでください。
+
+    Args:
+        path: スナップショットファイル
+        name: 共有メモリの名前
+
+    Returns:
+        SharedMemory: 作成した共有メモリ
+    """
+    # 共有メモリを使う場合だけmultiprocessingを読み込む
+    from multiprocessing import shared_memory
+
+    with open(path, mode="rb") as f:
+        _read_preamble(memoryview(f.read(_PREAMBLE.size)), str(path))
+        size = f.seek(0, 2)
+        f.seek(0)
+
+        try:
+            stale = shared_memory.SharedMemory(name)
+        except FileNotFoundError:
+            pass
+        else:
+            stale.close()
+            stale.unlink()
+
+        shm = shared_memory.SharedMemory(name, create=True, size=size)
+        try:
+            with shm.buf[:size] as view:
+                position = 0
+                while position < size:
+                    with view[position:] as rest:
+                        read = f.readinto(rest)
+                    if not read:
+                        raise ValueError(f"スナップショットの読み込み中にファイルが短くなりました: {path}")
+                    position += read
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+    return shm
+
+
+class _SharedMemoryBuffer:
+    """
+    共有メモリを読み取り専用のバッファとして公開する
+
+    スナップショットのmemoryviewが残っている間はこのオブジェクトも解放されないため、
+    共有メモリを参照中に閉じることはありません。
+    """
+
+    def __init__(self, name: str):
+        from multiprocessing import shared_memory
+
+        # 作成したプロセスが削除するため、参照するだけのワーカーでは追跡しない
+        self._shm = shared_memory.SharedMemory(name, track=False)
+
+    def __buffer__(self, flags: int) -> memoryview:
+        return self._shm.buf.toreadonly()
+
+    def __release_buffer__(self, view: memoryview) -> None:
+        view.release()
+
+
+class IndexSnapshot:
+    """
+    mmapしたスナップショット
+
+    Attributes:
+        names: 顧問先名（法人格を辞書化した列）
+        keys: 正規化キーの文字列表
+        exact: 顧問先名 -> レコード番号の最小完全ハッシュ
+        normalized: 正規化キー -> レコード番号のハッシュ表
+        core: 法人格を除いた名称 -> レコード番号
+        cores: 法人格を除いた名称（重複なし。coreに追加した順）
+        reading: 読みキー（ひらがな・ローマ字） -> レコード番号
+        trigrams: 正規化キーの (トライグラム, 1文字) -> レコード番号
+        fuzzy_deletes: 法人格を除いた名称の削除パターン -> coresの番号。削除辞書を含まない場合はNone
+        sorted_keys: 正規化キーを辞書順に並べたレコード番号
+        sorted_cores: 法人格を除いた名称を辞書順に並べたcoresの番号
+        legal_forms: レコードごとの正規化キーの法人格と位置（legal_form_codeの値）
+        corporate: 法人番号 -> レコード番号の索引。法人番号の列を含まない場合はNone
+        records: 顧問先のレコード（法人番号・法人種別・所在地の列を含まない場合は顧問先名のみ）
+        readings: 読みキーの (ひらがな, ローマ字) の文字列表。読みを含まない場合はNone
+        reading_legal_forms: 法人格の読みキー -> 法人格
+        bloom: 顧問先名のBloomフィルタ。作成時に省いた場合はNone
+    """
+
+    def __init__(self, buffer: Any, source: str = ""):
+        self._buffer = buffer
+        view = memoryview(buffer)
+        header_length = _read_preamble(view, source)
+
+        header = json.loads(bytes(view[_PREAMBLE.size : _PREAMBLE.size + header_length]))
+        self.metadata: dict[str, Any] = header["metadata"]
+        self._sections = {
+            name: view[offset : offset + length] for name, (offset, length) in header["sections"].items()
+        }
+
+        self.names = LegalFormNameTable(
+            self.metadata["name_affixes"],
+            self._sections["names.codes"].cast("H"),
+            FrontCodedStringTable(
+                self._sections["names.cores.blocks"].cast("Q"),
+                self._sections["names.cores.blob"],
+                self._sections["names.cores.order"].cast("I"),
+                self._sections["names.cores.positions"].cast("I"),
+                block_size=self.metadata["names_block_size"],
+            ),
+        )
+        self.legal_forms = self._sections["legal_forms"]
+        self.keys = self._string_table("keys")
+        self.exact = PerfectHashTable(
+            {label: self._sections[f"exact.{label}"].cast(code) for label, code in PERFECT_HASH_ARRAYS.items()},
+            self.names,
+        )
+        self.normalized = HashTable(
+            self._sections["normalized.slots"].cast("I"), self.keys, self.metadata["unique_keys"]
+        )
+        self.core = self._posting_table("core")
+        self.cores = self.core.table
+        self.reading = self._posting_table("reading")
+        self.trigrams = (self._posting_table("trigrams"), self._posting_table("chars"))
+        self.fuzzy_deletes: PostingTable | None = None
+        if "fuzzy.slots" in self._sections:
+            self.fuzzy_deletes = self._posting_table("fuzzy")
+        self.sorted_keys = self._sections["sorted_keys"].cast("I")
+        self.sorted_cores = self._sections["sorted_cores"].cast("I")
+
+        self.records = RecordStore(self.names)
+        self.corporate: CorporateNumberIndex | None = None
+        if "corporate_numbers" in self._sections:
+            corporate_numbers = self._sections["corporate_numbers"].cast("Q")
+            self.corporate = CorporateNumberIndex(self._sections["corporate.slots"].cast("I"), corporate_numbers)
+            self.records = RecordStore(
+                self.names,
+                corporate_numbers=corporate_numbers,
+                kinds=self._sections["kinds"].cast("H"),
+                addresses=self._string_table("addresses"),
+            )
+
+        self.readings: tuple[StringTable, StringTable] | None = None
+        self.reading_legal_forms: dict[str, str] = self.metadata["reading_legal_forms"] or {}
+        if "reading_hira.offsets" in self._sections:
+            self.readings = (self._string_table("reading_hira"), self._string_table("reading_romaji"))
+        self.bloom: BloomFilter | None = None
+        if "bloom" in self._sections:
+            self.bloom = BloomFilter(self._sections["bloom"].cast("Q"))
+
+    def _string_table(self, label: str) -> StringTable:
+        return StringTable(self._sections[f"{label}.offsets"].cast("Q"), self._sections[f"{label}.blob"])
+
+    def _posting_table(self, label: str) -> PostingTable:
+        return PostingTable(
+            self._string_table(f"{label}.keys"),
+            self._sections[f"{label}.slots"].cast("I"),
+            self._sections[f"{label}.offsets"].cast("Q"),
+            self._sections[f"{label}.ids"].cast("I"),
+        )
+
+    @classmethod
+    def open(cls, path: Path) -> "IndexSnapshot":
+        """
+        スナップショットファイルを読み取り専用でmmapする
+
+        Args:
+            path: スナップショットファイル
+
+        Returns:
+            IndexSnapshot: 読み込んだスナップショット
+        """
+        with open(path, mode="rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, source=str(path))
+
+    @classmethod
+    def attach(cls, name: str) -> "IndexSnapshot":
+        """
+        publish_snapshotで共有メモリに置いたスナップショットを読み取り専用で参照する
+
+        Args:
+            name: 共有メモリの名前
+
+        Returns:
+            IndexSnapshot: 共有メモリ上のスナップショット
+        """
+        return cls(_SharedMemoryBuffer(name), source=f"共有メモリ {name}")
+
+    def __len__(self) -> int:
+        return self.metadata["record_count"]
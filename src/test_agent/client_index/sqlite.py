@@ -0,0 +1,416 @@
+"""SQLiteデータベースに保存した顧問先インデックス
+
+顧問先名・正規化キー・法人格を除いた名称・読み・法人番号をインデックス付きの列に、
+部分一致検索用の文字トライグラムをFTS5（trigramトークナイザ）に、あいまい検索用の
+削除辞書を別テーブルに保存します。顧問先名のBloomフィルタも1行のBLOBとして保存し、
+開くときにメモリへ読み込みます。複数のエージェントプロセスが同じファイルを
+読み取り専用で開き、ページキャッシュを共有できます。
+
+検索の段階や並び順はClientIndexと同じで、ClientIndex.from_sqliteが各索引の代わりに
+このモジュールのクラスを組み込みます。
+"""
+
+import json
+import sqlite3
+import threading
+from array import array
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+from typing import Any
+
+from .bloom import DEFAULT_ERROR_RATE, BloomFilter
+from .fuzzy import DEFAULT_MAX_DISTANCE, DEFAULT_PREFIX_LENGTH, SymSpellIndex, _deletes
+from .normalize import legal_form_code, normalize_name, split_legal_form
+from .readings import ReadingTable
+from .records import RecordStore
+
+# データベースの形式のバージョン（テーブル構成を変えたら上げる）
+SQLITE_SCHEMA_VERSION = 3
+
+# 読み取り時にmmapする最大バイト数（複数プロセスでページキャッシュを共有する）
+MMAP_SIZE = 1 << 34
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE clients (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    core TEXT,
+    legal_form INTEGER NOT NULL,
+    corporate_number INTEGER,
+    kind INTEGER,
+    address TEXT,
+    reading_hira TEXT,
+    reading_romaji TEXT
+);
+CREATE TABLE cores (id INTEGER PRIMARY KEY, core TEXT NOT NULL);
+CREATE TABLE fuzzy_deletes (
+    pattern TEXT NOT NULL,
+    core_id INTEGER NOT NULL,
+    PRIMARY KEY (pattern, core_id)
+) WITHOUT ROWID;
+CREATE TABLE bloom (blocks BLOB NOT NULL);
+"""
+
+# データを入れてから作る索引（先に作るより挿入が速い）
+_INDEXES = """
+CREATE INDEX clients_name ON clients (name);
+CREATE INDEX clients_key ON clients (key);
+CREATE INDEX clients_core ON clients (core);
+CREATE INDEX clients_corporate_number ON clients (corporate_number);
+CREATE INDEX clients_reading_hira ON clients (reading_hira);
+CREATE INDEX clients_reading_romaji ON clients (reading_romaji);
+CREATE UNIQUE INDEX cores_core ON cores (core);
+CREATE VIRTUAL TABLE clients_fts USING fts5 (key, content='clients', content_rowid='id', tokenize='trigram');
+INSERT INTO clients_fts (clients_fts) VALUES ('rebuild');
+"""
+
+
+def write_sqlite(
+    path: Path,
+    records: RecordStore | Sequence[str],
+    readings: ReadingTable | None = None,
+    fuzzy_max_distance: int = DEFAULT_MAX_DISTANCE,
+    bloom_error_rate: float = DEFAULT_ERROR_RATE,
+) -> None:
+    """
+    顧問先のレコードからSQLiteデータベースを作成する
+
+    Args:
+        path: 出力先のファイル
+        records: 顧問先のレコード（顧問先名のリストだけを渡してもよい）
+        readings: 事前計算済みの読みキー（省略時は読みによる検索を行わない）
+        fuzzy_max_distance: あいまい検索の削除辞書の編集距離（0の場合は削除辞書を作らない）
+        bloom_error_rate: 顧問先名のBloomフィルタの誤検出率（0の場合はBloomフィルタを作らない）
+    """
+    if not isinstance(records, RecordStore):
+        records = RecordStore(records)
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF;" + _SCHEMA)
+
+        # 法人格を除いた名称は、ClientIndexの_coresと同じく最初に現れた順に番号を振る
+        core_ids: dict[str, int] = {}
+
+        def rows() -> Iterator[tuple[Any, ...]]:
+            for record_id, record in enumerate(records):
+                key = normalize_name(record.name)
+                form, position, core = split_legal_form(key)
+                if core:
+                    core_ids.setdefault(core, len(core_ids))
+                hira, romaji = readings.readings[record_id] if readings is not None else ("", "")
+                yield (
+                    record_id,
+                    record.name,
+                    key,
+                    core or None,
+                    legal_form_code(form, position),
+                    int(record.corporate_number) if record.corporate_number else None,
+                    int(record.kind) if record.kind else None,
+                    record.address if records.has_details else None,
+                    hira or None,
+                    romaji or None,
+                )
+
+        conn.executemany("INSERT INTO clients VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows())
+        conn.executemany("INSERT INTO cores VALUES (?, ?)", ((core_id, core) for core, core_id in core_ids.items()))
+        if fuzzy_max_distance > 0:
+            conn.executemany(
+                "INSERT OR IGNORE INTO fuzzy_deletes VALUES (?, ?)",
+                (
+                    (pattern, core_id)
+                    for core, core_id in core_ids.items()
+                    for pattern in _deletes(core[:DEFAULT_PREFIX_LENGTH], fuzzy_max_distance)
+                ),
+            )
+        if bloom_error_rate > 0:
+            unique_names = list(dict.fromkeys(records.names))
+            bloom = BloomFilter.build(unique_names, len(unique_names), bloom_error_rate)
+            conn.execute("INSERT INTO bloom VALUES (?)", (bloom.to_bytes(),))
+        conn.executescript(_INDEXES)
+
+        metadata = {
+            "schema_version": SQLITE_SCHEMA_VERSION,
+            "record_count": len(records),
+            "core_count": len(core_ids),
+            "has_details": records.has_details,
+            "has_readings": readings is not None,
+            "reading_legal_forms": readings.legal_forms if readings is not None else {},
+            "readings_digest": readings.digest if readings is not None else None,
+            "fuzzy_max_distance": fuzzy_max_distance,
+            "fuzzy_prefix_length": DEFAULT_PREFIX_LENGTH,
+            "bloom_error_rate": bloom_error_rate if bloom_error_rate > 0 else None,
+        }
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)", ((key, json.dumps(value)) for key, value in metadata.items())
+        )
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    # 書き込み途中のファイルを読み込まないよう、完成してから置き換える
+    tmp_path.replace(path)
+
+
+class SqliteDatabase:
+    """
+    読み取り専用で開いたSQLiteデータベース
+
+    sqlite3の接続はスレッド間で共有できないため、スレッドごとに接続を開きます。
+    開いた接続はスレッドごとに記録し、終了したスレッドの接続は次に接続を開くときに、
+    残りはcloseでまとめて閉じます（閉じたあとの検索はsqlite3.ProgrammingError）。
+
+    Args:
+        path: データベースファイル
+
+    Attributes:
+        bloom: 顧問先名のBloomフィルタ（メモリに読み込んだもの）。作成時に省いた場合はNone
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._local = threading.local()
+        # スレッド -> そのスレッドの接続（closeで閉じる）
+        self._connections: dict[threading.Thread, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+        self.metadata: dict[str, Any] = {
+            key: json.loads(value) for key, value in self.execute("SELECT key, value FROM meta")
+        }
+        if self.metadata.get("schema_version") != SQLITE_SCHEMA_VERSION:
+            raise ValueError(f"未対応のデータベースのバージョンです: {self.metadata.get('schema_version')}（{path}）")
+        self.bloom: BloomFilter | None = None
+        if self.metadata["bloom_error_rate"] is not None:
+            (blocks,) = self.execute("SELECT blocks FROM bloom").fetchone()
+            self.bloom = BloomFilter(array("Q", blocks))
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # 接続は開いたスレッドだけが使うが、closeは別のスレッドから呼べるようにする
+            conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+            with self._lock:
+                finished = [thread for thread in self._connections if not thread.is_alive()]
+                stale = [self._connections.pop(thread) for thread in finished]
+                self._connections[threading.current_thread()] = conn
+            for old in stale:
+                old.close()
+            self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        """全てのスレッドの接続を閉じる"""
+        with self._lock:
+            connections, self._connections = list(self._connections.values()), {}
+        for conn in connections:
+            conn.close()
+
+    def execute(self, sql: str, parameters: Sequence[Any] = ()) -> sqlite3.Cursor:
+        return self._connection().execute(sql, parameters)
+
+    def column(self, sql: str, parameters: Sequence[Any] = ()) -> list[Any]:
+        """1列の結果をリストで返す"""
+        return [row[0] for row in self.execute(sql, parameters)]
+
+    def __len__(self) -> int:
+        return self.metadata["record_count"]
+
+
+class SqliteColumn(Sequence[Any]):
+    """
+    テーブルの1列をレコード番号で参照するシーケンス
+
+    Args:
+        db: データベース
+        table: テーブル名
+        column: 列名
+        length: テーブルの行数（id は 0..length-1）
+        default: NULLの場合に返す値
+    """
+
+    def __init__(self, db: SqliteDatabase, table: str, column: str, length: int, default: Any = None):
+        self._db = db
+        self._sql = f"SELECT {column} FROM {table} WHERE id = ?"
+        self._length = length
+        self._default = default
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += self._length
+        row = self._db.execute(self._sql, (index,)).fetchone()
+        if row is None:
+            raise IndexError(index)
+        return self._default if row[0] is None else row[0]
+
+
+class SqliteKeyMap:
+    """
+    列の値 -> レコード番号の対応表（KeyMapと同じインターフェース）
+
+    複数の列を指定した場合は、KeyMapに列ごとに順に登録した場合と同じく、
+    列の順・レコード番号の順に結果を連結します。
+
+    Args:
+        db: データベース
+        table: テーブル名
+        columns: 検索する列名
+        id_column: レコード番号の列名
+    """
+
+    def __init__(self, db: SqliteDatabase, table: str, columns: Sequence[str], id_column: str = "id"):
+        self._db = db
+        self._queries = [
+            f"SELECT {id_column} FROM {table} WHERE {column} = ? ORDER BY {id_column}" for column in columns
+        ]
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and bool(self.get(key))
+
+    def get(self, key: str) -> list[int]:
+        record_ids = []
+        for sql in self._queries:
+            record_ids.extend(self._db.column(sql, (key,)))
+        return record_ids
+
+
+class SqlitePrefixScan:
+    """
+    前方一致する値のレコード番号を辞書順に返す（SortedKeyArrayと同じインターフェース）
+
+    列の索引を範囲検索するため、値を全件並べ替えることはありません。SQLiteの既定の照合順序
+    （UTF-8のバイト順）はPythonの文字列の比較順と一致します。
+
+    Args:
+        db: データベース
+        table: テーブル名
+        column: 並べる列名
+        id_column: レコード番号の列名
+    """
+
+    def __init__(self, db: SqliteDatabase, table: str, column: str, id_column: str = "id"):
+        self._db = db
+        self._sql = f"SELECT {id_column}, {column} FROM {table} WHERE {column} >= ? ORDER BY {column}, {id_column}"
+
+    def iter_prefix(self, prefix: str) -> Iterator[int]:
+        for key_id, key in self._db.execute(self._sql, (prefix,)):
+            if not key.startswith(prefix):
+                return
+            yield key_id
+
+
+class SqliteTrigramSearch:
+    """
+    FTS5のtrigramトークナイザによる部分一致検索（TrigramIndexと同じインターフェース）
+
+    3文字以上のクエリはFTS5の索引で絞り込みます。2文字以下のクエリはトライグラムで
+    絞り込めないため、全件を走査します。
+
+    Args:
+        db: データベース
+    """
+
+    _RANKED = "SELECT id FROM clients WHERE {where} ORDER BY substr(key, 1, length(:query)) != :query, length(key), id"
+
+    def __init__(self, db: SqliteDatabase):
+        self._db = db
+
+    def search(self, query: str, limit: int, exclude: Sequence[int] | set[int] = ()) -> tuple[int, list[int]]:
+        if not query:
+            return 0, []
+
+        if len(query) >= 3:
+            # 引用符で囲むと、トライグラムが連続して現れる（部分文字列として含む）行だけに一致する
+            where = "id IN (SELECT rowid FROM clients_fts WHERE clients_fts MATCH :phrase)"
+        else:
+            where = "instr(key, :query) > 0"
+        parameters = {"query": query, "phrase": '"' + query.replace('"', '""') + '"'}
+        ranked = self._RANKED.format(where=where)
+
+        if exclude:
+            record_ids = [record_id for record_id in self._db.column(ranked, parameters) if record_id not in exclude]
+            return len(record_ids), record_ids[:limit]
+
+        total = self._db.execute(f"SELECT count(*) FROM clients WHERE {where}", parameters).fetchone()[0]
+        if not total:
+            return 0, []
+        return total, self._db.column(ranked + " LIMIT :limit", {**parameters, "limit": limit})
+
+
+class SqliteCorporateNumbers:
+    """法人番号 -> レコード番号（CorporateNumberIndexと同じインターフェース）"""
+
+    def __init__(self, db: SqliteDatabase):
+        self._db = db
+
+    def get(self, number: int) -> list[int]:
+        if not number:
+            return []
+        return self._db.column("SELECT id FROM clients WHERE corporate_number = ? ORDER BY id", (number,))
+
+
+def sqlite_components(db: SqliteDatabase, fuzzy_max_distance: int) -> dict[str, Any]:
+    """
+    ClientIndexの各索引に対応する、データベースを参照する部品を作る
+
+    Args:
+        db: データベース
+        fuzzy_max_distance: あいまい検索で許容する最大の編集距離（作成時の値を超えられない）
+
+    Returns:
+        dict: ClientIndexの属性名 -> 部品
+    """
+    metadata = db.metadata
+    length = metadata["record_count"]
+    names = SqliteColumn(db, "clients", "name", length)
+    records = RecordStore(names)
+    if metadata["has_details"]:
+        records = RecordStore(
+            names,
+            corporate_numbers=SqliteColumn(db, "clients", "corporate_number", length, default=0),
+            kinds=SqliteColumn(db, "clients", "kind", length, default=0),
+            addresses=SqliteColumn(db, "clients", "address", length, default=""),
+        )
+
+    cores = SqliteColumn(db, "cores", "core", metadata["core_count"])
+    fuzzy = SymSpellIndex.from_deletes(
+        cores,
+        SqliteKeyMap(db, "fuzzy_deletes", ["pattern"], id_column="core_id"),
+        max_distance=min(fuzzy_max_distance, metadata["fuzzy_max_distance"]),
+        prefix_length=metadata["fuzzy_prefix_length"],
+    )
+
+    reading_columns = None
+    if metadata["has_readings"]:
+        reading_columns = (
+            SqliteColumn(db, "clients", "reading_hira", length, default=""),
+            SqliteColumn(db, "clients", "reading_romaji", length, default=""),
+        )
+
+    return {
+        "records": records,
+        "names": names,
+        "keys": SqliteColumn(db, "clients", "key", length),
+        "_exact": SqliteKeyMap(db, "clients", ["name"]),
+        "_normalized": SqliteKeyMap(db, "clients", ["key"]),
+        "_core": SqliteKeyMap(db, "clients", ["core"]),
+        "_legal_forms": SqliteColumn(db, "clients", "legal_form", length, default=0),
+        "_cores": cores,
+        "_reading": SqliteKeyMap(db, "clients", ["reading_hira", "reading_romaji"]),
+        "_reading_columns": reading_columns,
+        "_reading_legal_forms": metadata["reading_legal_forms"],
+        "_trigrams": SqliteTrigramSearch(db),
+        "_fuzzy": fuzzy,
+        "_fuzzy_max_distance": fuzzy_max_distance,
+        "_sorted_keys": SqlitePrefixScan(db, "clients", "key"),
+        "_sorted_cores": SqlitePrefixScan(db, "cores", "core"),
+        "_corporate": SqliteCorporateNumbers(db),
+    }
@@ -0,0 +1,284 @@
+"""連結したUTF-8文字列とオフセット配列からなる文字列表"""
+
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator, Sequence
+
+# 前方圧縮する文字列表の1ブロックの件数（先頭の1件だけを圧縮せずに持つ）
+DEFAULT_BLOCK_SIZE = 16
+
+
+class StringTable(Sequence[str]):
+    """
+    連結したUTF-8文字列とオフセット配列からなる文字列表
+
+    i番目の文字列は blob[offsets[i]:offsets[i + 1]] です。参照のたびにその範囲だけを
+    デコードするため、全件の文字列オブジェクトをメモリに持ちません。
+    """
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> "StringTable":
+        """文字列をメモリ上の文字列表にまとめる"""
+        offsets, blob = build_string_table(strings)
+        return cls(memoryview(offsets), memoryview(blob))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self.raw(index).decode("utf-8")
+
+    def raw(self, index: int) -> bytes:
+        """i番目の文字列をデコードせずに返す"""
+        return self._blob[self._offsets[index] : self._offsets[index + 1]].tobytes()
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def nbytes(self) -> int:
+        """オフセット配列と文字列のバイト数"""
+        return self._offsets.nbytes + self._blob.nbytes
+
+
+def build_string_table(strings: Iterable[str]) -> tuple[array, bytes]:
+    """
+    文字列をオフセット配列と連結したUTF-8文字列にする
+
+    Returns:
+        tuple: (オフセット配列, 連結した文字列)
+    """
+    offsets = array("Q", [0])
+    chunks = []
+    position = 0
+    for string in strings:
+        encoded = string.encode("utf-8")
+        chunks.append(encoded)
+        position += len(encoded)
+        offsets.append(position)
+    return offsets, b"".join(chunks)
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(blob: bytes | memoryview, position: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = blob[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def _common_prefix_length(a: bytes, b: bytes) -> int:
+    # 1バイトずつ比べるとPythonのループになるため、スライスの比較で二分探索する
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def build_front_coded(
+    strings: Iterable[str], block_size: int = DEFAULT_BLOCK_SIZE
+) -> tuple[array, bytes, array, array]:
+    """
+    文字列を辞書順に並べ、ブロックごとに前方圧縮する
+
+    ブロックの先頭は (長さ, UTF-8) のまま持ち、それ以降は直前の文字列との共通接頭辞の長さと
+    残りの部分だけを (共通接頭辞の長さ, 残りの長さ, 残りのUTF-8) として持ちます（長さは可変長整数）。
+
+    Args:
+        strings: 番号順の文字列（重複を含んでよい）
+        block_size: 1ブロックの件数
+
+    Returns:
+        tuple: (ブロックの開始位置, 圧縮した文字列, 辞書順の位置 -> 番号, 番号 -> 辞書順の位置)
+    """
+    encoded = [string.encode("utf-8") for string in strings]
+    # UTF-8のバイト列の順序はコードポイント順（strの比較）と一致する。同じ文字列は番号順に並ぶ
+    order = array("I", sorted(range(len(encoded)), key=encoded.__getitem__))
+    positions = array("I", bytes(4 * len(encoded)))
+    blocks = array("Q")
+    blob = bytearray()
+    previous = b""
+    for position, index in enumerate(order):
+        positions[index] = position
+        raw = encoded[index]
+        if position % block_size == 0:
+            blocks.append(len(blob))
+            _write_varint(blob, len(raw))
+            blob += raw
+        else:
+            common = _common_prefix_length(previous, raw)
+            _write_varint(blob, common)
+            _write_varint(blob, len(raw) - common)
+            blob += raw[common:]
+        previous = raw
+    return blocks, bytes(blob), order, positions
+
+
+class FrontCodedStringTable(Sequence[str]):
+    """
+    辞書順に並べてブロックごとに前方圧縮した文字列表
+
+    顧問先名は「株式会社」「有限会社」などの共通の接頭辞が多いため、直前の文字列との
+    差分だけを持つことで、文字列オブジェクトのリストに比べて数分の1のメモリで済みます。
+    番号での参照は、その文字列を含むブロックを先頭から展開して求めます。
+    完全一致・前方一致の検索は、ブロックの先頭の文字列を二分探索してから順に読みます。
+
+    Args:
+        blocks: ブロックの開始位置
+        blob: 圧縮した文字列
+        order: 辞書順の位置 -> 番号
+        positions: 番号 -> 辞書順の位置
+        block_size: 1ブロックの件数
+    """
+
+    def __init__(
+        self,
+        blocks: Sequence[int],
+        blob: bytes | memoryview,
+        order: Sequence[int],
+        positions: Sequence[int],
+        block_size: int = DEFAULT_BLOCK_SIZE,
+    ):
+        self._blocks = blocks
+        self._blob = blob
+        self._order = order
+        self._positions = positions
+        self._block_size = block_size
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str], block_size: int = DEFAULT_BLOCK_SIZE) -> "FrontCodedStringTable":
+        """文字列をメモリ上の前方圧縮した文字列表にまとめる"""
+        return cls(*build_front_coded(strings, block_size), block_size=block_size)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self.raw(index).decode("utf-8")
+
+    def raw(self, index: int) -> bytes:
+        """i番目の文字列をデコードせずに返す"""
+        block, offset = divmod(self._positions[index], self._block_size)
+        for raw in self._iter_block(block, offset + 1):
+            pass
+        return raw
+
+    def __iter__(self) -> Iterator[str]:
+        # 番号順に1件ずつ参照するとブロックを何度も展開するため、辞書順に全件を展開してから並べ替える
+        strings = [""] * len(self)
+        for position, raw in self._iter_sorted(0):
+            strings[self._order[position]] = raw.decode("utf-8")
+        yield from strings
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and bool(self.get(key))
+
+    @property
+    def nbytes(self) -> int:
+        """ブロックの開始位置・圧縮した文字列・並び順の配列のバイト数"""
+        return sum(memoryview(values).nbytes for values in (self._blocks, self._blob, self._order, self._positions))
+
+    def _iter_block(self, block: int, count: int | None = None) -> Iterator[bytes]:
+        """ブロックの先頭からcount件（省略時はブロックの全件）を展開して返す"""
+        blob = self._blob
+        if count is None:
+            count = min(self._block_size, len(self._order) - block * self._block_size)
+        length, position = _read_varint(blob, self._blocks[block])
+        previous = bytes(blob[position : position + length])
+        position += length
+        yield previous
+        for _ in range(count - 1):
+            # 長さは大半が1バイトに収まるため、関数を呼ばずに読む
+            common = blob[position]
+            if common < 0x80:
+                position += 1
+            else:
+                common, position = _read_varint(blob, position)
+            length = blob[position]
+            if length < 0x80:
+                position += 1
+            else:
+                length, position = _read_varint(blob, position)
+            previous = previous[:common] + blob[position : position + length]
+            position += length
+            yield previous
+
+    def _head(self, block: int) -> bytes:
+        blob = self._blob
+        position = self._blocks[block]
+        length = blob[position]
+        if length < 0x80:
+            position += 1
+        else:
+            length, position = _read_varint(blob, position)
+        return bytes(blob[position : position + length])
+
+    def _iter_sorted(self, block: int) -> Iterator[tuple[int, bytes]]:
+        """指定したブロックから末尾まで、(辞書順の位置, 文字列) を順に返す"""
+        for current in range(block, len(self._blocks)):
+            yield from enumerate(self._iter_block(current), start=current * self._block_size)
+
+    def _iter_from(self, raw: bytes) -> Iterator[tuple[int, bytes]]:
+        """rawより前の文字列を読み飛ばして、rawと等しいか後ろにある文字列を辞書順に返す"""
+        # 先頭がraw以下の最後のブロックから読む。先頭がrawと等しい場合は、
+        # 同じ文字列が前のブロックの末尾から続いている場合があるため、1つ前のブロックから読む
+        block = bisect_right(range(len(self._blocks)), raw, key=self._head) - 1
+        while block > 0 and self._head(block) == raw:
+            block -= 1
+        for position, current in self._iter_sorted(max(block, 0)):
+            if current >= raw:
+                yield position, current
+
+    def get(self, key: str) -> list[int]:
+        """
+        keyと等しい文字列の番号を全て返す
+
+        Returns:
+            list[int]: 番号（昇順）
+        """
+        raw = key.encode("utf-8")
+        indices = []
+        for position, current in self._iter_from(raw):
+            if current != raw:
+                break
+            indices.append(self._order[position])
+        return indices
+
+    def iter_prefix(self, prefix: str) -> Iterator[int]:
+        """
+        prefixで始まる文字列の番号を辞書順に返す
+
+        Args:
+            prefix: 前方一致させる文字列
+
+        Yields:
+            int: 文字列の番号
+        """
+        raw = prefix.encode("utf-8")
+        for position, current in self._iter_from(raw):
+            if not current.startswith(raw):
+                return
+            yield self._order[position]
@@ -0,0 +1,260 @@
+"""事務所（テナント）ごとの顧問先インデックスのキャッシュ
+
+会計事務所ごとに顧問先リストが異なるため、事務所IDごとのレジストリを1つのディレクトリに置き、
+検索のたびに事務所のインデックスを引きます。数千の事務所のインデックスを全て常駐させると
+メモリが足りないため、使われたものだけを読み込み、合計がメモリ量の上限を超えたら
+最も長く使われていないものから捨てます（LRU）。
+
+事務所のレジストリは次のいずれかで、上から順に探します。
+
+- {事務所ID}.snapshot: build_index.pyで作成したスナップショット（推奨。mmapするため読み込みが速い）
+- {事務所ID}.sqlite: build_index.py --format sqliteで作成したデータベース
+- {事務所ID}.tsv: ingest_houjin.pyと同じ形式のレジストリ（読み込みのたびにメモリ上に構築する。
+  読みキーは ingest_houjin.py が作成する {事務所ID}.readings.json を読み込む）
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import NamedTuple
+
+from .index import ClientIndex
+from .readings import load_readings, readings_path
+from .records import RecordStore
+from .registry import iter_registry
+from .reload import IndexLeases
+from .snapshot import IndexSnapshot
+
+TENANT_SUFFIXES = (".snapshot", ".sqlite", ".tsv")
+
+# レジストリ（TSV）からメモリ上に構築したインデックスのメモリ量の目安（ファイルサイズに対する倍率。実測で約35倍）
+TSV_MEMORY_FACTOR = 40
+
+# 事務所IDに使える文字（パスの区切りや "." を含めず、ディレクトリの外を指せないようにする）
+_TENANT_ID = re.compile(r"[\w-]+")
+
+
+class TenantCacheStats(NamedTuple):
+    """
+    事務所ごとのインデックスのキャッシュの状態
+
+    Attributes:
+        tenants: 読み込み済みの事務所数
+        bytes: 読み込み済みのインデックスのメモリ量の目安の合計
+        max_bytes: メモリ量の上限
+        hits: キャッシュにあった検索の回数
+        misses: 読み込みが必要だった検索の回数
+        evictions: 上限を超えて捨てたインデックスの数
+    """
+
+    tenants: int
+    bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+class _Entry(NamedTuple):
+    index: ClientIndex
+    nbytes: int
+    # 読み込んだときのファイルの (更新日時, サイズ)。変わっていれば読み込み直す
+    version: tuple[int, int]
+
+
+def find_tenant_source(directory: Path, tenant: str) -> Path | None:
+    """
+    事務所のレジストリのファイルを探す
+
+    Args:
+        directory: 事務所ごとのレジストリを置いたディレクトリ
+        tenant: 事務所ID
+
+    Returns:
+        Path | None: レジストリのファイル。見つからない場合はNone
+
+    Raises:
+        ValueError: 事務所IDに使えない文字が含まれる場合
+    """
+    if not _TENANT_ID.fullmatch(tenant):
+        raise ValueError(f"事務所IDに使えない文字が含まれています: {tenant!r}")
+    for suffix in TENANT_SUFFIXES:
+        path = directory / f"{tenant}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def load_tenant_index(path: Path, use_bloom: bool = True) -> tuple[ClientIndex, int]:
+    """
+    事務所のレジストリからインデックスを読み込む
+
+    Args:
+        path: find_tenant_sourceで見つけたファイル
+        use_bloom: スナップショット・SQLiteに顧問先名のBloomフィルタがあれば使う
+
+    Returns:
+        tuple: (インデックス, メモリ量の目安（バイト）)。スナップショット・SQLiteはファイルサイズ、
+            レジストリはファイルサイズのTSV_MEMORY_FACTOR倍
+    """
+    size = path.stat().st_size
+    if path.suffix == ".snapshot":
+        return ClientIndex.from_snapshot(IndexSnapshot.open(path), use_bloom=use_bloom), size
+    if path.suffix == ".sqlite":
+        return ClientIndex.from_sqlite(path, use_bloom=use_bloom), size
+
+    records = RecordStore.from_records(iter_registry(path))
+    readings = load_readings(readings_path(path), records.names)
+    return ClientIndex(records, readings=readings), size * TSV_MEMORY_FACTOR
+
+
+class TenantIndexCache:
+    """
+    事務所ごとのインデックスを、メモリ量の上限までLRUで保持する
+
+    検索側はacquireで事務所のインデックスを使用中として受け取り、1回の検索の間はその参照を使い続けます。
+    捨てたインデックス（SQLiteの接続など）は、使用中の検索が全て終わってから閉じます。
+    同じ事務所の読み込みが同時に要求された場合は1回だけ読み込み、他の事務所の検索は待たせません。
+
+    Args:
+        directory: 事務所ごとのレジストリを置いたディレクトリ
+        max_bytes: 保持するインデックスのメモリ量の目安の合計の上限。1件で上限を超える事務所も、
+            直近に使ったものとして1件は保持する
+        use_bloom: スナップショット・SQLiteに顧問先名のBloomフィルタがあれば使う
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, use_bloom: bool = True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.use_bloom = use_bloom
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._hits = self._misses = self._evictions = 0
+        # 使用中の数の加算（add）は、エントリを取り除くのと同じself._lockの中で行い、
+        # 捨てたインデックスの後始末（retire）より必ず先に数える。retireはself._lockの外で呼ぶ
+        self._leases: IndexLeases[ClientIndex] = IndexLeases(ClientIndex.close)
+        self._lock = threading.Lock()
+        self._loading: dict[str, threading.Lock] = {}
+
+    @contextmanager
+    def acquire(self, tenant: str) -> Iterator[ClientIndex | None]:
+        """
+        事務所のインデックスを使用中として取得する（キャッシュになければ読み込む）
+
+        withを抜けるまでは、キャッシュから捨てられても閉じられません。
+
+        Args:
+            tenant: 事務所ID
+
+        Yields:
+            ClientIndex | None: 事務所のインデックス。レジストリがない場合はNone
+
+        Raises:
+            ValueError: 事務所IDに使えない文字が含まれる場合
+        """
+        index = self._get(tenant)
+        if index is None:
+            yield None
+            return
+        try:
+            yield index
+        finally:
+            self._leases.release(index)
+
+    def _get(self, tenant: str) -> ClientIndex | None:
+        """事務所のインデックスを使用中として返す（呼び出し側で使い終えたら_leases.releaseを呼ぶ）"""
+        path = find_tenant_source(self.directory, tenant)
+        if path is None:
+            self.invalidate(tenant)
+            return None
+        stat = path.stat()
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            index = self._hit(tenant, version)
+            if index is not None:
+                return index
+            loading = self._loading.setdefault(tenant, threading.Lock())
+
+        # 読み込みは事務所ごとのロックで行い、他の事務所の検索を止めない
+        with loading:
+            try:
+                with self._lock:
+                    index = self._hit(tenant, version)
+                    if index is not None:
+                        return index
+                    self._misses += 1
+
+                index, nbytes = load_tenant_index(path, self.use_bloom)
+                retired: list[ClientIndex] = []
+                with self._lock:
+                    retired.extend(self._remove(tenant))
+                    self._entries[tenant] = _Entry(index, nbytes, version)
+                    self._bytes += nbytes
+                    self._leases.add(index)
+                    while self._bytes > self.max_bytes and len(self._entries) > 1:
+                        retired.extend(self._remove(next(iter(self._entries))))
+                        self._evictions += 1
+            finally:
+                # 読み込みに失敗した場合も、次の検索が読み込み直せるようにロックを片付ける
+                with self._lock:
+                    if self._loading.get(tenant) is loading:
+                        del self._loading[tenant]
+        self._retire(retired)
+        return index
+
+    def _hit(self, tenant: str, version: tuple[int, int]) -> ClientIndex | None:
+        """キャッシュにあるファイルと同じ版のインデックスを使用中にして返す（self._lockの中で呼ぶ）"""
+        entry = self._entries.get(tenant)
+        if entry is None or entry.version != version:
+            return None
+        self._entries.move_to_end(tenant)
+        self._hits += 1
+        self._leases.add(entry.index)
+        return entry.index
+
+    def _remove(self, tenant: str) -> list[ClientIndex]:
+        """エントリを取り除き、後始末するインデックスを返す（self._lockの中で呼ぶ）"""
+        entry = self._entries.pop(tenant, None)
+        if entry is None:
+            return []
+        self._bytes -= entry.nbytes
+        return [entry.index]
+
+    def _retire(self, indexes: list[ClientIndex]) -> None:
+        for index in indexes:
+            self._leases.retire(index)
+
+    def invalidate(self, tenant: str | None = None) -> None:
+        """
+        キャッシュから捨てる（次の検索で読み込み直す）
+
+        Args:
+            tenant: 事務所ID（省略時は全ての事務所）
+        """
+        with self._lock:
+            if tenant is None:
+                retired = [entry.index for entry in self._entries.values()]
+                self._entries.clear()
+                self._bytes = 0
+                self._loading.clear()
+            else:
+                retired = self._remove(tenant)
+                self._loading.pop(tenant, None)
+        self._retire(retired)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, tenant: object) -> bool:
+        return tenant in self._entries
+
+    def stats(self) -> TenantCacheStats:
+        """キャッシュの状態"""
+        with self._lock:
+            return TenantCacheStats(
+                len(self._entries), self._bytes, self.max_bytes, self._hits, self._misses, self._evictions
+            )
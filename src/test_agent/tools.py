@@ -1,50 +1,441 @@
 """顧問先情報取得・処理ツール"""
 
-from typing import Any
+import os
 import sys
+import threading
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .client_index import (
+    ClientIndex,
+    IndexReloader,
+    IndexSnapshot,
+    IndexStatus,
+    RecordStore,
+    SegmentedIndex,
+    ShardedIndex,
+    TenantIndexCache,
+    is_valid_corporate_number,
+    iter_registry,
+    load_readings,
+    parse_corporate_number,
+    readings_path,
+)
+
+if TYPE_CHECKING:
+    from google.adk.tools import ToolContext
 
-# プロジェクトルートをパスに追加
 project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
 
-from companies_12000_list import companies
+
+def _env_path(name: str) -> Path | None:
+    value = os.environ.get(name)
+    return Path(value) if value else None
+
+
+# 顧問先インデックスのスナップショット（build_index.pyで作成）。指定した場合はmmapして参照する
+SNAPSHOT_PATH = _env_path("CLIENT_INDEX_SNAPSHOT")
+
+# 顧問先インデックスのスナップショットを置いた共有メモリの名前（publish_index.pyで作成）。指定した場合は読み取り専用で参照する
+SHARED_MEMORY_NAME = os.environ.get("CLIENT_INDEX_SHARED_MEMORY") or None
+
+# 顧問先インデックスのSQLiteデータベース（build_index.py --format sqliteで作成）。指定した場合はファイルを直接検索する
+SQLITE_PATH = _env_path("CLIENT_INDEX_SQLITE")
+
+# スナップショット・SQLiteデータベースに顧問先名のBloomフィルタがあれば、完全一致の確認の前に使う（"0"で使わない）
+USE_BLOOM = (os.environ.get("CLIENT_INDEX_BLOOM") or "1") != "0"
+
+# 顧問先レジストリ（ingest_houjin.pyで法人番号CSVから作成したTSV）。未指定の場合は顧問先リストを使う
+REGISTRY_PATH = _env_path("CLIENT_REGISTRY_PATH")
+
+# 顧問先レジストリの差分ファイル（apply_diff.pyで法人番号の差分データから作成）。指定した場合は読み込んだインデックスに重ねる
+DELTA_PATH = _env_path("CLIENT_REGISTRY_DELTA")
+
+# 事務所ごとのレジストリを置いたディレクトリ（{事務所ID}.snapshot / .sqlite / .tsv）。
+# 指定した場合は、ADKのセッションの事務所IDまたはユーザーIDに対応する顧問先リストを検索する
+TENANTS_DIR = _env_path("CLIENT_TENANTS_DIR")
+
+# 事務所ごとのインデックスを保持するメモリ量の上限（MB）。超えたら最も長く使われていない事務所から捨てる
+TENANT_CACHE_MB = float(os.environ.get("CLIENT_TENANT_CACHE_MB") or 1024)
+
+# 事務所IDを持つセッション状態のキー（セッション単位、ユーザー単位の順に探す）
+TENANT_STATE_KEYS = ("client_tenant", "user:client_tenant")
+
+# 部分一致・あいまい検索を分散するシャード数（ワーカープロセス数）。2以上を指定した場合はシャードに分ける
+SHARDS = int(os.environ.get("CLIENT_INDEX_SHARDS") or 1)
+
+# スナップショット・レジストリ・差分ファイルの更新を確認する間隔（秒）。指定した場合は更新時に自動でリロードする
+RELOAD_INTERVAL = float(os.environ.get("CLIENT_INDEX_RELOAD_INTERVAL") or 0)
+
+# 部分一致・あいまい検索で返す候補の上限
+PARTIAL_MATCH_LIMIT = 20
+
+# 一括検索で1件ごとに返す候補の上限（結果を小さく保つため、単件検索より少なくする）
+BATCH_MATCH_LIMIT = 5
+
+
+def _load_index() -> ClientIndex | ShardedIndex | SegmentedIndex:
+    """
+    顧問先インデックスを読み込む
+
+    共有メモリが指定されていればそこに置いたスナップショットを、スナップショットが指定されていれば
+    mmapして参照し、SQLiteデータベースが指定されていれば
+    ファイルを直接検索します。いずれもなければレジストリ、
+    それもなければ顧問先リストからメモリ上に構築します。
+    シャード数が指定されていれば、部分一致・あいまい検索をシャードのワーカープロセスに分散します。
+    差分ファイルが指定されていれば、差分セグメントとして重ねます。
+    """
+    index: ClientIndex | ShardedIndex = _load_base_index()
+    if SHARDS > 1:
+        index = ShardedIndex(index, SHARDS)
+    if DELTA_PATH is not None and DELTA_PATH.exists():
+        return SegmentedIndex.from_file(index, DELTA_PATH)
+    return index
+
+
+def _load_base_index() -> ClientIndex:
+    if SHARED_MEMORY_NAME is not None:
+        return ClientIndex.from_snapshot(IndexSnapshot.attach(SHARED_MEMORY_NAME), use_bloom=USE_BLOOM)
+
+    if SNAPSHOT_PATH is not None:
+        return ClientIndex.from_snapshot(IndexSnapshot.open(SNAPSHOT_PATH), use_bloom=USE_BLOOM)
+
+    if SQLITE_PATH is not None:
+        return ClientIndex.from_sqlite(SQLITE_PATH, use_bloom=USE_BLOOM)
+
+    if REGISTRY_PATH is not None:
+        # 法人番号・法人種別・所在地も列ごとの配列で保持する
+        records: RecordStore | list[str] = RecordStore.from_records(iter_registry(REGISTRY_PATH))
+        names = records.names
+        # 顧問先名の読みキー（ingest_houjin.pyまたはbuild_index.py --format readingsで作成）
+        path = readings_path(REGISTRY_PATH)
+    else:
+        # プロジェクトルートをパスに追加（リロードのたびに追加しない）
+        if str(project_root) not in sys.path:
+            sys.path.insert(0, str(project_root))
+        from companies_12000_list import companies
+
+        records = names = companies
+        path = project_root / "companies_readings.json"
+
+    # 検索側では読みの変換もファイルの書き込みも行わない（ファイルがなければ読みによる検索を行わない）
+    return ClientIndex(records, readings=load_readings(path, names))
+
+
+def _close_index(index: ClientIndex | ShardedIndex | SegmentedIndex) -> None:
+    """リロードで差し替えたインデックスのシャードのワーカープロセスを終了する"""
+    if isinstance(index, ShardedIndex | SegmentedIndex):
+        index.close()
+
+
+# 顧問先インデックス（最初の検索時に構築し、リロード時は構築し終えてから差し替える）。
+# シャードのワーカープロセスもこのパッケージを読み込むため、モジュール読み込み時には構築しない
+_reloader: IndexReloader | None = None
+_reloader_lock = threading.Lock()
+
+
+def _get_reloader() -> IndexReloader:
+    global _reloader
+    if _reloader is None:
+        with _reloader_lock:
+            if _reloader is None:
+                reloader = IndexReloader(_load_index, prepare=lambda index: index.warm_up(), retire=_close_index)
+                if RELOAD_INTERVAL > 0:
+                    reloader.watch(
+                        [path for path in (SNAPSHOT_PATH, SQLITE_PATH, REGISTRY_PATH, DELTA_PATH) if path is not None],
+                        interval=RELOAD_INTERVAL,
+                    )
+                _reloader = reloader
+    return _reloader
+
+
+# 事務所ごとのインデックス（検索時に必要な事務所のものだけを読み込む）
+_tenant_cache = (
+    TenantIndexCache(TENANTS_DIR, int(TENANT_CACHE_MB * 1024 * 1024), use_bloom=USE_BLOOM)
+    if TENANTS_DIR is not None
+    else None
+)
+
+
+def _resolve_tenant(tool_context: "ToolContext | None") -> str | None:
+    """ADKのセッション状態の事務所ID、なければセッションのユーザーIDを返す（どちらもなければNone）"""
+    if tool_context is None:
+        return None
+    for key in TENANT_STATE_KEYS:
+        tenant = tool_context.state.get(key)
+        if tenant:
+            return str(tenant)
+    return tool_context.session.user_id or None
+
+
+@contextmanager
+def _tenant_index(tenant: str | None) -> Iterator[ClientIndex | None]:
+    """
+    事務所のインデックスを使用中として取得する
+
+    Yields:
+        ClientIndex | None: 事務所のインデックス（事務所IDが不明・不正、またはレジストリがない場合はNone）
+    """
+    assert _tenant_cache is not None
+    if tenant is None:
+        yield None
+        return
+    with ExitStack() as stack:
+        try:
+            index = stack.enter_context(_tenant_cache.acquire(tenant))
+        except ValueError:
+            index = None
+        yield index
+
+
+@contextmanager
+def _current_index(
+    tool_context: "ToolContext | None",
+) -> Iterator[tuple[ClientIndex | ShardedIndex | SegmentedIndex | None, str | None]]:
+    """
+    検索に使うインデックスを使用中として取得する
+
+    事務所ごとのレジストリを使う設定では事務所のインデックスを、それ以外は全体のインデックスを返します。
+    事務所ごとのレジストリを使う設定で事務所を特定できない場合は、他の事務所の顧問先を返さないよう
+    全体のインデックスにはフォールバックしません。
+    withを抜けるまでは、リロードで差し替えられたり事務所のキャッシュから捨てられたりしても、
+    インデックス（シャードのワーカープロセス・SQLiteの接続など）は後始末されません。
+
+    Yields:
+        tuple: (インデックス, 事務所ID)。事務所を特定できない、または事務所のレジストリがない場合、
+            インデックスはNone
+    """
+    if _tenant_cache is None:
+        with _get_reloader().acquire() as index:
+            yield index, None
+        return
+    tenant = _resolve_tenant(tool_context)
+    with _tenant_index(tenant) as index:
+        yield index, tenant
+
+
+def _tenant_not_found(tenant: str | None) -> dict[str, Any]:
+    message = (
+        f"事務所「{tenant}」の顧問先リストが登録されていません。管理者に確認してください"
+        if tenant is not None
+        else "ご利用の事務所を特定できないため、顧問先リストを検索できません。管理者に確認してください"
+    )
+    return {"success": False, "error": "tenant_not_found", "message": message}
 
 
-def step1_get_client_info(client_name: str) -> dict[str, Any]:
+def step1_get_client_info(client_name: str, tool_context: "ToolContext | None" = None) -> dict[str, Any]:
     """
     【ステップ1】顧問先情報取得ツール
 
     ⚠️ 重要: このツールは必ずstep2_process_client_dataの前に実行してください
 
-    顧問先事業所リストから指定された名前に完全一致する顧問先を検索します。
-    完全一致検索を行い、該当する顧問先を全て返します。
+    顧問先事業所リストから指定された名前に一致する顧問先を検索します。
+    完全一致で見つからない場合は、全角/半角・大文字/小文字・空白の違いを吸収して検索し、
+    それでも見つからない場合は法人格（株式会社など）の有無や前後の違いを無視した候補や、
+    読み（ひらがな・カタカナ・ローマ字）が一致する候補を返します。
+    いずれにも一致しない場合は、名称の一部として含む顧問先を上位から返し（部分一致）、
+    それもない場合は1文字程度の打ち間違いを許容して近い顧問先を返します（あいまい検索）。
+    該当する顧問先は登録されている正式な表記で返します。
+
+    13桁の法人番号を渡した場合は、チェックデジットを検証したうえで法人番号で検索します。
+    名称の検索は行わないため、同名の顧問先があっても1件に確定できます。
+
+    事務所ごとの顧問先リストを使う設定では、セッションの事務所の顧問先リストだけを検索します。
 
     Args:
-        client_name: 検索する顧問先名（完全一致）
+        client_name: 検索する顧問先名、または13桁の法人番号
+        tool_context: ADKが渡すツールの実行コンテキスト（事務所IDの取得に使う）
 
     Returns:
         dict: 検索結果
             - success: 検索の成功/失敗
-            - matches: 一致した顧問先のリスト
-            - count: 一致件数
+            - matches: 一致した顧問先のリスト（登録されている正式な表記。部分一致・あいまい検索は上位のみ）
+            - count: 一致件数（部分一致・あいまい検索の場合はmatchesに含まれない分も含む総件数）
             - query: 検索クエリ
+            - match_type: 一致種別（exact: 完全一致 / normalized: 表記ゆれ吸収 /
+              core_name: 法人格を除いた名称の一致 / reading: 読みの一致 /
+              partial: 部分一致 / fuzzy: あいまい検索 / corporate_number: 法人番号の一致 / None: 一致なし）
+            - truncated: 件数が多く、matchesが一部のみの場合True
+            - records: matchesと同じ順の顧問先の詳細（法人番号・所在地などを登録している場合のみ）。
+              同名の顧問先は法人番号・都道府県・法人種別で区別してください
+            - error: 法人番号のチェックデジットが正しくない場合は "invalid_corporate_number"、
+              事務所の顧問先リストが登録されていない場合は "tenant_not_found"
+    """
+    # 検索の途中でリロードされても同じインデックスを使い続けるよう、参照を一度だけ取得する
+    with _current_index(tool_context) as (index, tenant):
+        if index is None:
+            return {
+                "matches": [],
+                "count": 0,
+                "query": client_name,
+                "match_type": None,
+                "truncated": False,
+                **_tenant_not_found(tenant),
+            }
+
+        corporate_number = parse_corporate_number(client_name)
+        if corporate_number is not None and not is_valid_corporate_number(corporate_number):
+            return {
+                "success": False,
+                "matches": [],
+                "count": 0,
+                "query": client_name,
+                "match_type": None,
+                "truncated": False,
+                "error": "invalid_corporate_number",
+                "message": f"法人番号「{corporate_number}」のチェックデジットが正しくありません。番号を確認してください",
+            }
+
+        if corporate_number is not None:
+            # 法人番号の索引を1回引くだけで確定する（名称の正規化・あいまい検索は行わない）
+            lookup = index.find_corporate_number(corporate_number)
+        else:
+            # インデックスを参照（完全一致 -> 表記ゆれ吸収 -> 法人格を除いた名称 -> 読み -> 部分一致 -> あいまい検索）
+            lookup = index.lookup(client_name, limit=PARTIAL_MATCH_LIMIT)
+
+        result: dict[str, Any] = {
+            "success": lookup.total > 0,
+            "matches": lookup.matches,
+            "count": lookup.total,
+            "query": client_name,
+            "match_type": lookup.match_type,
+            "truncated": lookup.total > len(lookup.matches),
+        }
+        if index.records.has_details:
+            result["records"] = [index.records.describe(record_id) for record_id in lookup.record_ids]
+
+        return result
+
+
+def step1_get_clients_info(client_names: list[str], tool_context: "ToolContext | None" = None) -> dict[str, Any]:
+    """
+    【ステップ1】顧問先情報一括取得ツール
+
+    ⚠️ 重要: このツールは必ずstep2_process_client_dataの前に実行してください
+
+    複数の顧問先名をまとめて検索します。検索方法はstep1_get_client_infoと同じです。
+    ユーザーから複数の顧問先名が提供された場合は、1件ずつstep1_get_client_infoを呼ぶ代わりに
+    このツールを1回だけ実行してください。
+
+    Args:
+        client_names: 検索する顧問先名のリスト
+        tool_context: ADKが渡すツールの実行コンテキスト（事務所IDの取得に使う）
+
+    Returns:
+        dict: 検索結果
+            - success: 全ての顧問先名に候補が見つかった場合True
+            - results: 入力順の検索結果のリスト。各要素は以下の通り
+                - query: 検索クエリ
+                - match_type: 一致種別（step1_get_client_infoと同じ）
+                - matches: 一致した顧問先のリスト（登録されている正式な表記。上位のみ）
+                - count: 一致件数
+            - resolved: 1件だけに一致した顧問先名の数
+            - unresolved: 一致しなかった検索クエリのリスト
+            - error: 事務所の顧問先リストが登録されていない場合のみ "tenant_not_found"
     """
-    # 完全一致検索
-    matches = [company for company in companies if client_name == company]
+    with _current_index(tool_context) as (index, tenant):
+        if index is None:
+            return {"results": [], "resolved": 0, "unresolved": list(client_names), **_tenant_not_found(tenant)}
+        lookups = index.lookup_many(client_names, limit=BATCH_MATCH_LIMIT)
+
+    results = [
+        {
+            "query": client_name,
+            "match_type": lookup.match_type,
+            "matches": lookup.matches,
+            "count": lookup.total,
+        }
+        for client_name, lookup in zip(client_names, lookups)
+    ]
+    unresolved = [result["query"] for result in results if result["count"] == 0]
 
-    result = {
-        "success": len(matches) > 0,
-        "matches": matches,
-        "count": len(matches),
-        "query": client_name,
+    return {
+        "success": not unresolved,
+        "results": results,
+        "resolved": sum(1 for result in results if result["count"] == 1),
+        "unresolved": unresolved,
     }
 
+
+def complete_client_name(prefix: str, limit: int = 10, tenant: str | None = None) -> list[str]:
+    """
+    入力途中の顧問先名から登録名の候補を返す（入力補完UI用、エージェントのツールではない）
+
+    ユーザーがLLMに渡す前に正確な登録名を選べるよう、step1と同じインデックスを前方一致で検索します。
+
+    Args:
+        prefix: 入力途中の顧問先名
+        limit: 返す候補の上限
+        tenant: 事務所ID（事務所ごとのレジストリを使う設定では必須。その事務所の顧問先だけを返す）
+
+    Returns:
+        list[str]: 候補の登録名（事務所ごとのレジストリを使う設定で、事務所IDがないか
+            事務所のレジストリがない場合は空）
+    """
+    if _tenant_cache is None:
+        with _get_reloader().acquire() as index:
+            return index.complete(prefix, limit)
+    with _tenant_index(tenant) as index:
+        return index.complete(prefix, limit) if index is not None else []
+
+
+def reload_client_index(background: bool = False) -> IndexStatus | None:
+    """
+    顧問先インデックスを読み込み直す（管理用、エージェントのツールではない）
+
+    新しいインデックスを構築し終えてから差し替えるため、実行中の検索は止まりません。
+    読み込みに失敗した場合は、元のインデックスを使い続けます。
+
+    Args:
+        background: 別スレッドで読み込み、完了を待たずに戻る
+
+    Returns:
+        IndexStatus | None: 読み込み後の状態（backgroundの場合はNone）
+    """
+    if background:
+        _get_reloader().reload_in_background()
+        return None
+    return _get_reloader().reload()
+
+
+def get_client_index_status(tenant: str | None = None) -> dict[str, Any]:
+    """
+    顧問先インデックスの版数と読み込み時間を返す（監視用、エージェントのツールではない）
+
+    事務所ごとのレジストリを使う設定では全体のインデックスは使わないため読み込まず、
+    キャッシュの状態と、事務所IDを指定した場合はその事務所の件数を返します。
+
+    Args:
+        tenant: 事務所ID（事務所ごとのレジストリを使う設定の場合のみ）
+
+    Returns:
+        dict: 状態
+            - version: 読み込むたびに1ずつ増える版数（全体のインデックスの場合のみ）
+            - loaded_at: 読み込みが完了した日時（全体のインデックスの場合のみ）
+            - load_seconds: 読み込みにかかった秒数（全体のインデックスの場合のみ）
+            - last_error: 直近のリロードのエラー（成功した場合はNone。全体のインデックスの場合のみ）
+            - record_count: 顧問先の件数（事務所ごとのレジストリを使う設定では、指定した事務所の件数。
+              事務所のレジストリがない場合はNone）
+            - tenant: 指定した事務所ID（事務所ごとのレジストリを使う設定で指定した場合のみ）
+            - tenants: 事務所ごとのインデックスのキャッシュの状態（事務所ごとのレジストリを使う場合のみ）
+    """
+    if _tenant_cache is None:
+        index, status = _get_reloader().current
+        return {**status._asdict(), "record_count": len(index)}
+
+    result: dict[str, Any] = {}
+    if tenant is not None:
+        with _tenant_index(tenant) as index:
+            result["tenant"] = tenant
+            result["record_count"] = len(index) if index is not None else None
+    result["tenants"] = _tenant_cache.stats()._asdict()
     return result
 
 
 def step2_process_client_data(
-    client_name: str
+    client_name: str, tool_context: "ToolContext | None" = None
 ) -> dict[str, Any]:
     """
     【ステップ2】顧問先情報をもとに処理をするツール
@@ -57,6 +448,7 @@ def step2_process_client_data(
 
     Args:
         client_name: 処理対象の顧問先名（完全一致が必須）
+        tool_context: ADKが渡すツールの実行コンテキスト（事務所IDの取得に使う）
 
     Returns:
         dict: 処理結果
@@ -66,8 +458,15 @@ def step2_process_client_data(
             - message: 処理結果のメッセージ
             - details: 処理の詳細情報
     """
-    # 顧問先の存在確認と検証（完全一致）
-    exact_match = client_name in companies
+    # 顧問先の存在確認と検証（完全一致、step1と同じインデックスの集合を参照）
+    with _current_index(tool_context) as (index, tenant):
+        if index is None:
+            return {"client_name": client_name, "verified": False, "details": {}, **_tenant_not_found(tenant)}
+        exact_match = client_name in index
+        # 処理対象のレコード（同名の顧問先が複数ある場合は全て）
+        records = None
+        if exact_match and index.records.has_details:
+            records = [index.records.describe(record_id) for record_id in index.exact_record_ids(client_name)]
 
     if not exact_match:
         return {
@@ -85,10 +484,12 @@ def step2_process_client_data(
     verified_client = client_name
 
     # 自動入力処理の実行（シミュレーション）
-    details = {
+    details: dict[str, Any] = {
         "verified_client": verified_client,
         "timestamp": "2025-10-31T16:00:00+09:00",
     }
+    if records is not None:
+        details["records"] = records
 
     return {
         "success": True,
@@ -0,0 +1,85 @@
+"""顧問先名のBloomフィルタのテスト
+
+実行方法:
+    python -m unittest tests.test_bloom
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.test_agent.client_index import BloomFilter, ClientIndex, IndexSnapshot, write_snapshot, write_sqlite
+
+NAMES = [f"株式会社テスト{i:05d}" for i in range(5_000)] + ["青空商事株式会社", "株式会社みらい", "株式会社みらい"]
+MISSES = [f"{name}存在しない" for name in NAMES[:5_000]]
+
+
+class BloomFilterTest(unittest.TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter.build(NAMES, len(NAMES))
+        self.assertTrue(all(name in bloom for name in NAMES))
+        self.assertNotIn(0, bloom)
+
+    def test_error_rate(self):
+        for error_rate in (0.05, 0.01, 0.001):
+            bloom = BloomFilter.build(NAMES, len(NAMES), error_rate)
+            passed = sum(name in bloom for name in MISSES)
+            self.assertLess(passed / len(MISSES), error_rate * 2, error_rate)
+
+    def test_bits_per_key(self):
+        bloom = BloomFilter.build(NAMES, len(NAMES), bits_per_key=8)
+        self.assertEqual(bloom.nbytes, 8 * -(-len(NAMES) * 8 // 64))
+
+    def test_round_trip(self):
+        bloom = BloomFilter.build(NAMES, len(NAMES))
+        restored = BloomFilter(memoryview(bloom.to_bytes()).cast("Q"))
+        self.assertEqual([name in restored for name in NAMES + MISSES], [name in bloom for name in NAMES + MISSES])
+
+
+class FileBackedBloomTest(unittest.TestCase):
+    """Bloomフィルタの有無で、スナップショット・SQLiteの完全一致の結果が変わらない"""
+
+    @classmethod
+    def setUpClass(cls):
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        cls.snapshot_path = Path(directory.name) / "clients.snapshot"
+        cls.sqlite_path = Path(directory.name) / "clients.sqlite"
+        write_snapshot(cls.snapshot_path, NAMES)
+        write_sqlite(cls.sqlite_path, NAMES)
+        cls.queries = NAMES[::50] + MISSES[::50] + ["株式会社みらい", "", "ｱｵｿﾞﾗ"]
+
+    def assert_same_exact(self, filtered: ClientIndex, unfiltered: ClientIndex) -> None:
+        for query in self.queries:
+            self.assertEqual(query in filtered, query in unfiltered, query)
+            self.assertEqual(filtered.exact_record_ids(query), unfiltered.exact_record_ids(query), query)
+            self.assertEqual(filtered.lookup(query), unfiltered.lookup(query), query)
+
+    def test_snapshot(self):
+        snapshot = IndexSnapshot.open(self.snapshot_path)
+        self.assertIsNotNone(snapshot.bloom)
+        self.assert_same_exact(
+            ClientIndex.from_snapshot(snapshot), ClientIndex.from_snapshot(snapshot, use_bloom=False)
+        )
+
+    def test_sqlite(self):
+        self.assert_same_exact(
+            ClientIndex.from_sqlite(self.sqlite_path), ClientIndex.from_sqlite(self.sqlite_path, use_bloom=False)
+        )
+        self.assertEqual(ClientIndex.from_sqlite(self.sqlite_path).exact_record_ids("株式会社みらい"), [5001, 5002])
+
+    def test_without_bloom(self):
+        with tempfile.TemporaryDirectory() as directory:
+            snapshot_path = Path(directory) / "clients.snapshot"
+            sqlite_path = Path(directory) / "clients.sqlite"
+            write_snapshot(snapshot_path, NAMES, bloom_error_rate=0)
+            write_sqlite(sqlite_path, NAMES, bloom_error_rate=0)
+            snapshot = IndexSnapshot.open(snapshot_path)
+            self.assertIsNone(snapshot.bloom)
+            self.assertIn("株式会社みらい", ClientIndex.from_snapshot(snapshot))
+            self.assertIn("株式会社みらい", ClientIndex.from_sqlite(sqlite_path))
+            self.assertNotIn(MISSES[0], ClientIndex.from_sqlite(sqlite_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
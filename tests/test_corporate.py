@@ -0,0 +1,80 @@
+"""法人番号の検証と法人番号の索引のテスト
+
+実行方法:
+    python -m unittest tests.test_corporate
+"""
+
+import unittest
+
+from src.test_agent.client_index import ClientIndex, RecordStore, is_valid_corporate_number, parse_corporate_number
+from src.test_agent.client_index.corporate import CorporateNumberIndex, check_digit
+from src.test_agent.client_index.registry import ClientRecord
+
+# 国税庁の法人番号
+NTA_NUMBER = "7000012050002"
+
+
+class CheckDigitTest(unittest.TestCase):
+    """チェックデジットの検証"""
+
+    def test_valid_number(self):
+        self.assertEqual(check_digit(NTA_NUMBER[1:]), 7)
+        self.assertTrue(is_valid_corporate_number(NTA_NUMBER))
+
+    def test_rejects_one_digit_corruption(self):
+        # どの桁を1つ変えてもチェックデジットが合わなくなる
+        # （9で割った余りを使うため、0と9の置き換えだけは仕様上検出できない）
+        self.assertFalse(is_valid_corporate_number("7000012050003"))
+        self.assertFalse(is_valid_corporate_number("8000012050002"))
+        for position in range(13):
+            digit = NTA_NUMBER[position]
+            for replacement in "0123456789".replace(digit, ""):
+                if {digit, replacement} == {"0", "9"}:
+                    continue
+                corrupted = NTA_NUMBER[:position] + replacement + NTA_NUMBER[position + 1 :]
+                self.assertFalse(is_valid_corporate_number(corrupted), corrupted)
+
+    def test_rejects_malformed_numbers(self):
+        for number in ("", "700001205000", "70000120500021", "700001205000a", "７００００１２０５０００２"):
+            self.assertFalse(is_valid_corporate_number(number), number)
+
+    def test_parse(self):
+        for text in (NTA_NUMBER, "7-0000-1205-0002", "7 0000 1205 0002", "７００００１２０５０００２"):
+            self.assertEqual(parse_corporate_number(text), NTA_NUMBER, text)
+        for text in ("国税庁", "700001205000", "70000120500021", "7000012050002号"):
+            self.assertIsNone(parse_corporate_number(text), text)
+        # チェックデジットは検証しない
+        self.assertEqual(parse_corporate_number("7000012050003"), "7000012050003")
+
+
+class CorporateNumberIndexTest(unittest.TestCase):
+    """法人番号の索引"""
+
+    def test_get(self):
+        numbers = [7000012050002, 0, 1000000000001, 7000012050002, 0]
+        index = CorporateNumberIndex.from_numbers(numbers)
+
+        self.assertEqual(index.get(7000012050002), [0, 3])
+        self.assertEqual(index.get(1000000000001), [2])
+        self.assertEqual(index.get(7000012050003), [])
+        # 法人番号が不明なレコードは登録しない
+        self.assertEqual(index.get(0), [])
+
+    def test_find_corporate_number(self):
+        records = RecordStore.from_records(
+            [
+                ClientRecord("国税庁", NTA_NUMBER, "101", "東京都千代田区霞が関３丁目１－１"),
+                ClientRecord("株式会社青空", "", "301", ""),
+            ]
+        )
+        index = ClientIndex(records)
+
+        result = index.find_corporate_number(NTA_NUMBER)
+        self.assertEqual(result.match_type, "corporate_number")
+        self.assertEqual(result.matches, ["国税庁"])
+        self.assertEqual(result.record_ids, [0])
+        self.assertEqual(index.find_corporate_number("7000012050003").total, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+"""法人番号の差分データと差分セグメントのテスト
+
+実行方法:
+    python -m unittest tests.test_delta
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.test_agent.client_index import ClientIndex, RecordStore, RegistryDelta, SegmentedIndex
+from src.test_agent.client_index.corporate import check_digit
+from src.test_agent.client_index.houjin import HoujinRow
+from src.test_agent.client_index.registry import ClientRecord
+
+
+def corporate_number(base: int) -> str:
+    """基礎番号からチェックデジットの正しい法人番号を作る"""
+    digits = f"{base:012d}"
+    return f"{check_digit(digits)}{digits}"
+
+
+def houjin_row(number: str, name: str, process: str = "12", close_date: str = "", kind: str = "301") -> HoujinRow:
+    return HoujinRow(
+        sequence_number="1",
+        corporate_number=number,
+        process=process,
+        name=name,
+        kind=kind,
+        prefecture="東京都",
+        city="千代田区",
+        street="霞が関３丁目１－１",
+        close_date=close_date,
+        latest="1",
+        furigana="",
+    )
+
+
+AOZORA, MIRAI, HIKARI, KAZE = (corporate_number(base) for base in (1, 2, 3, 4))
+
+
+class RegistryDeltaTest(unittest.TestCase):
+    """差分データの反映"""
+
+    def test_deleted_processes_remove(self):
+        delta = RegistryDelta()
+        delta.apply_rows(
+            [
+                houjin_row(AOZORA, "株式会社青空", process="01"),
+                houjin_row(MIRAI, "株式会社みらい", process="01"),
+                # 81: 削除, 99: 削除
+                houjin_row(AOZORA, "株式会社青空", process="81"),
+                houjin_row(MIRAI, "株式会社みらい", process="99"),
+            ]
+        )
+
+        self.assertEqual(delta.upserts, {})
+        self.assertEqual(delta.removed, {AOZORA, MIRAI})
+
+    def test_closed_or_excluded_kinds_remove(self):
+        delta = RegistryDelta()
+        delta.apply_rows(
+            [
+                houjin_row(AOZORA, "株式会社青空", close_date="2025-10-31"),
+                houjin_row(MIRAI, "国税庁", kind="101"),
+                houjin_row(HIKARI, "株式会社ひかり"),
+                # 検索対象除外
+                houjin_row(KAZE, "株式会社風")._replace(hidden="1"),
+            ]
+        )
+
+        self.assertEqual(delta.removed, {AOZORA, MIRAI, KAZE})
+        self.assertEqual(list(delta.upserts), [HIKARI])
+
+    def test_latest_row_wins(self):
+        delta = RegistryDelta()
+        delta.apply_rows(
+            [
+                houjin_row(AOZORA, "株式会社青空", process="81"),
+                houjin_row(AOZORA, "株式会社あおぞら", process="01"),
+                houjin_row(MIRAI, "株式会社みらい"),
+                houjin_row(MIRAI, "株式会社ミライ"),
+                houjin_row(HIKARI, "株式会社ひかり")._replace(latest="0"),
+            ]
+        )
+
+        self.assertEqual(delta.removed, set())
+        self.assertEqual(
+            {number: record.name for number, record in delta.upserts.items()},
+            {
+                AOZORA: "株式会社あおぞら",
+                MIRAI: "株式会社ミライ",
+            },
+        )
+
+    def test_save_and_load(self):
+        delta = RegistryDelta()
+        delta.apply_rows([houjin_row(AOZORA, "株式会社青空"), houjin_row(MIRAI, "株式会社みらい", process="81")])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "clients.delta.tsv"
+            delta.save(path)
+            loaded = RegistryDelta.load(path)
+
+        self.assertEqual(loaded.upserts, delta.upserts)
+        self.assertEqual(loaded.removed, delta.removed)
+
+
+class SegmentedIndexTest(unittest.TestCase):
+    """ベースのインデックスに差分セグメントを重ねた検索"""
+
+    def setUp(self):
+        base = ClientIndex(
+            RecordStore.from_records(
+                [
+                    ClientRecord("株式会社青空", AOZORA, "301", "東京都千代田区"),
+                    ClientRecord("株式会社みらい", MIRAI, "301", "東京都千代田区"),
+                    ClientRecord("株式会社ひかり", HIKARI, "301", "東京都千代田区"),
+                ]
+            )
+        )
+        delta = RegistryDelta()
+        delta.apply_rows(
+            [
+                # 商号変更
+                houjin_row(AOZORA, "株式会社あおぞら"),
+                houjin_row(MIRAI, "株式会社みらい", process="81"),
+                houjin_row(HIKARI, "株式会社ひかり", process="99"),
+                houjin_row(KAZE, "株式会社かぜ", process="01"),
+            ]
+        )
+        self.index = SegmentedIndex(base, delta)
+
+    def test_upsert_overrides_base(self):
+        self.assertNotIn("株式会社青空", self.index)
+        self.assertIn("株式会社あおぞら", self.index)
+        self.assertEqual(self.index.lookup("株式会社青空").matches, [])
+
+        result = self.index.find_corporate_number(AOZORA)
+        self.assertEqual(result.match_type, "corporate_number")
+        self.assertEqual(result.matches, ["株式会社あおぞら"])
+        self.assertEqual(
+            self.index.records.describe(result.record_ids[0])["address"], "東京都千代田区霞が関３丁目１－１"
+        )
+
+    def test_deletions_hide_base_records(self):
+        for name, number in (("株式会社みらい", MIRAI), ("株式会社ひかり", HIKARI)):
+            self.assertNotIn(name, self.index)
+            self.assertEqual(self.index.lookup(name).total, 0, name)
+            self.assertEqual(self.index.find_corporate_number(number).total, 0, number)
+
+    def test_new_records(self):
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.lookup("株式会社かぜ").match_type, "exact")
+        self.assertEqual(self.index.find_corporate_number(KAZE).matches, ["株式会社かぜ"])
+        self.assertEqual(self.index.complete("株式会社"), ["株式会社あおぞら", "株式会社かぜ"])
+
+    def test_rejects_names_only_base(self):
+        # 法人番号を持たないベースでは、変更・削除されたレコードを墓標にできない
+        names_only = ClientIndex(["株式会社青空", "株式会社みらい"])
+        with self.assertRaises(ValueError):
+            SegmentedIndex(names_only, self.index.delta)
+        removal = RegistryDelta()
+        removal.remove(MIRAI)
+        with self.assertRaises(ValueError):
+            SegmentedIndex(names_only, removal)
+
+        # 空の差分なら重ねられる
+        index = SegmentedIndex(names_only, RegistryDelta())
+        self.assertEqual(len(index), 2)
+        self.assertFalse(index.records.has_details)
+
+
+if __name__ == "__main__":
+    unittest.main()
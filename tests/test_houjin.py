@@ -0,0 +1,94 @@
+"""法人番号CSVの取り込みのテスト
+
+実行方法:
+    python -m unittest tests.test_houjin
+"""
+
+import csv
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.test_agent.client_index import iter_registry, load_readings, readings_path
+from src.test_agent.client_index.houjin import iter_client_records, iter_houjin_csv
+
+
+def houjin_csv_row(
+    number: str,
+    name: str,
+    kind: str = "301",
+    close_date: str = "",
+    latest: str = "1",
+    hidden: str = "0",
+) -> list[str]:
+    """法人番号データ（CSV形式）の30列の1行を作る"""
+    row = [""] * 30
+    row[0] = "1"
+    row[1] = number
+    row[2] = "01"
+    row[6] = name
+    row[8] = kind
+    row[9], row[10], row[11] = "東京都", "千代田区", "霞が関３丁目１－１"
+    row[18] = close_date
+    row[23] = latest
+    row[28] = "テスト"
+    row[29] = hidden
+    return row
+
+
+ROWS = [
+    houjin_csv_row("1000000000001", "株式会社青空"),
+    houjin_csv_row("1000000000002", "株式会社みらい", close_date="2025-10-31"),
+    houjin_csv_row("1000000000003", "株式会社ひかり", latest="0"),
+    houjin_csv_row("1000000000004", "株式会社風", hidden="1"),
+    houjin_csv_row("1000000000005", "国税庁", kind="101"),
+    houjin_csv_row("1000000000006", "合同会社みなと"),
+]
+
+
+class HoujinCsvTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.path = self.directory / "13_tokyo_all.csv"
+        with open(self.path, mode="w", newline="", encoding="cp932") as f:
+            csv.writer(f).writerows(ROWS)
+
+    def test_parses_columns(self):
+        rows = list(iter_houjin_csv(self.path))
+
+        self.assertEqual(len(rows), len(ROWS))
+        self.assertEqual(rows[0].name, "株式会社青空")
+        self.assertEqual(rows[0].to_record().address, "東京都千代田区霞が関３丁目１－１")
+        self.assertEqual([row.hidden for row in rows], ["0", "0", "0", "1", "0", "0"])
+
+    def test_excludes_closed_old_and_hidden_rows(self):
+        names = [record.name for record in iter_client_records([self.path])]
+        self.assertEqual(names, ["株式会社青空", "合同会社みなと"])
+
+        # 閉鎖済み・過去の履歴・検索対象除外も取り込む場合でも、法人種別では絞り込む
+        names = [record.name for record in iter_client_records([self.path], active_only=False)]
+        self.assertEqual(names, ["株式会社青空", "株式会社みらい", "株式会社ひかり", "株式会社風", "合同会社みなと"])
+
+    def test_ingest_writes_registry_and_readings(self):
+        output = self.directory / "companies.tsv"
+        subprocess.run(
+            [sys.executable, "ingest_houjin.py", str(self.path), "-o", str(output), "--workers", "1"],
+            cwd=Path(__file__).parent.parent,
+            check=True,
+            capture_output=True,
+        )
+
+        names = [record.name for record in iter_registry(output)]
+        self.assertEqual(names, ["株式会社青空", "合同会社みなと"])
+        # 書き出しながら集めた顧問先名の読みキーが、レジストリから読み込んだ顧問先名と一致する
+        readings = load_readings(readings_path(output), names)
+        self.assertIsNotNone(readings)
+        self.assertEqual(len(readings.readings), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
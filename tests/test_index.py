@@ -0,0 +1,227 @@
+"""顧問先名の検索インデックスの段階ごとのテスト
+
+実行方法:
+    python -m unittest tests.test_index
+"""
+
+import unittest
+
+from src.test_agent.client_index import ClientIndex, build_readings
+
+NAMES = [
+    "株式会社青空",
+    "青空商事株式会社",
+    "有限会社青空",
+    "ＡＢＣ株式会社",
+    "株式会社 池田商店",
+    "合同会社みらい",
+    "株式会社ひかり電機",
+    "株式会社東西",
+    "池田商事株式会社",
+]
+
+
+class NormalizedStageTest(unittest.TestCase):
+    """全角/半角・大小文字・空白の違いを吸収する正規化一致"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.index = ClientIndex(NAMES)
+
+    def test_full_and_half_width(self):
+        for query in ("ABC株式会社", "abc株式会社", "ａｂｃ株式会社", "ＡＢＣ 株式会社"):
+            result = self.index.lookup(query)
+            self.assertEqual(result.match_type, "normalized", query)
+            self.assertEqual(result.matches, ["ＡＢＣ株式会社"], query)
+
+    def test_spaces(self):
+        for query in ("株式会社池田商店", "株式会社　池田商店", " 株式会社 池田商店 "):
+            self.assertEqual(self.index.find_normalized(query), ["株式会社 池田商店"], query)
+
+    def test_exact_match_comes_first(self):
+        result = self.index.lookup("株式会社 池田商店")
+        self.assertEqual(result.match_type, "exact")
+        self.assertEqual(result.record_ids, [4])
+
+    def test_no_match(self):
+        self.assertEqual(self.index.find_normalized("株式会社ｲｹﾀﾞ"), [])
+
+
+class CoreNameStageTest(unittest.TestCase):
+    """法人格を除いた名称の一致"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.index = ClientIndex(NAMES)
+
+    def test_legal_form_omitted_or_moved(self):
+        for query in ("青空", "青空株式会社", "（株）青空", "(株)青空"):
+            result = self.index.lookup(query)
+            self.assertEqual(result.match_type, "core_name", query)
+            self.assertEqual(set(result.matches), {"株式会社青空", "有限会社青空"}, query)
+
+    def test_same_legal_form_ranks_first(self):
+        self.assertEqual(self.index.find_core_name("青空株式会社"), ["株式会社青空", "有限会社青空"])
+        self.assertEqual(self.index.find_core_name("青空有限会社"), ["有限会社青空", "株式会社青空"])
+        self.assertEqual(self.index.find_core_name("(有)青空"), ["有限会社青空", "株式会社青空"])
+
+    def test_core_must_match_whole(self):
+        self.assertEqual(self.index.find_core_name("青空商事"), ["青空商事株式会社"])
+        self.assertEqual(self.index.find_core_name("株式会社"), [])
+
+
+class ReadingStageTest(unittest.TestCase):
+    """事前計算した読み（ひらがな・ローマ字）の一致"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.index = ClientIndex(NAMES, readings=build_readings(NAMES))
+
+    def test_kana_and_romaji(self):
+        for query in ("いけだしょうてん", "イケダショウテン", "ｲｹﾀﾞｼｮｳﾃﾝ", "ikeda shouten", "IKEDA SHOUTEN"):
+            result = self.index.lookup(query)
+            self.assertEqual(result.match_type, "reading", query)
+            self.assertEqual(result.matches, ["株式会社 池田商店"], query)
+
+    def test_legal_form_reading_is_stripped(self):
+        for query in ("かぶしきがいしゃいけだしょうてん", "カブシキガイシャ アオゾラ", "aozora kabushikigaisha"):
+            self.assertTrue(self.index.find_reading(query), query)
+        self.assertEqual(self.index.find_reading("あおぞら"), ["株式会社青空", "有限会社青空"])
+        self.assertEqual(self.index.find_reading("かぶしきがいしゃ"), [])
+
+    def test_without_readings(self):
+        index = ClientIndex(NAMES)
+        self.assertFalse(index.has_readings)
+        self.assertEqual(index.lookup("あおぞら").match_type, None)
+
+
+class PartialStageTest(unittest.TestCase):
+    """トライグラムの転置索引による部分一致"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.index = ClientIndex(NAMES)
+
+    def test_substring(self):
+        result = self.index.lookup("空商")
+        self.assertEqual(result.match_type, "partial")
+        self.assertEqual(result.matches, ["青空商事株式会社"])
+        self.assertEqual(self.index.find_partial("ａｂｃ", 10), (1, ["ＡＢＣ株式会社"]))
+
+    def test_limit_keeps_total(self):
+        total, matches = self.index.find_partial("池田", 10)
+        self.assertEqual((total, set(matches)), (2, {"株式会社 池田商店", "池田商事株式会社"}))
+        total, matches = self.index.find_partial("池田", 1)
+        self.assertEqual(total, 2)
+        self.assertEqual(len(matches), 1)
+
+    def test_no_match(self):
+        self.assertEqual(self.index.find_partial("存在", 10), (0, []))
+        self.assertEqual(self.index.lookup("存在しない会社").match_type, None)
+
+
+class FuzzyStageTest(unittest.TestCase):
+    """誤字を許容するあいまい検索"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.index = ClientIndex(NAMES)
+
+    def test_one_edit_typo(self):
+        for query, expected in (
+            ("株式会社ひかり電気", "株式会社ひかり電機"),  # 置換
+            ("ひかり電機機", "株式会社ひかり電機"),  # 挿入
+            ("池商事株式会社", "池田商事株式会社"),  # 削除
+            ("池畑商店", "株式会社 池田商店"),
+        ):
+            result = self.index.lookup(query)
+            self.assertEqual(result.match_type, "fuzzy", query)
+            self.assertEqual(result.matches, [expected], query)
+
+    def test_short_names_allow_fewer_edits(self):
+        # 法人格を除いた名称の長さnに対して、許容する編集距離は (n - 1) // 2
+        # 構築時の最大の編集距離を2にして、名称の長さによる上限だけを確かめる
+        index = ClientIndex(NAMES, fuzzy_max_distance=2)
+        # 2文字: 0（誤字を許容しない）
+        self.assertEqual(index.find_fuzzy("東酉"), [])
+        self.assertEqual(index.find_fuzzy("株式会社東酉"), [])
+        # 3文字: 1
+        self.assertEqual(index.find_fuzzy("みらぃ"), ["合同会社みらい"])
+        # 4文字: 1
+        self.assertEqual(index.find_fuzzy("池畑商店"), ["株式会社 池田商店"])
+        self.assertEqual(index.find_fuzzy("池畑商点"), [])
+        # 5文字: 2
+        self.assertEqual(index.find_fuzzy("ひがり電気"), ["株式会社ひかり電機"])
+
+    def test_max_distance(self):
+        # 構築時の最大の編集距離（既定は1）を超えては許容しない
+        self.assertEqual(self.index.find_fuzzy("ひがり電気"), [])
+        self.assertEqual(self.index.find_fuzzy("ひがり電気", max_distance=2), [])
+        index = ClientIndex(NAMES, fuzzy_max_distance=2)
+        self.assertEqual(index.find_fuzzy("ひがり電気", max_distance=1), [])
+        self.assertEqual(self.index.find_fuzzy("ひかり電気", max_distance=0), [])
+
+
+class LookupManyTest(unittest.TestCase):
+    """複数の顧問先名の一括検索"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.index = ClientIndex(NAMES, readings=build_readings(NAMES))
+
+    def test_same_as_lookup_in_input_order(self):
+        queries = ["株式会社東西", "存在しない会社", "ABC株式会社", "青空", "いけだしょうてん", "空商", "池畑商店"]
+        results = self.index.lookup_many(queries)
+        self.assertEqual(results, [self.index.lookup(query) for query in queries])
+        self.assertEqual(
+            [result.match_type for result in results],
+            ["exact", None, "normalized", "core_name", "reading", "partial", "fuzzy"],
+        )
+
+    def test_duplicates(self):
+        queries = ["青空", "株式会社東西", "青空", "存在しない会社", "株式会社東西", "存在しない会社"]
+        results = self.index.lookup_many(queries)
+        self.assertEqual(len(results), len(queries))
+        self.assertEqual(results[0], results[2])
+        self.assertEqual(results[1], results[4])
+        self.assertEqual(results[3], results[5])
+        self.assertEqual(results[1].matches, ["株式会社東西"])
+        self.assertEqual(results[3].total, 0)
+
+    def test_limit_and_empty(self):
+        (result,) = self.index.lookup_many(["池田"], limit=1)
+        self.assertEqual((result.match_type, result.total, len(result.matches)), ("partial", 2, 1))
+        self.assertEqual(self.index.lookup_many([]), [])
+
+
+class CompletionTest(unittest.TestCase):
+    """入力途中の顧問先名からの候補（入力補完）"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.index = ClientIndex(NAMES)
+
+    def test_normalized_prefix(self):
+        for prefix in ("ａｂ", "ab", "AB", "ＡＢＣ株"):
+            self.assertEqual(self.index.complete(prefix), ["ＡＢＣ株式会社"], prefix)
+        # 空白の違いも吸収する
+        self.assertEqual(self.index.complete("株式会社池")[0], "株式会社 池田商店")
+
+    def test_ordering(self):
+        # 正規化キーの前方一致（辞書順）の後に、法人格を除いた名称の前方一致を続ける
+        self.assertEqual(self.index.complete("青"), ["青空商事株式会社", "株式会社青空", "有限会社青空"])
+        self.assertEqual(self.index.complete("株式会社池"), ["株式会社 池田商店", "池田商事株式会社"])
+        matches = self.index.complete("株式会社")
+        self.assertEqual(matches, sorted(matches, key=lambda name: name.replace(" ", "")))
+
+    def test_limit(self):
+        self.assertEqual(self.index.complete("株式会社", limit=2), self.index.complete("株式会社")[:2])
+        self.assertEqual(self.index.complete("青", limit=1), ["青空商事株式会社"])
+
+    def test_empty_or_unknown_prefix(self):
+        for prefix in ("", "  ", "存在"):
+            self.assertEqual(self.index.complete(prefix), [], prefix)
+
+
+if __name__ == "__main__":
+    unittest.main()
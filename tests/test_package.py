@@ -0,0 +1,67 @@
+"""パッケージの遅延読み込み（PEP 562）のテスト
+
+実行方法:
+    python -m unittest tests.test_package
+"""
+
+import json
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+# 新しいインタプリタでパッケージを読み込み、読み込まれたモジュールを調べる
+SCRIPT = """
+import json
+import sys
+
+import src.test_agent as package
+
+def loaded():
+    return sorted(name for name in sys.modules if name.startswith(("google.adk", "src.test_agent.")))
+
+before = loaded()
+tool = package.step1_get_client_info
+print(json.dumps({
+    "before": before,
+    "after": loaded(),
+    "module": tool.__module__,
+    "cached": "step1_get_client_info" in vars(package) and package.step1_get_client_info is tool,
+    "dir": [name for name in package.__all__ if name in dir(package)],
+}))
+"""
+
+
+class LazyImportTest(unittest.TestCase):
+    def test_import_does_not_load_agent_or_index(self):
+        output = subprocess.run(
+            [sys.executable, "-c", SCRIPT],
+            cwd=Path(__file__).parent.parent,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        result = json.loads(output)
+
+        # import src.test_agent だけでは、google.adkもインデックスのモジュールも読み込まない
+        self.assertEqual(result["before"], [])
+        # 属性を参照したときに定義しているモジュールを読み込み、以降はモジュールの属性として参照する
+        self.assertEqual(result["module"], "src.test_agent.tools")
+        self.assertIn("src.test_agent.client_index", result["after"])
+        self.assertNotIn("src.test_agent.agent", result["after"])
+        self.assertFalse([name for name in result["after"] if name.startswith("google.adk")])
+        self.assertTrue(result["cached"])
+        self.assertEqual(
+            result["dir"],
+            ["root_agent", "step1_get_client_info", "step1_get_clients_info", "step2_process_client_data"],
+        )
+
+    def test_unknown_attribute(self):
+        import src.test_agent as package
+
+        with self.assertRaises(AttributeError):
+            package.no_such_attribute  # noqa: B018
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+"""インデックスのリロードと、差し替えたインデックスの後始末のテスト
+
+実行方法:
+    python -m unittest tests.test_reload
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from src.test_agent.client_index import ClientIndex, IndexReloader, ShardedIndex
+
+NAMES = [f"株式会社テスト{i:04d}" for i in range(400)] + ["青空商事株式会社", "株式会社みらい", "ひかり合同会社"]
+
+# 部分一致・あいまい検索（シャードのワーカープロセスで検索する段階）に進むクエリ
+QUERIES = ("テスト00", "商事", "株式会社みらし", "ひかり合同会杜", "存在しない会社")
+
+
+class IndexReloaderTest(unittest.TestCase):
+    """使用中のインデックスは、差し替えても最後の検索が終わるまで後始末しない"""
+
+    def setUp(self):
+        self.retired: list[object] = []
+        self.reloader = IndexReloader(object, retire=self.retired.append)
+
+    def test_retires_unused_index_on_swap(self):
+        first = self.reloader.index
+        self.reloader.reload()
+
+        self.assertEqual(self.retired, [first])
+        self.assertIsNot(self.reloader.index, first)
+
+    def test_defers_retire_until_release(self):
+        with self.reloader.acquire() as first:
+            with self.reloader.acquire() as same:
+                self.assertIs(same, first)
+                self.reloader.reload()
+                self.reloader.reload()
+                # 差し替え前に取得した検索が残っている間は後始末しない
+                second = self.retired[0]
+                self.assertEqual(self.retired, [second])
+            self.assertEqual(self.retired, [second])
+        self.assertEqual(self.retired, [second, first])
+
+    def test_prepares_initial_index(self):
+        prepared: list[object] = []
+        reloader = IndexReloader(object, prepare=prepared.append)
+        self.assertEqual(prepared, [reloader.index])
+
+        reloader.reload()
+        self.assertEqual(prepared[1:], [reloader.index])
+
+    def test_retires_index_that_failed_to_prepare(self):
+        prepared: list[object] = []
+
+        def prepare(index: object) -> None:
+            # 最初の読み込みの準備だけ成功する
+            if prepared:
+                raise ValueError("broken")
+            prepared.append(index)
+
+        reloader = IndexReloader(object, prepare=prepare, retire=self.retired.append)
+        first = reloader.index
+        status = reloader.reload()
+
+        self.assertEqual(status.version, 1)
+        self.assertEqual(status.last_error, "ValueError: broken")
+        self.assertIs(reloader.index, first)
+        self.assertEqual(len(self.retired), 1)
+        self.assertIsNot(self.retired[0], first)
+
+
+class IndexWatchTest(unittest.TestCase):
+    """ファイルの更新の監視"""
+
+    def wait_for(self, condition) -> None:
+        deadline = time.monotonic() + 5
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("timed out")
+            time.sleep(0.01)
+
+    def test_watch_survives_unexpected_error(self):
+        loads: list[object] = []
+
+        def loader() -> object:
+            # 2回目の読み込み（最初のリロード）だけ想定外の例外で失敗する
+            loads.append(object())
+            if len(loads) == 2:
+                raise RuntimeError("bug")
+            return loads[-1]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "clients.snapshot"
+            path.touch()
+            os.utime(path, ns=(0, 0))
+            reloader = IndexReloader(loader)
+            with self.assertLogs("src.test_agent.client_index.reload", level="ERROR") as logs:
+                reloader.watch([path], interval=0.01)
+                time.sleep(0.05)
+                os.utime(path, ns=(1, 1))
+                self.wait_for(lambda: logs.records)
+            self.assertIn("RuntimeError: bug", logs.output[0])
+            self.assertEqual(reloader.status.version, 1)
+
+            # 想定外の例外のあとも監視を続け、次の更新でリロードする
+            os.utime(path, ns=(2, 2))
+            self.wait_for(lambda: reloader.status.version == 2)
+            self.assertTrue(reloader._watcher.is_alive())
+
+
+class ShardedReloadTest(unittest.TestCase):
+    """シャードに分けたインデックスを、検索の途中でリロードする"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.memory = ClientIndex(NAMES)
+        cls.expected = {query: cls.memory.lookup(query) for query in QUERIES}
+
+    def load(self) -> ShardedIndex:
+        return ShardedIndex(ClientIndex(NAMES), 2)
+
+    def test_lookup_on_acquired_index_survives_reload(self):
+        reloader = IndexReloader(self.load, prepare=lambda index: index.warm_up(), retire=ShardedIndex.close)
+        self.addCleanup(lambda: reloader.index.close())
+        with reloader.acquire() as index:
+            index.warm_up()
+            reloader.reload()
+            # 差し替えられても、取得したインデックスのワーカーは検索が終わるまで終了しない
+            self.assertTrue(index._finalizer.alive)
+            for query in QUERIES:
+                self.assertEqual(index.lookup(query), self.expected[query], query)
+        self.assertFalse(index._finalizer.alive)
+        self.assertTrue(reloader.index._finalizer.alive)
+
+    def test_concurrent_lookups_during_reloads(self):
+        reloader = IndexReloader(self.load, prepare=lambda index: index.warm_up(), retire=ShardedIndex.close)
+        self.addCleanup(lambda: reloader.index.close())
+        reloader.index.warm_up()
+        done = threading.Event()
+
+        def search() -> list[str]:
+            mismatches = []
+            while not done.is_set():
+                for query in QUERIES:
+                    with reloader.acquire() as index:
+                        if index.lookup(query) != self.expected[query]:
+                            mismatches.append(query)
+            return mismatches
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(search) for _ in range(4)]
+            try:
+                for _ in range(3):
+                    self.assertIsNone(reloader.reload().last_error)
+            finally:
+                done.set()
+            # 検索中に差し替えられたインデックスでも、例外にならず同じ結果を返す
+            for future in futures:
+                self.assertEqual(future.result(), [])
+
+        self.assertEqual(reloader.status.version, 4)
+
+    def test_lookup_after_close_uses_base(self):
+        index = self.load()
+        index.warm_up()
+        index.close()
+
+        self.assertFalse(index._finalizer.alive)
+        for query in QUERIES:
+            self.assertEqual(index.lookup(query), self.expected[query], query)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,200 @@
+"""スナップショットの索引と文字列表の往復のテスト
+
+実行方法:
+    python -m unittest tests.test_snapshot
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.test_agent.client_index import (
+    ClientIndex,
+    IndexSnapshot,
+    PerfectHashTable,
+    RecordStore,
+    build_readings,
+    write_snapshot,
+)
+from src.test_agent.client_index.records import LegalFormNameTable
+from src.test_agent.client_index.registry import ClientRecord
+from src.test_agent.client_index.strings import FrontCodedStringTable
+
+NAMES = [
+    "株式会社青空",
+    "青空商事株式会社",
+    "株式会社 青空",
+    "有限会社青空",
+    "ｱｵｿﾞﾗ株式会社",
+    "アオゾラ株式会社",
+    "合同会社みらい",
+    "一般社団法人みらい",
+    "株式会社青空",  # 同名の顧問先
+    "ＡＢＣ株式会社",
+    "abc株式会社",
+    "青空",
+]
+
+
+class PerfectHashTableTest(unittest.TestCase):
+    """最小完全ハッシュ"""
+
+    def test_every_key_has_its_own_slot(self):
+        keys = [f"株式会社テスト{i:05d}" for i in range(5_000)]
+        table = PerfectHashTable.build(keys)
+
+        self.assertEqual(len(table), len(keys))
+        for record_id, key in enumerate(keys):
+            self.assertEqual(table.get(key), [record_id])
+        # 位置ごとに1つのキーだけが対応する
+        self.assertEqual(sorted(table._slots), list(range(len(keys))))
+
+    def test_duplicates_return_all_record_ids(self):
+        table = PerfectHashTable.build(NAMES)
+
+        self.assertEqual(len(table), len(set(NAMES)))
+        self.assertEqual(table.get("株式会社青空"), [0, 8])
+
+    def test_rejects_absent_keys(self):
+        keys = [f"株式会社テスト{i:05d}" for i in range(5_000)]
+        table = PerfectHashTable.build(keys)
+
+        for i in range(5_000, 10_000):
+            self.assertEqual(table.get(f"株式会社テスト{i:05d}"), [])
+        self.assertEqual(table.get(""), [])
+        self.assertNotIn("株式会社テスト", table)
+        self.assertNotIn(None, table)
+
+
+class FrontCodedStringTableTest(unittest.TestCase):
+    """前方圧縮した文字列表"""
+
+    def setUp(self):
+        # ブロックの境界をまたいで共通の接頭辞が続き、同じ文字列がブロックの境界に並ぶようにする
+        self.strings = [f"株式会社テスト{i % 37:03d}" for i in range(200)] + ["", "株", "株式会社"]
+        self.table = FrontCodedStringTable.from_strings(self.strings, block_size=4)
+
+    def test_round_trip(self):
+        self.assertEqual(len(self.table), len(self.strings))
+        self.assertEqual(list(self.table), self.strings)
+        self.assertEqual([self.table[i] for i in range(len(self.strings))], self.strings)
+        self.assertEqual(self.table[10:20], self.strings[10:20])
+
+    def test_get_across_block_boundaries(self):
+        for string in set(self.strings):
+            expected = [i for i, value in enumerate(self.strings) if value == string]
+            self.assertEqual(self.table.get(string), expected, string)
+        self.assertEqual(self.table.get("株式会社テスト999"), [])
+        self.assertEqual(self.table.get("株式"), [])
+
+    def test_prefix_across_block_boundaries(self):
+        for prefix in ("株式会社テスト01", "株式会社", "株", ""):
+            expected = sorted((value, i) for i, value in enumerate(self.strings) if value.startswith(prefix))
+            self.assertEqual(list(self.table.iter_prefix(prefix)), [i for _, i in expected], prefix)
+
+
+class LegalFormNameTableTest(unittest.TestCase):
+    """法人格を辞書化した顧問先名の列"""
+
+    def test_round_trip(self):
+        names = [*NAMES, "㈱青空", "（株）青空", "青空（株）", "(有)青空", "", "株式会社", "株式会社株式会社"]
+        table = LegalFormNameTable.from_names(names)
+
+        self.assertEqual(list(table), names)
+        self.assertEqual([table[i] for i in range(len(names))], names)
+        for name in set(names):
+            self.assertEqual(table.get(name), [i for i, value in enumerate(names) if value == name], name)
+        self.assertEqual(table.get("㈲青空"), [])
+        self.assertEqual(table.get("青空株式会社"), [])
+
+
+class SnapshotParityTest(unittest.TestCase):
+    """スナップショットを参照するインデックスとメモリ上のインデックスの検索結果の一致"""
+
+    QUERIES = (
+        *NAMES,
+        "株式会社青空",  # 完全一致（同名あり）
+        "株式会社　青空",  # 表記ゆれ
+        "ABC株式会社",
+        "青空株式会社",  # 法人格の位置の違い
+        "（株）青空",
+        "みらい",
+        "青",  # 部分一致
+        "空商",
+        "あおぞら",  # 読み
+        "aozora",
+        "青空商時株式会社",  # あいまい検索
+        "存在しない会社",
+        "",
+        "7000012050002",
+    )
+
+    @classmethod
+    def setUpClass(cls):
+        records = RecordStore.from_records(
+            ClientRecord(name, f"{1000000000000 + i}", "301", "東京都千代田区") for i, name in enumerate(NAMES)
+        )
+        readings = build_readings(records.names)
+        cls.memory = ClientIndex(records, readings=readings)
+        cls.directory = tempfile.TemporaryDirectory()
+        path = Path(cls.directory.name) / "clients.snapshot"
+        write_snapshot(path, records, readings)
+        cls.snapshot = ClientIndex.from_snapshot(IndexSnapshot.open(path))
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.snapshot
+        cls.directory.cleanup()
+
+    def test_lookup(self):
+        for query in self.QUERIES:
+            self.assertEqual(self.snapshot.lookup(query), self.memory.lookup(query), query)
+        self.assertEqual(self.snapshot.lookup_many(self.QUERIES), self.memory.lookup_many(self.QUERIES))
+
+    def test_exact_and_complete(self):
+        for query in self.QUERIES:
+            self.assertEqual(query in self.snapshot, query in self.memory, query)
+            self.assertEqual(self.snapshot.exact_record_ids(query), self.memory.exact_record_ids(query), query)
+            self.assertEqual(self.snapshot.complete(query), self.memory.complete(query), query)
+
+    def test_records(self):
+        self.assertEqual(list(self.snapshot.names), NAMES)
+        for record_id in range(len(NAMES)):
+            self.assertEqual(self.snapshot.records.describe(record_id), self.memory.records.describe(record_id))
+        corporate_number = f"{1000000000000 + 3}"
+        self.assertEqual(
+            self.snapshot.find_corporate_number(corporate_number),
+            self.memory.find_corporate_number(corporate_number),
+        )
+
+
+class SnapshotReproducibilityTest(unittest.TestCase):
+    """同じレコードからは、strのハッシュ値によらず同じバイト列のスナップショットができる"""
+
+    SCRIPT = (
+        "import sys; from pathlib import Path; from src.test_agent.client_index import write_snapshot; "
+        "write_snapshot(Path(sys.argv[1]), sys.argv[2:])"
+    )
+
+    def test_independent_of_hash_seed(self):
+        root = Path(__file__).parent.parent
+        with tempfile.TemporaryDirectory() as directory:
+            snapshots = []
+            for seed in ("1", "2"):
+                path = Path(directory) / f"clients{seed}.snapshot"
+                subprocess.run(
+                    [sys.executable, "-c", self.SCRIPT, str(path), *NAMES],
+                    cwd=root,
+                    env={**os.environ, "PYTHONHASHSEED": seed},
+                    check=True,
+                )
+                snapshots.append(path.read_bytes())
+
+        self.assertEqual(snapshots[0], snapshots[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
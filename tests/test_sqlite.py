@@ -0,0 +1,95 @@
+"""SQLiteデータベースを参照するインデックスのテスト
+
+実行方法:
+    python -m unittest tests.test_sqlite
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.test_agent.client_index import ClientIndex, RecordStore, build_readings, write_sqlite
+from src.test_agent.client_index.registry import ClientRecord
+
+NAMES = [
+    "株式会社青空",
+    "青空商事株式会社",
+    "株式会社 青空",
+    "有限会社青空",
+    "ｱｵｿﾞﾗ株式会社",
+    "アオゾラ株式会社",
+    "合同会社みらい",
+    "一般社団法人みらい",
+    "株式会社青空",  # 同名の顧問先
+    "ＡＢＣ株式会社",
+    "abc株式会社",
+    "青空",
+    "ひかり電機工業株式会社",
+]
+
+# 段階ごとのクエリ（メモリ上のインデックスでの一致種別）
+STAGE_QUERIES = {
+    "exact": ("株式会社青空", "青空商事株式会社", "ｱｵｿﾞﾗ株式会社"),
+    "normalized": ("株式会社　青空", "ABC株式会社", "ＡＢＣ 株式会社"),
+    "core_name": ("青空株式会社", "（株）青空", "みらい"),
+    "reading": ("あおぞら", "aozora"),
+    "partial": ("青", "空商", "電機"),
+    "fuzzy": ("青空商時株式会社", "ひかり電気工業株式会社"),
+}
+
+
+class SqliteParityTest(unittest.TestCase):
+    """SQLiteデータベースを参照するインデックスとメモリ上のインデックスの検索結果の一致"""
+
+    @classmethod
+    def setUpClass(cls):
+        records = RecordStore.from_records(
+            ClientRecord(name, f"{1000000000000 + i}", "301", "東京都千代田区") for i, name in enumerate(NAMES)
+        )
+        readings = build_readings(records.names)
+        cls.memory = ClientIndex(records, readings=readings)
+        cls.directory = tempfile.TemporaryDirectory()
+        path = Path(cls.directory.name) / "clients.sqlite"
+        write_sqlite(path, records, readings)
+        cls.sqlite = ClientIndex.from_sqlite(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.sqlite
+        cls.directory.cleanup()
+
+    def test_stages(self):
+        for stage, queries in STAGE_QUERIES.items():
+            for query in queries:
+                expected = self.memory.lookup(query)
+                # クエリがその段階で一致することを確かめてから比べる
+                self.assertEqual(expected.match_type, stage, query)
+                self.assertEqual(self.sqlite.lookup(query), expected, query)
+
+    def test_no_match(self):
+        for query in ("存在しない会社", "", "xyz"):
+            self.assertEqual(self.sqlite.lookup(query), self.memory.lookup(query), query)
+
+    def test_lookup_many(self):
+        queries = [query for queries in STAGE_QUERIES.values() for query in queries]
+        self.assertEqual(self.sqlite.lookup_many(queries), self.memory.lookup_many(queries))
+
+    def test_exact_and_complete(self):
+        for query in (*NAMES, "存在しない会社", "株式会社", "青"):
+            self.assertEqual(query in self.sqlite, query in self.memory, query)
+            self.assertEqual(self.sqlite.exact_record_ids(query), self.memory.exact_record_ids(query), query)
+            self.assertEqual(self.sqlite.complete(query), self.memory.complete(query), query)
+
+    def test_records(self):
+        self.assertEqual(list(self.sqlite.names), NAMES)
+        for record_id in range(len(NAMES)):
+            self.assertEqual(self.sqlite.records.describe(record_id), self.memory.records.describe(record_id))
+        corporate_number = f"{1000000000000 + 3}"
+        self.assertEqual(
+            self.sqlite.find_corporate_number(corporate_number),
+            self.memory.find_corporate_number(corporate_number),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""事務所ごとのインデックスのキャッシュのテスト
+
+実行方法:
+    python -m unittest tests.test_tenants
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.test_agent.client_index import TenantIndexCache, write_snapshot, write_sqlite
+
+TENANT_NAMES = {
+    "office1": ["株式会社青空", "青空商事株式会社"],
+    "office2": ["合同会社みらい", "株式会社ひかり"],
+    "office3": ["有限会社風", "株式会社みなと"],
+}
+
+
+class TenantIndexCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        for tenant, names in TENANT_NAMES.items():
+            write_snapshot(self.root / f"{tenant}.snapshot", names)
+        self.size = max(path.stat().st_size for path in self.root.iterdir())
+
+    def test_tenant_isolation(self):
+        cache = TenantIndexCache(self.root, self.size * 10)
+        with cache.acquire("office1") as office1, cache.acquire("office2") as office2:
+            self.assertIn("株式会社青空", office1)
+            self.assertNotIn("株式会社青空", office2)
+            self.assertEqual(office2.lookup("青空").match_type, None)
+            self.assertEqual(office2.lookup("みらい").matches, ["合同会社みらい"])
+
+        with cache.acquire("unknown") as index:
+            self.assertIsNone(index)
+        with self.assertRaises(ValueError), cache.acquire("../office1"):
+            pass
+
+    def test_lru_eviction_by_bytes(self):
+        cache = TenantIndexCache(self.root, self.size * 2)
+        for tenant in ("office1", "office2", "office1", "office3"):
+            with cache.acquire(tenant):
+                pass
+
+        # office2が最も長く使われていないため捨てられる
+        self.assertNotIn("office2", cache)
+        self.assertIn("office1", cache)
+        self.assertIn("office3", cache)
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.evictions), (1, 3, 1))
+        self.assertLessEqual(stats.bytes, stats.max_bytes)
+
+    def test_keeps_one_tenant_over_budget(self):
+        cache = TenantIndexCache(self.root, 1)
+        with cache.acquire("office1") as index:
+            self.assertIsNotNone(index)
+        self.assertEqual(len(cache), 1)
+
+    def test_reloads_on_mtime_change(self):
+        cache = TenantIndexCache(self.root, self.size * 10)
+        with cache.acquire("office1") as before:
+            self.assertNotIn("株式会社新青空", before)
+
+        path = self.root / "office1.snapshot"
+        write_snapshot(path, ["株式会社新青空"])
+        os.utime(path, ns=(1, 1))
+        with cache.acquire("office1") as after:
+            self.assertIn("株式会社新青空", after)
+            self.assertIsNot(after, before)
+        self.assertEqual(cache.stats().misses, 2)
+
+        path.unlink()
+        with cache.acquire("office1") as index:
+            self.assertIsNone(index)
+        self.assertNotIn("office1", cache)
+
+    def test_failed_load_can_be_retried(self):
+        cache = TenantIndexCache(self.root, self.size * 10)
+        path = self.root / "office4.snapshot"
+        path.write_bytes(b"broken" * 10)
+        with self.assertRaises(ValueError), cache.acquire("office4"):
+            pass
+        self.assertEqual(cache._loading, {})
+
+        write_snapshot(path, ["株式会社よつば"])
+        with cache.acquire("office4") as index:
+            self.assertIn("株式会社よつば", index)
+
+    def test_invalidate(self):
+        cache = TenantIndexCache(self.root, self.size * 10)
+        with cache.acquire("office1"), cache.acquire("office2"):
+            pass
+        cache.invalidate("office1")
+        self.assertEqual(len(cache), 1)
+        cache.invalidate()
+        self.assertEqual((len(cache), cache.stats().bytes, cache._loading), (0, 0, {}))
+
+
+class TenantSqliteCloseTest(unittest.TestCase):
+    """捨てたSQLiteのインデックスは、使用中の検索が終わってから接続を閉じる"""
+
+    def test_closes_evicted_index_after_last_reader(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            for tenant, names in TENANT_NAMES.items():
+                write_sqlite(root / f"{tenant}.sqlite", names)
+            size = max(path.stat().st_size for path in root.iterdir())
+            cache = TenantIndexCache(root, size)
+
+            with cache.acquire("office1") as office1:
+                with cache.acquire("office2"):
+                    pass
+                # 捨てられても、使用中の間は検索できる
+                self.assertNotIn("office1", cache)
+                self.assertIn("株式会社青空", office1)
+                self.assertEqual(office1.lookup("空商").match_type, "partial")
+            with self.assertRaises(sqlite3.ProgrammingError):
+                office1.lookup("株式会社青空")
+
+            cache.invalidate()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""顧問先情報取得ツールのテスト
+
+実行方法:
+    python -m unittest tests.test_tools
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.test_agent import tools
+from src.test_agent.client_index import ClientIndex, IndexReloader, TenantIndexCache, write_snapshot
+
+NAMES = [
+    "株式会社青空",
+    "青空商事株式会社",
+    "有限会社青空",
+    "株式会社 池田商店",
+    "合同会社みらい",
+    "株式会社ひかり電機",
+    "株式会社東西",
+]
+
+
+class ToolTestCase(unittest.TestCase):
+    """全体のインデックスをテスト用の顧問先リストに差し替える"""
+
+    def setUp(self):
+        self.index = ClientIndex(NAMES)
+        patcher = mock.patch.object(tools, "_reloader", IndexReloader(lambda: self.index))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class GetClientsInfoTest(ToolTestCase):
+    """step1_get_clients_info（複数の顧問先名の一括検索）"""
+
+    def test_results_in_input_order(self):
+        queries = ["株式会社東西", "株式会社　池田商店", "みらい", "存在しない会社", "ひかり電気"]
+        result = tools.step1_get_clients_info(queries)
+
+        self.assertEqual([item["query"] for item in result["results"]], queries)
+        self.assertEqual(
+            [item["match_type"] for item in result["results"]],
+            ["exact", "normalized", "core_name", None, "fuzzy"],
+        )
+        self.assertEqual(result["results"][2]["matches"], ["合同会社みらい"])
+        self.assertFalse(result["success"])
+        self.assertEqual(result["resolved"], 4)
+        self.assertEqual(result["unresolved"], ["存在しない会社"])
+
+    def test_duplicates(self):
+        queries = ["青空", "株式会社東西", "青空"]
+        result = tools.step1_get_clients_info(queries)
+
+        self.assertEqual(len(result["results"]), 3)
+        self.assertEqual(result["results"][0], result["results"][2])
+        self.assertEqual(result["results"][0]["count"], 2)
+        # 複数の候補に一致したものは確定した数に含めない
+        self.assertEqual(result["resolved"], 1)
+        self.assertTrue(result["success"])
+
+    def test_matches_single_lookup(self):
+        queries = ["株式会社青空", "空商", "存在しない会社"]
+        result = tools.step1_get_clients_info(queries)
+
+        for query, item in zip(queries, result["results"]):
+            single = tools.step1_get_client_info(query)
+            self.assertEqual(item["match_type"], single["match_type"], query)
+            self.assertEqual(item["count"], single["count"], query)
+
+
+class CompleteClientNameTest(ToolTestCase):
+    """complete_client_name（入力補完）"""
+
+    def test_same_as_index(self):
+        for prefix in ("株式会社", "青", "ｱｵ", "株式会社　池"):
+            self.assertEqual(tools.complete_client_name(prefix), self.index.complete(prefix), prefix)
+        self.assertEqual(tools.complete_client_name("株式会社", limit=2), self.index.complete("株式会社", 2))
+        self.assertEqual(tools.complete_client_name(""), [])
+
+    def test_tenant(self):
+        with tempfile.TemporaryDirectory() as directory:
+            write_snapshot(Path(directory) / "office1.snapshot", ["株式会社青空", "青空商事株式会社"])
+            with mock.patch.object(tools, "_tenant_cache", TenantIndexCache(Path(directory), 1024 * 1024)):
+                self.assertEqual(
+                    tools.complete_client_name("青", tenant="office1"), ["青空商事株式会社", "株式会社青空"]
+                )
+                # 事務所を特定できない場合は、全体のインデックスにフォールバックしない
+                self.assertEqual(tools.complete_client_name("青"), [])
+                self.assertEqual(tools.complete_client_name("青", tenant="office2"), [])
+                self.assertEqual(tools.complete_client_name("青", tenant="../office1"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()